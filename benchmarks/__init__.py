@@ -0,0 +1 @@
+"""Benchmarks for the blockchain network layer."""
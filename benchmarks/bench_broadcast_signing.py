@@ -0,0 +1,89 @@
+"""
+Benchmark per-broadcast CPU time against peer count.
+
+Compares the legacy path (serialize and sign once per peer through
+send_with_retry) with BlockchainNetwork.broadcast, which signs once with
+_prepare_payload and fans the prepared payload out. The HTTP exchange is
+replaced by a no-op and the P2P transport is disabled, so only
+serialization and signing are measured.
+
+Run from the repository root:
+    python -m benchmarks.bench_broadcast_signing --peers 1 4 16 64
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from network.core import BlockchainNetwork
+
+
+def _transaction(index: int) -> dict:
+    return {
+        "tx_id": f"{index:064x}",
+        "sender": "1" * 34,
+        "recipient": "2" * 34,
+        "amount": 12.5,
+        "inputs": [{"tx_id": "ab" * 32, "output_index": 0, "public_key": "cd" * 64, "signature": "ef" * 64}],
+    }
+
+
+async def _no_request(url, serialized_data, headers, method, max_retries):
+    return True, None
+
+
+def _make_network() -> BlockchainNetwork:
+    network = BlockchainNetwork(None, "bench-node", "127.0.0.1", 18333)
+    network._request = _no_request
+    network.config["transport"]["enabled"] = False
+    return network
+
+
+async def _legacy_broadcast(network: BlockchainNetwork, data: dict) -> None:
+    tasks = [
+        network.send_with_retry(f"https://{peer['host']}:{peer['port']}/receive_transaction", data)
+        for peer in network.peers.values()
+    ]
+    await asyncio.gather(*tasks)
+
+
+async def _sign_once_broadcast(network: BlockchainNetwork, data: dict) -> None:
+    await network.broadcast("/receive_transaction", data)
+
+
+async def run(peer_counts, rounds: int) -> None:
+    network = _make_network()
+    print(f"{'peers':>6} {'legacy ms':>11} {'sign-once ms':>13} {'speedup':>8}")
+    for count in peer_counts:
+        network.peers = {
+            f"peer{i}": {"host": "127.0.0.1", "port": 20000 + i, "public_key": ""}
+            for i in range(count)
+        }
+        timings = {}
+        for name, broadcast in (("legacy", _legacy_broadcast), ("sign_once", _sign_once_broadcast)):
+            start = time.process_time()
+            for i in range(rounds):
+                await broadcast(network, {"transaction": _transaction(i)})
+            timings[name] = (time.process_time() - start) / rounds * 1000
+        print(f"{count:>6} {timings['legacy']:>11.2f} {timings['sign_once']:>13.2f} "
+              f"{timings['legacy'] / timings['sign_once']:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--peers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger("BlockchainNetwork").setLevel(logging.WARNING)
+
+    # BlockchainNetwork writes its config and certificates to the working directory
+    workdir = tempfile.mkdtemp(prefix="bench-broadcast-")
+    os.chdir(workdir)
+    asyncio.run(run(args.peers, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
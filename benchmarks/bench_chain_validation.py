@@ -0,0 +1,94 @@
+"""
+Benchmark sync validation cost against local chain height.
+
+For each height a synthetic chain is built and a peer offers the same short
+suffix on several sync ticks. The legacy path concatenates the local chain
+with the suffix and revalidates everything; ChainValidator checks only the
+suffix against the cached tip state, rehashing each offered block.
+
+Run from the repository root:
+    python -m benchmarks.bench_chain_validation --heights 1000 10000 100000
+"""
+
+import argparse
+import hashlib
+import time
+
+from network.sync import ChainValidator, TipState
+
+
+class SyntheticBlock:
+    """Block stand-in with the fields ChainValidator reads"""
+
+    def __init__(self, index: int, previous_hash: str, difficulty: int = 1):
+        self.index = index
+        self.previous_hash = previous_hash
+        self.difficulty = difficulty
+        self.nonce = 0
+        # Grind a nonce so the hash meets the difficulty prefix
+        self.hash = self.calculate_hash()
+        while not self.hash.startswith("0" * difficulty):
+            self.nonce += 1
+            self.hash = self.calculate_hash()
+
+    def calculate_hash(self) -> str:
+        return hashlib.sha256(f"{self.index}{self.previous_hash}{self.nonce}".encode()).hexdigest()
+
+
+class SyntheticBlockchain:
+    def __init__(self, height: int):
+        self.chain = [SyntheticBlock(0, "0" * 64)]
+        for index in range(1, height + 1):
+            self.chain.append(SyntheticBlock(index, self.chain[-1].hash))
+
+    def get_total_difficulty(self) -> int:
+        return sum(block.difficulty for block in self.chain)
+
+
+def _legacy_tick(blockchain: SyntheticBlockchain, suffix) -> bool:
+    candidate = blockchain.chain + suffix
+    genesis = candidate[0]
+    validator = ChainValidator(blockchain)
+    before_genesis = TipState(genesis.previous_hash, -1, 0)
+    return validator.validate_suffix(candidate, before_genesis) == len(candidate)
+
+
+def _incremental_tick(validator: ChainValidator, suffix) -> bool:
+    return validator.validate_suffix(suffix) == len(suffix)
+
+
+def run(heights, suffix_length: int, ticks: int) -> None:
+    print(f"{'height':>8} {'legacy ms/tick':>15} {'incremental ms/tick':>20}")
+    for height in heights:
+        blockchain = SyntheticBlockchain(height)
+        suffix = []
+        for _ in range(suffix_length):
+            previous = suffix[-1] if suffix else blockchain.chain[-1]
+            suffix.append(SyntheticBlock(previous.index + 1, previous.hash))
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            assert _legacy_tick(blockchain, suffix)
+        legacy = (time.perf_counter() - start) / ticks * 1000
+
+        # The node keeps one validator for its lifetime, so the initial work count is not per tick
+        validator = ChainValidator(blockchain)
+        validator.tip()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            assert _incremental_tick(validator, suffix)
+        incremental = (time.perf_counter() - start) / ticks * 1000
+        print(f"{height:>8} {legacy:>15.3f} {incremental:>20.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--heights", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--suffix", type=int, default=10, help="blocks offered per sync tick")
+    parser.add_argument("--ticks", type=int, default=10, help="sync ticks (peers offering the same suffix)")
+    args = parser.parse_args()
+    run(args.heights, args.suffix, args.ticks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark batch hashing and address derivation.
+
+Compares one blockchain_cpp call per item with the batch entry points
+(sha256_many, double_sha256_many, public_key_to_address_many), fed either a
+list or one buffer of fixed-size records, at each --threads setting.
+
+Run from the repository root:
+    python -m benchmarks.bench_hashing --count 100000 --threads 1 0
+"""
+
+import argparse
+import hashlib
+import os
+import time
+
+from utils import import_cpp_extension
+
+KEY_SIZE = 64
+TX_SIZE = 250
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="items per batch")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 0], help="batch worker threads (0: one per core)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best is reported")
+    args = parser.parse_args()
+
+    blockchain_cpp = import_cpp_extension("blockchain_cpp")
+    keys = [os.urandom(KEY_SIZE) for _ in range(args.count)]
+    hex_keys = [key.hex() for key in keys]
+    packed_keys = b"".join(keys)
+    transactions = [os.urandom(TX_SIZE) for _ in range(args.count)]
+    packed_transactions = b"".join(transactions)
+
+    cases = [
+        ("sha256 hashlib", lambda threads: [hashlib.sha256(tx).hexdigest() for tx in transactions]),
+        ("sha256 per call", lambda threads: [blockchain_cpp.sha256(tx.decode("latin-1")) for tx in transactions]),
+        ("sha256_many list", lambda threads: blockchain_cpp.sha256_many(transactions, threads=threads)),
+        ("sha256_many buffer", lambda threads: blockchain_cpp.sha256_many(
+            packed_transactions, TX_SIZE, raw=True, threads=threads)),
+        ("double_sha256_many", lambda threads: blockchain_cpp.double_sha256_many(
+            packed_transactions, TX_SIZE, raw=True, threads=threads)),
+        ("address per call", lambda threads: [blockchain_cpp.public_key_to_address(key) for key in hex_keys]),
+        ("address_many hex", lambda threads: blockchain_cpp.public_key_to_address_many(hex_keys, threads=threads)),
+        ("address_many buffer", lambda threads: blockchain_cpp.public_key_to_address_many(
+            packed_keys, KEY_SIZE, threads=threads)),
+    ]
+
+    print(f"{'case':>20} {'threads':>8} {'ms':>9} {'us/item':>8}")
+    for name, case in cases:
+        batched = "_many" in name
+        for threads in args.threads if batched else [1]:
+            elapsed = _time(lambda: case(threads), args.repeat)
+            print(f"{name:>20} {threads or 'all':>8} {elapsed * 1e3:>9.1f} {elapsed / args.count * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
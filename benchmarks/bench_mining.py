@@ -0,0 +1,80 @@
+"""
+Benchmark proof-of-work hash rate.
+
+Compares three ways of hashing block_string_base + decimal nonce:
+
+    python           a new string and hexdigest per nonce, compared as hex
+                     (the per-nonce work the old C++ loop also did)
+    python-midstate  hashlib copy of the hashed prefix, raw digest compared
+                     with a binary target
+    cpp              blockchain_cpp.mine_block (midstate, no allocation per
+                     nonce, GIL released, one worker per --threads)
+
+Difficulty 64 is used so no nonce qualifies and every engine hashes its
+whole nonce budget.
+
+Run from the repository root:
+    python -m benchmarks.bench_mining --nonces 2000000 --threads 1 4
+"""
+
+import argparse
+import hashlib
+import time
+
+from utils import import_cpp_extension
+
+BLOCK_STRING = "1" + "0" * 64 + "1700000000.0" + "ab" * 32 + "4"
+UNREACHABLE = 64
+
+
+def python_loop(nonces: int) -> int:
+    target = "0" * UNREACHABLE
+    for nonce in range(nonces):
+        digest = hashlib.sha256((BLOCK_STRING + str(nonce)).encode()).hexdigest()
+        if digest.startswith(target):
+            break
+    return nonces
+
+
+def python_midstate(nonces: int) -> int:
+    prefix = hashlib.sha256(BLOCK_STRING.encode())
+    target = bytes(32)
+    for nonce in range(nonces):
+        h = prefix.copy()
+        h.update(b"%d" % nonce)
+        if h.digest() <= target:
+            break
+    return nonces
+
+
+def _rate(hashes: int, seconds: float) -> str:
+    return f"{hashes / seconds / 1e6:>10.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nonces", type=int, default=2_000_000, help="nonces hashed by the C++ engine")
+    parser.add_argument("--python-nonces", type=int, default=200_000, help="nonces hashed by the Python loops")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 0], help="C++ worker threads (0: one per core)")
+    args = parser.parse_args()
+
+    print(f"{'engine':>16} {'threads':>8} {'MH/s':>10}")
+    for name, loop in (("python", python_loop), ("python-midstate", python_midstate)):
+        start = time.perf_counter()
+        hashes = loop(args.python_nonces)
+        print(f"{name:>16} {1:>8} {_rate(hashes, time.perf_counter() - start)}")
+
+    blockchain_cpp = import_cpp_extension("blockchain_cpp")
+    for threads in args.threads:
+        reports = []
+        start = time.perf_counter()
+        _, _, hashes = blockchain_cpp.mine_block(
+            BLOCK_STRING, UNREACHABLE, max_nonce=args.nonces, threads=threads,
+            progress=lambda total, rate: reports.append(rate), report_interval=0.5)
+        elapsed = time.perf_counter() - start
+        print(f"{'cpp':>16} {threads or 'all':>8} {_rate(hashes, elapsed)}"
+              f"  (progress reports: {len(reports)}, last {reports[-1] / 1e6:.2f} MH/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Benchmark the P2P layer end to end with many in-process nodes.
+
+Two scenarios, each reported as a table and as JSON for comparing runs:
+
+propagation
+    N BlockchainNetwork instances on loopback, split across ``--processes``
+    worker processes (each running one event loop), wired into a random
+    peer graph. Every round a random node produces transactions and a
+    block; we record how long each item takes to reach every node
+    (percentiles), bytes and frames per node, and worker CPU time per
+    message received.
+
+sync
+    A fresh node syncs chains of each ``--chain-lengths`` length from one
+    serving node over the HTTPS API with headers-first sync; we record the
+    time, blocks per second and bytes downloaded.
+
+Nodes run on SimulatedChain, so the numbers measure networking and
+serialization rather than block validation.
+
+Run from the repository root:
+    python -m benchmarks.bench_network --nodes 64 --processes 4 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from blockchain.transaction import Transaction
+from network.core import BlockchainNetwork
+from benchmarks.simulator import SimulatedChain, make_block, random_graph
+
+HOST = "127.0.0.1"
+
+
+def percentiles(samples: List[float]) -> dict:
+    """p50/p90/p99/max of ``samples`` in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+
+    def pick(share: float) -> float:
+        return samples[min(len(samples) - 1, int(share * len(samples)))] * 1000
+
+    return {"count": len(samples), "p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99),
+            "max_ms": samples[-1] * 1000, "mean_ms": statistics.fmean(samples) * 1000}
+
+
+class Shard:
+    """The nodes one worker process hosts, driven by commands over a pipe"""
+
+    def __init__(self, conn, indices: List[int], options: dict):
+        self.conn = conn
+        self.indices = indices
+        self.options = options
+        self.nodes: Dict[int, BlockchainNetwork] = {}
+        self.arrivals: Dict[str, Dict[str, float]] = {}
+        self.baseline = {}
+
+    async def serve(self) -> None:
+        while True:
+            command, args = await asyncio.to_thread(self.conn.recv)
+            result = await getattr(self, f"do_{command}")(*args)
+            self.conn.send(result)
+            if command == "stop":
+                return
+
+    async def do_start(self) -> List[tuple]:
+        # Every shard must build the same genesis block
+        genesis = make_block(0, "0" * 64, timestamp=0.0)
+        for index in self.indices:
+            node_id = f"node{index}"
+            node = BlockchainNetwork(SimulatedChain(genesis, node_id, self.arrivals), node_id,
+                                     HOST, self.options["base_port"] + index)
+            node.config["max_peers"] = self.options["nodes"]
+            node.config["gossip"].update(self.options["gossip"])
+
+            async def no_https(url, *args, **kwargs):
+                return False, None
+
+            # Only transport traffic is measured; HTTPS fallbacks simply fail
+            node._request = no_https
+            await node.transport.serve(node.host, node.port, node.ssl_context)
+            node.relay_task = asyncio.create_task(node.broadcast_scheduler.run())
+            self.nodes[index] = node
+        return [(index, node.node_id, node.port, node.public_key) for index, node in self.nodes.items()]
+
+    async def do_link(self, directory: Dict[int, tuple], links: Dict[int, List[int]]) -> None:
+        for index, node in self.nodes.items():
+            node.peers = {
+                directory[other][0]: {"host": HOST, "port": directory[other][1], "public_key": directory[other][2]}
+                for other in links[index]
+            }
+
+    async def do_connect(self) -> int:
+        results = await asyncio.gather(*(
+            node.transport.connect(peer_id, peer["host"], peer["port"])
+            for node in self.nodes.values() for peer_id, peer in node.peers.items()
+        ))
+        return sum(result is not None for result in results)
+
+    async def do_reset(self) -> None:
+        self.baseline = {"cpu": time.process_time(), "wall": time.time()}
+        for index, node in self.nodes.items():
+            transport = node.transport
+            self.baseline[index] = (transport.bytes_sent, transport.bytes_received,
+                                    transport.frames_sent, transport.frames_received)
+
+    async def do_inject(self, index: int, round_index: int, tx_count: int) -> dict:
+        node = self.nodes[index]
+        chain = node.blockchain
+        transactions = [
+            Transaction(f"sender{round_index}-{i}", "recipient", 1.0 + i) for i in range(tx_count)
+        ]
+        block = make_block(len(chain.chain), chain.chain[-1].hash)
+        started = time.time()
+        for tx in transactions:
+            await chain.add_transaction_to_mempool(tx)
+            node.queue_broadcast("transaction", tx)
+        await chain.add_block(block)
+        node.queue_broadcast("block", block)
+        items = {tx.tx_id: "transaction" for tx in transactions}
+        items[block.hash] = "block"
+        return {"started": started, "items": items}
+
+    async def do_wait(self, items: List[str], timeout: float) -> Dict[str, Dict[str, float]]:
+        """Wait until every local node has every item; return the local arrival times"""
+        deadline = time.monotonic() + timeout
+        expected = len(self.nodes)
+        while time.monotonic() < deadline:
+            if all(len(self.arrivals.get(item, ())) >= expected for item in items):
+                break
+            await asyncio.sleep(0.002)
+        return {item: dict(self.arrivals.get(item, {})) for item in items}
+
+    async def do_stats(self) -> dict:
+        nodes = {}
+        for index, node in self.nodes.items():
+            transport = node.transport
+            before = self.baseline.get(index, (0, 0, 0, 0))
+            nodes[index] = [now - then for now, then in zip(
+                (transport.bytes_sent, transport.bytes_received, transport.frames_sent, transport.frames_received),
+                before)]
+        return {"cpu_seconds": time.process_time() - self.baseline.get("cpu", 0.0), "nodes": nodes}
+
+    async def do_stop(self) -> None:
+        for node in self.nodes.values():
+            node.relay_task.cancel()
+        await asyncio.gather(*(node.transport.close() for node in self.nodes.values()), return_exceptions=True)
+        for node in self.nodes.values():
+            node.signature_verifier.close()
+
+
+def _shard_main(conn, workdir: str, indices: List[int], options: dict) -> None:
+    logging.disable(logging.WARNING)
+    # BlockchainNetwork writes its config and certificates to the working directory
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    asyncio.run(Shard(conn, indices, options).serve())
+
+
+class ShardPool:
+    """Worker processes, each hosting a slice of the simulated nodes"""
+
+    def __init__(self, processes: int, workdir: str, options: dict):
+        context = multiprocessing.get_context("spawn")
+        self.owner: Dict[int, int] = {}
+        self.conns = []
+        self.workers = []
+        for shard in range(processes):
+            indices = list(range(shard, options["nodes"], processes))
+            self.owner.update((index, shard) for index in indices)
+            parent, child = context.Pipe()
+            worker = context.Process(target=_shard_main, args=(
+                child, os.path.join(workdir, f"shard{shard}"), indices, options), daemon=True)
+            worker.start()
+            self.conns.append(parent)
+            self.workers.append(worker)
+
+    def call(self, command: str, *args, shard: Optional[int] = None):
+        """Run a command on one shard, or on all of them concurrently"""
+        conns = self.conns if shard is None else [self.conns[shard]]
+        for conn in conns:
+            conn.send((command, args))
+        results = [conn.recv() for conn in conns]
+        return results if shard is None else results[0]
+
+    def close(self) -> None:
+        try:
+            self.call("stop")
+        finally:
+            for worker in self.workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+
+
+def run_propagation(args, workdir: str) -> dict:
+    options = {
+        "nodes": args.nodes, "base_port": args.base_port,
+        "gossip": {"enabled": args.gossip, "fanout": args.fanout, "ttl": args.ttl},
+    }
+    pool = ShardPool(min(args.processes, args.nodes), workdir, options)
+    rng = random.Random(args.seed)
+    delays = {"transaction": [], "block": []}
+    coverage = []
+    try:
+        directory = {}
+        for entries in pool.call("start"):
+            directory.update((index, (node_id, port, public_key)) for index, node_id, port, public_key in entries)
+        links = {index: sorted(peers) for index, peers in enumerate(random_graph(args.nodes, args.degree, rng))}
+        pool.call("link", directory, links)
+        # Both ends dial every link and keep one connection
+        links_opened = sum(pool.call("connect")) // 2
+        pool.call("reset")
+
+        started_all = time.time()
+        for round_index in range(args.rounds):
+            origin = rng.randrange(args.nodes)
+            injected = pool.call("inject", origin, round_index, args.transactions, shard=pool.owner[origin])
+            arrivals = {item: {} for item in injected["items"]}
+            for shard_arrivals in pool.call("wait", list(injected["items"]), args.timeout):
+                for item, times in shard_arrivals.items():
+                    arrivals[item].update(times)
+            origin_id = directory[origin][0]
+            for item, kind in injected["items"].items():
+                coverage.append(len(arrivals[item]) / args.nodes)
+                delays[kind].extend(
+                    arrived - injected["started"] for node_id, arrived in arrivals[item].items() if node_id != origin_id)
+        elapsed = time.time() - started_all
+
+        stats = pool.call("stats")
+    finally:
+        pool.close()
+
+    per_node = [values for shard in stats for values in shard["nodes"].values()]
+    bytes_per_node = [sent + received for sent, received, _, _ in per_node]
+    frames_received = sum(values[3] for values in per_node)
+    cpu_seconds = sum(shard["cpu_seconds"] for shard in stats)
+    deliveries = sum(len(samples) for samples in delays.values())
+    return {
+        "nodes": args.nodes, "processes": len(stats), "degree": args.degree, "links": links_opened,
+        "gossip": options["gossip"], "rounds": args.rounds, "transactions_per_round": args.transactions,
+        "seconds": elapsed,
+        "coverage_min": min(coverage) if coverage else 0.0,
+        "latency": {kind: percentiles(samples) for kind, samples in delays.items()},
+        "bytes_per_node": {"mean": statistics.fmean(bytes_per_node), "max": max(bytes_per_node)},
+        "bytes_total": sum(bytes_per_node) // 2,
+        "frames_received": frames_received,
+        "cpu_seconds": cpu_seconds,
+        "cpu_us_per_message": cpu_seconds / frames_received * 1e6 if frames_received else None,
+        "deliveries_per_second": deliveries / elapsed if elapsed else None,
+    }
+
+
+async def _measure_sync(length: int, port: int) -> dict:
+    genesis = make_block(0, "0" * 64)
+    blocks = [genesis]
+    for index in range(1, length):
+        blocks.append(make_block(index, blocks[-1].hash))
+    server_chain = SimulatedChain(genesis, "sync-server", {})
+    server_chain.chain = blocks
+    server = BlockchainNetwork(server_chain, "sync-server", HOST, port)
+    client = BlockchainNetwork(SimulatedChain(genesis, "sync-client", {}), "sync-client", HOST, port + 1)
+    for node in (server, client):
+        node.ssl_context, node.client_ssl_context = await node.cert_manager.initialize()
+
+    await server.runner.setup()
+    site = web.TCPSite(server.runner, HOST, port, ssl_context=server.ssl_context)
+    await site.start()
+    client.peers = {server.node_id: {"host": HOST, "port": port, "public_key": server.public_key}}
+    try:
+        started, cpu = time.perf_counter(), time.process_time()
+        downloaded = runs = 0
+        while len(client.blockchain.chain) < length and await client.header_sync.run():
+            downloaded += client.header_sync.progress.bytes
+            runs += 1
+        elapsed = time.perf_counter() - started
+        synced = len(client.blockchain.chain)
+        return {
+            "chain_length": length, "synced": synced == length, "runs": runs, "seconds": elapsed,
+            "blocks_per_second": (synced - 1) / elapsed if elapsed else None,
+            "bytes": downloaded, "cpu_seconds": time.process_time() - cpu,
+        }
+    finally:
+        if client._session is not None:
+            await client._session.close()
+        await server.runner.cleanup()
+        for node in (server, client):
+            node.signature_verifier.close()
+
+
+def run_sync(args) -> List[dict]:
+    return [
+        asyncio.run(_measure_sync(length, args.base_port + args.nodes + 2 * offset))
+        for offset, length in enumerate(args.chain_lengths)
+    ]
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(results: dict) -> None:
+    propagation = results.get("propagation")
+    if propagation:
+        mode = "gossip" if propagation["gossip"]["enabled"] else "broadcast"
+        print(f"propagation: {propagation['nodes']} nodes in {propagation['processes']} processes, {mode}, "
+              f"coverage {propagation['coverage_min']:.0%}")
+        print(f"{'item':>12} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for kind, stats in propagation["latency"].items():
+            if stats["count"]:
+                print(f"{kind:>12} {stats['count']:>7} {stats['p50_ms']:>8.1f} {stats['p90_ms']:>8.1f} "
+                      f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+        cpu = propagation["cpu_us_per_message"]
+        print(f"bytes/node {propagation['bytes_per_node']['mean']:.0f} (max {propagation['bytes_per_node']['max']}), "
+              f"{propagation['frames_received']} messages, "
+              f"{'n/a' if cpu is None else f'{cpu:.0f}'} us CPU/message")
+    if results.get("sync"):
+        print(f"{'chain':>8} {'seconds':>8} {'blocks/s':>9} {'KiB':>9} {'synced':>7}")
+        for row in results["sync"]:
+            print(f"{row['chain_length']:>8} {row['seconds']:>8.2f} {row['blocks_per_second'] or 0:>9.0f} "
+                  f"{row['bytes'] / 1024:>9.1f} {str(row['synced']):>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", default=["propagation", "sync"], choices=["propagation", "sync"])
+    parser.add_argument("--nodes", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=1, help="worker processes hosting the nodes")
+    parser.add_argument("--degree", type=int, default=8, help="peers per node")
+    parser.add_argument("--rounds", type=int, default=10, help="rounds of transactions plus one block")
+    parser.add_argument("--transactions", type=int, default=50, help="transactions per round")
+    parser.add_argument("--gossip", action="store_true", help="relay with fanout-limited gossip")
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--ttl", type=int, default=8)
+    parser.add_argument("--chain-lengths", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for each round to propagate")
+    parser.add_argument("--base-port", type=int, default=22000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    logging.disable(logging.WARNING)
+
+    # BlockchainNetwork writes its config and certificates to the working directory
+    workdir = tempfile.mkdtemp(prefix="bench-network-")
+    os.chdir(workdir)
+    results = {
+        "benchmark": "network",
+        "revision": _revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "started": time.time(),
+        "args": vars(args),
+    }
+    if "propagation" in args.scenarios:
+        results["propagation"] = run_propagation(args, workdir)
+    if "sync" in args.scenarios:
+        results["sync"] = run_sync(args)
+
+    print_summary(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
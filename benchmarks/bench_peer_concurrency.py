@@ -0,0 +1,92 @@
+"""
+Benchmark concurrent inbound peer handling against peer count.
+
+Each simulated peer connects, is added to the peer table and exchanges one
+request with simulated network latency while a broadcast to every peer is
+in flight. The legacy model holds one global lock across those awaits, as
+BlockchainNetwork did with its threading.Lock (modelled here with an
+asyncio.Lock, since a threading.Lock held across an await would deadlock
+the event loop outright). The current path runs handlers against the
+copy-on-write PeerTable without a global lock.
+
+Run from the repository root:
+    python -m benchmarks.bench_peer_concurrency --peers 100 300 500
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from network.core import BlockchainNetwork
+
+
+def _make_network(latency: float) -> BlockchainNetwork:
+    network = BlockchainNetwork(None, "bench-node", "127.0.0.1", 18333)
+    network.config["max_peers"] = 100000
+    network.config["transport"]["enabled"] = False
+
+    async def slow_request(url, serialized_data, headers, method, max_retries):
+        await asyncio.sleep(latency)
+        return True, None
+
+    network._request = slow_request
+    return network
+
+
+async def _handle_peer(network: BlockchainNetwork, index: int) -> None:
+    peer_id = f"peer{index}"
+    await network.add_peer(peer_id, "127.0.0.1", 20000 + index, "")
+    await network.peer_request(peer_id, "/heartbeat", {"node_id": network.node_id})
+
+
+async def _run_once(peer_count: int, latency: float, legacy: bool) -> float:
+    network = _make_network(latency)
+    lock = asyncio.Lock()
+
+    async def handler(index: int) -> None:
+        if legacy:
+            async with lock:
+                await _handle_peer(network, index)
+        else:
+            await _handle_peer(network, index)
+
+    async def broadcaster() -> None:
+        if legacy:
+            async with lock:
+                await network.broadcast("/heartbeat", {"node_id": network.node_id})
+        else:
+            await network.broadcast("/heartbeat", {"node_id": network.node_id})
+
+    start = time.perf_counter()
+    await asyncio.gather(broadcaster(), *(handler(i) for i in range(peer_count)))
+    elapsed = time.perf_counter() - start
+    assert len(network.peers) == peer_count
+    return elapsed
+
+
+async def run(peer_counts, latency: float) -> None:
+    print(f"{'peers':>6} {'global lock s':>14} {'peer table s':>13} {'speedup':>8}")
+    for count in peer_counts:
+        legacy = await _run_once(count, latency, legacy=True)
+        current = await _run_once(count, latency, legacy=False)
+        print(f"{count:>6} {legacy:>14.3f} {current:>13.3f} {legacy / current:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--peers", type=int, nargs="+", default=[50, 100, 300, 500])
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated seconds per peer request")
+    args = parser.parse_args()
+    logging.getLogger("BlockchainNetwork").setLevel(logging.WARNING)
+
+    # BlockchainNetwork writes its config and certificates to the working directory
+    workdir = tempfile.mkdtemp(prefix="bench-peers-")
+    os.chdir(workdir)
+    asyncio.run(run(args.peers, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the UTXO set: memory per UTXO and the cost of common operations.
+
+Fills utxo_cpp.UTXOSetCpp and a dict of utils.TransactionOutput objects
+(the pure-Python equivalent) with the same outputs, then times adds, lookups,
+address queries and spends. C++ memory comes from UTXOSetCpp.memory_usage();
+Python memory is measured with tracemalloc.
+
+Run from the repository root:
+    python -m benchmarks.bench_utxo --utxos 1000000 --addresses 10000
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from utils import TransactionOutput, import_cpp_extension
+
+
+def _outputs(count: int, addresses: int, rng: random.Random):
+    tx_ids = [os.urandom(32).hex() for _ in range((count + 1) // 2)]
+    names = [f"1{os.urandom(16).hex()}" for _ in range(addresses)]
+    return [
+        (tx_ids[i // 2], i % 2, names[rng.randrange(addresses)], round(rng.uniform(0, 50), 8))
+        for i in range(count)
+    ], names
+
+
+def _timed(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed * 1e3:>9.1f} ms {elapsed / count * 1e6:>8.2f} us/op")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--utxos", type=int, default=1_000_000)
+    parser.add_argument("--addresses", type=int, default=10_000, help="distinct recipients")
+    parser.add_argument("--queries", type=int, default=1_000, help="address queries timed")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows, names = _outputs(args.utxos, args.addresses, rng)
+    queried = [rng.choice(names) for _ in range(args.queries)]
+    spent = rng.sample(rows, len(rows) // 2)
+
+    utxo_cpp = import_cpp_extension("utxo_cpp")
+    utxos = utxo_cpp.UTXOSetCpp()
+    print(f"UTXOSetCpp, {args.utxos} UTXOs over {args.addresses} addresses")
+    _timed("add_utxo", len(rows), lambda: [
+        utxos.add_utxo(tx_id, index, TransactionOutput(recipient, amount)) for tx_id, index, recipient, amount in rows
+    ])
+    usage = utxos.memory_usage()
+    print(f"  memory                 {usage['total_bytes'] / 2**20:>9.1f} MiB {usage['bytes_per_utxo']:>8.1f} B/UTXO")
+    _timed("get_utxo", len(rows), lambda: [utxos.get_utxo(tx_id, index) for tx_id, index, _, _ in rows])
+    _timed("get_utxos_for_address", len(queried), lambda: [utxos.get_utxos_for_address(name) for name in queried])
+    _timed("get_balance", len(queried), lambda: [utxos.get_balance(name) for name in queried])
+    _timed("spend_utxo", len(spent), lambda: [utxos.spend_utxo(tx_id, index) for tx_id, index, _, _ in spent])
+    print(f"  after spending half    {utxos.memory_usage()['total_bytes'] / 2**20:>9.1f} MiB")
+
+    print("dict of TransactionOutput")
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    outputs = {}
+    _timed("insert", len(rows), lambda: outputs.update(
+        ((tx_id, index), TransactionOutput(recipient, amount)) for tx_id, index, recipient, amount in rows
+    ))
+    python_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"  memory                 {python_bytes / 2**20:>9.1f} MiB {python_bytes / len(rows):>8.1f} B/UTXO"
+          " (keys share the tx_id strings above)")
+    _timed("scan for address", len(queried[:10]), lambda: [
+        [key for key, output in outputs.items() if output.recipient == name] for name in queried[:10]
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Simulate block and transaction relay across many in-process nodes.
+
+Starts N BlockchainNetwork instances on loopback, wires them into a random
+peer graph of the given degree and relays blocks and transactions from
+random origins over the persistent transport. Each relay mode is measured
+for propagation time (until every node has the item), coverage and total
+bytes on the wire:
+
+    broadcast   every node relays to all of its peers
+    gossip      every node relays to ``fanout`` peers with a hop limit
+
+Run from the repository root:
+    python -m benchmarks.simulator --nodes 40 --degree 12 --fanout 4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from blockchain.core import Block
+from blockchain.transaction import Transaction
+from network.core import BlockchainNetwork
+
+
+class _Mempool:
+    def __init__(self):
+        self.transactions = {}
+
+
+class SimulatedChain:
+    """Chain stand-in that accepts any block extending its tip and records
+    arrival times (wall clock, so shards in other processes can compare them)"""
+
+    def __init__(self, genesis: Block, node_id: str, arrivals: Dict[str, Dict[str, float]]):
+        self.chain = [genesis]
+        self.mempool = _Mempool()
+        self.difficulty = 1
+        self.node_id = node_id
+        self.arrivals = arrivals
+
+    async def add_block(self, block: Block) -> bool:
+        if block.previous_hash != self.chain[-1].hash:
+            return False
+        self.chain.append(block)
+        self.arrivals.setdefault(block.hash, {})[self.node_id] = time.time()
+        return True
+
+    async def add_transaction_to_mempool(self, tx: Transaction) -> bool:
+        self.mempool.transactions[tx.tx_id] = tx
+        self.arrivals.setdefault(tx.tx_id, {})[self.node_id] = time.time()
+        return True
+
+    def get_total_difficulty(self) -> int:
+        return len(self.chain)
+
+
+def make_block(index: int, previous_hash: str, difficulty: int = 1, timestamp: Optional[float] = None) -> Block:
+    """An empty block mined to ``difficulty`` so it passes header checks"""
+    block = Block.from_dict({
+        "index": index, "previous_hash": previous_hash,
+        "timestamp": time.time() if timestamp is None else timestamp, "transactions": [],
+        "difficulty": difficulty, "nonce": 0, "merkle_root": "0" * 64, "hash": ""
+    })
+    block.hash = block.calculate_hash()
+    while not block.hash.startswith("0" * difficulty):
+        block.nonce += 1
+        block.hash = block.calculate_hash()
+    return block
+
+
+def random_graph(count: int, degree: int, rng: random.Random) -> List[set]:
+    """Connected undirected graph: a ring plus random chords up to ``degree`` links per node"""
+    links = [set() for _ in range(count)]
+    for index in range(count):
+        links[index].add((index + 1) % count)
+        links[(index + 1) % count].add(index)
+    for index in range(count):
+        candidates = [other for other in range(count) if other != index and other not in links[index]]
+        rng.shuffle(candidates)
+        for other in candidates:
+            if len(links[index]) >= degree:
+                break
+            if len(links[other]) < degree:
+                links[index].add(other)
+                links[other].add(index)
+    return links
+
+
+async def _no_https(url, *args, **kwargs):
+    return False, None
+
+
+async def start_nodes(count: int, degree: int, base_port: int, gossip: dict, seed: int,
+                      relay_mode: str = "inventory") -> List[BlockchainNetwork]:
+    genesis = make_block(0, "0" * 64)
+    arrivals: Dict[str, Dict[str, float]] = {}
+    nodes = []
+    for index in range(count):
+        node_id = f"sim{index}"
+        node = BlockchainNetwork(SimulatedChain(genesis, node_id, arrivals), node_id, "127.0.0.1", base_port + index)
+        node.config["max_peers"] = count
+        node.config["relay_mode"] = relay_mode
+        node.config["gossip"].update(gossip)
+        # Only transport traffic is measured; HTTPS fallbacks simply fail
+        node._request = _no_https
+        await node.transport.serve(node.host, node.port, node.ssl_context)
+        node.relay_task = asyncio.create_task(node.broadcast_scheduler.run())
+        nodes.append(node)
+    for index, links in enumerate(random_graph(count, degree, random.Random(seed))):
+        nodes[index].peers = {
+            nodes[other].node_id: {"host": nodes[other].host, "port": nodes[other].port,
+                                   "public_key": nodes[other].public_key}
+            for other in links
+        }
+    return nodes
+
+
+async def stop_nodes(nodes: List[BlockchainNetwork]) -> None:
+    for node in nodes:
+        node.relay_task.cancel()
+    await asyncio.gather(*(node.transport.close() for node in nodes), return_exceptions=True)
+    for node in nodes:
+        node.signature_verifier.close()
+
+
+async def _wait_for(arrivals: Dict[str, float], count: int, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while len(arrivals) < count and time.perf_counter() < deadline:
+        await asyncio.sleep(0.005)
+    # Let the tail of the relay finish so its bytes are counted
+    await asyncio.sleep(0.1)
+
+
+async def simulate(mode: str, args, base_port: int) -> dict:
+    gossip = {"enabled": mode == "gossip", "fanout": args.fanout, "ttl": args.ttl}
+    nodes = await start_nodes(args.nodes, args.degree, base_port, gossip, args.seed, args.relay_mode)
+    rng = random.Random(args.seed)
+    arrivals = nodes[0].blockchain.arrivals
+    delays, coverage = [], []
+    try:
+        # Open every connection up front so dial time is not counted as propagation
+        await asyncio.gather(*(
+            node.transport.connect(peer_id, peer["host"], peer["port"])
+            for node in nodes for peer_id, peer in node.peers.items()
+        ))
+        bytes_before = sum(node.transport.bytes_sent for node in nodes)
+
+        for round_index in range(args.blocks):
+            origin = nodes[rng.randrange(len(nodes))]
+            transactions = [
+                Transaction(f"sender{round_index}-{i}", "recipient", 1.0 + i) for i in range(args.transactions)
+            ]
+            block = make_block(len(origin.blockchain.chain), origin.blockchain.chain[-1].hash)
+            items = [tx.tx_id for tx in transactions] + [block.hash]
+            started = time.time()
+            for tx in transactions:
+                await origin.blockchain.add_transaction_to_mempool(tx)
+            for tx in transactions:
+                origin.queue_broadcast("transaction", tx)
+            await origin.blockchain.add_block(block)
+            origin.queue_broadcast("block", block)
+            for item in items:
+                await _wait_for(arrivals.setdefault(item, {}), len(nodes), args.timeout)
+                reached = arrivals[item]
+                coverage.append(len(reached) / len(nodes))
+                delays.extend(arrival - started for arrival in reached.values())
+        total_bytes = sum(node.transport.bytes_sent for node in nodes) - bytes_before
+    finally:
+        await stop_nodes(nodes)
+
+    delays.sort()
+    rounds = max(args.blocks, 1)
+    return {
+        "mode": mode,
+        "p50_ms": statistics.median(delays) * 1000 if delays else float("nan"),
+        "p90_ms": delays[int(len(delays) * 0.9) - 1] * 1000 if delays else float("nan"),
+        "max_ms": delays[-1] * 1000 if delays else float("nan"),
+        "coverage": min(coverage) if coverage else 0.0,
+        "kib_per_round": total_bytes / rounds / 1024,
+        "bytes_per_node_round": total_bytes / rounds / len(nodes),
+    }
+
+
+async def run(args) -> None:
+    print(f"{args.nodes} nodes, degree {args.degree}, {args.relay_mode} relay, "
+          f"{args.blocks} rounds of 1 block + {args.transactions} transactions")
+    print(f"{'mode':>10} {'p50 ms':>8} {'p90 ms':>8} {'max ms':>8} {'coverage':>9} {'KiB/round':>10} {'B/node/round':>13}")
+    for offset, mode in enumerate(args.modes):
+        result = await simulate(mode, args, args.base_port + offset * args.nodes)
+        print(f"{mode:>10} {result['p50_ms']:>8.1f} {result['p90_ms']:>8.1f} {result['max_ms']:>8.1f} "
+              f"{result['coverage']:>8.0%} {result['kib_per_round']:>10.1f} {result['bytes_per_node_round']:>13.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=40)
+    parser.add_argument("--degree", type=int, default=12, help="peers per node")
+    parser.add_argument("--fanout", type=int, default=4, help="peers each node relays to in gossip mode")
+    parser.add_argument("--ttl", type=int, default=8, help="gossip hop limit")
+    parser.add_argument("--blocks", type=int, default=5, help="relay rounds, one block each")
+    parser.add_argument("--transactions", type=int, default=20, help="transactions relayed per round")
+    parser.add_argument("--relay-mode", default="inventory", choices=["inventory", "push"],
+                        help="announce hashes for /getdata, or push full bodies")
+    parser.add_argument("--modes", nargs="+", default=["broadcast", "gossip"], choices=["broadcast", "gossip"])
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for full coverage")
+    parser.add_argument("--base-port", type=int, default=21000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    # BlockchainNetwork writes its config and certificates to the working directory
+    workdir = tempfile.mkdtemp(prefix="bench-gossip-")
+    os.chdir(workdir)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
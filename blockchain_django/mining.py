@@ -0,0 +1,179 @@
+"""
+Asyncio driver for cancellable proof-of-work searches.
+
+A MiningRun mines one block template with blockchain_cpp.MiningJob: the
+template's block string (everything the hash covers except the nonce) is
+searched over a nonce range in native threads without the GIL, while the
+event loop only polls. When a range is used up the extra nonce is bumped
+and a new string is searched. A run can be paused and resumed where it
+stopped, or cancelled when a new tip makes the template stale.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Callable, NamedTuple, Optional
+
+from utils import blockchain_cpp
+
+logger = logging.getLogger(__name__)
+
+
+class MiningSolution(NamedTuple):
+    extra_nonce: int
+    nonce: int
+    hash: str
+    hashes: int
+
+
+class PythonMiningJob:
+    """hashlib stand-in for blockchain_cpp.MiningJob when the extension is not built.
+
+    Same interface and semantics, but one thread that holds the GIL while hashing.
+    """
+
+    CHUNK = 4096
+
+    def __init__(self, block_string_base: str, difficulty: int, start_nonce: int = 0,
+                 end_nonce: int = 1 << 32, threads: int = 0):
+        if not 0 <= difficulty <= 64:
+            raise ValueError("difficulty must be between 0 and 64")
+        self.difficulty = difficulty
+        self.next_nonce = start_nonce
+        self.end_nonce = end_nonce
+        self.hashes = 0
+        self._prefix = hashlib.sha256(block_string_base.encode())
+        # Largest digest whose hex form starts with `difficulty` zeros
+        self._target = (int("f" * (64 - difficulty) or "0", 16)).to_bytes(32, "big")
+        self._result = None
+        self._started = self._cancelled = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._result is not None or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._started, self._cancelled = True, False
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def _work(self) -> None:
+        while not self._cancelled and self.next_nonce < self.end_nonce:
+            start, end = self.next_nonce, min(self.next_nonce + self.CHUNK, self.end_nonce)
+            for nonce in range(start, end):
+                h = self._prefix.copy()
+                h.update(b"%d" % nonce)
+                if h.digest() <= self._target:
+                    self.hashes += nonce - start + 1
+                    self._result = (nonce, h.hexdigest())
+                    return
+            self.hashes += end - start
+            self.next_nonce = end
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def wait(self, timeout: float = -1.0) -> bool:
+        if self._thread is not None:
+            self._thread.join(None if timeout < 0 else timeout)
+        return self._thread is None or not self._thread.is_alive()
+
+    def extend(self, end_nonce: int) -> None:
+        self.end_nonce = max(self.end_nonce, end_nonce)
+
+    def result(self):
+        return self._result
+
+    @property
+    def done(self) -> bool:
+        return self._started and not self._thread.is_alive()
+
+    @property
+    def state(self) -> str:
+        if self._result is not None:
+            return "found"
+        if not self._started:
+            return "idle"
+        if self._thread.is_alive():
+            return "running"
+        if self.next_nonce >= self.end_nonce:
+            return "exhausted"
+        return "cancelled" if self._cancelled else "paused"
+
+
+def _job_class():
+    job_class = getattr(blockchain_cpp, "MiningJob", None)
+    # import_cpp_extension's fallback answers every attribute with a stub function
+    return job_class if isinstance(job_class, type) else PythonMiningJob
+
+
+class MiningRun:
+    """Mine one block template from asyncio.
+
+    ``block_string_base(extra_nonce)`` returns the string the block hash
+    covers without its trailing nonce; each extra nonce gets a search over
+    ``[0, nonce_space)``.
+    """
+
+    def __init__(self, block_string_base: Callable[[int], str], difficulty: int, nonce_space: int = 1 << 32,
+                 threads: int = 0, poll_interval: float = 0.25):
+        self.block_string_base = block_string_base
+        self.difficulty = difficulty
+        self.nonce_space = nonce_space
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.extra_nonce = 0
+        self.job = None
+        self.cancelled = False
+        self._retired_hashes = 0
+
+    @property
+    def hashes(self) -> int:
+        """Hashes tried so far, over every extra nonce"""
+        return self._retired_hashes + (self.job.hashes if self.job is not None else 0)
+
+    async def run(self) -> Optional[MiningSolution]:
+        """Search until solved; None if paused or cancelled first.
+
+        Running again after a pause resumes from the first untried nonce.
+        """
+        while not self.cancelled:
+            if self.job is None:
+                self.job = _job_class()(self.block_string_base(self.extra_nonce), self.difficulty,
+                                        0, self.nonce_space, self.threads)
+            self.job.start()
+            try:
+                while not await asyncio.to_thread(self.job.wait, self.poll_interval):
+                    pass
+            except asyncio.CancelledError:
+                self.job.cancel()
+                raise
+
+            state = self.job.state
+            if state == "found":
+                nonce, block_hash = self.job.result()
+                return MiningSolution(self.extra_nonce, nonce, block_hash, self.hashes)
+            if state != "exhausted":
+                return None
+            # Nonce range used up: move on to the next extra nonce
+            logger.debug(f"Nonce space exhausted for extra nonce {self.extra_nonce}")
+            self._retired_hashes += self.job.hashes
+            self.job = None
+            self.extra_nonce += 1
+        return None
+
+    def pause(self) -> None:
+        """Stop hashing; a later run() resumes where this stopped"""
+        if self.job is not None:
+            self.job.cancel()
+
+    def cancel(self) -> None:
+        """Stop for good, e.g. because a new tip made the template stale"""
+        self.cancelled = True
+        self.pause()
+
+    def extend(self, nonce_space: int) -> None:
+        """Search further nonces before the extra nonce is bumped"""
+        self.nonce_space = max(self.nonce_space, nonce_space)
+        if self.job is not None:
+            self.job.extend(self.nonce_space)
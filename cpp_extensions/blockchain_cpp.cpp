@@ -2,9 +2,24 @@
 #include <pybind11/stl.h>
 #include <vector>
 #include <string>
+#include <string_view>
 #include <sstream>
 #include <iomanip>
+// SHA256_CTX is a plain struct, so copying it is a cheap midstate snapshot;
+// its functions are deprecated in OpenSSL 3 but remain the fastest way to reuse one
+#define OPENSSL_SUPPRESS_DEPRECATED
 #include <openssl/evp.h>
+#include <openssl/sha.h>
+#include <openssl/ripemd.h>
+#include <array>
+#include <charconv>
+#include <chrono>
+#include <condition_variable>
+#include <cstring>
+#include <cstdint>
+#include <cstdlib>
+#include <exception>
+#include <stdexcept>
 #include <thread>
 #include <mutex>
 #include <atomic>
@@ -16,29 +31,67 @@ namespace py = pybind11;
 // Base58 character set
 static const char *BASE58_CHARS = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz";
 
-// Convert bytes to hexadecimal string
-std::string bytes_to_hex(const std::vector<unsigned char> &data)
+// Write the hexadecimal form of size bytes to out (2 * size chars)
+void write_hex(const unsigned char *data, size_t size, char *out)
 {
-    std::stringstream ss;
-    ss << std::hex << std::setfill('0');
-    for (const auto &byte : data)
+    static const char *HEX_DIGITS = "0123456789abcdef";
+    for (size_t i = 0; i < size; i++)
     {
-        ss << std::setw(2) << static_cast<int>(byte);
+        out[2 * i] = HEX_DIGITS[data[i] >> 4];
+        out[2 * i + 1] = HEX_DIGITS[data[i] & 0x0f];
     }
-    return ss.str();
 }
 
-// Convert hexadecimal string to bytes
-std::vector<unsigned char> hex_to_bytes(const std::string &hex)
+// Convert bytes to hexadecimal string
+std::string bytes_to_hex(const std::vector<unsigned char> &data)
+{
+    std::string hex(data.size() * 2, '0');
+    write_hex(data.data(), data.size(), hex.data());
+    return hex;
+}
+
+// Convert hexadecimal text to bytes; false if it is not an even-length hex string
+bool hex_to_bytes(std::string_view hex, std::vector<unsigned char> &bytes)
 {
-    std::vector<unsigned char> bytes;
-    for (size_t i = 0; i < hex.length(); i += 2)
+    auto nibble = [](char c)
     {
-        std::string byteString = hex.substr(i, 2);
-        unsigned char byte = static_cast<unsigned char>(std::strtol(byteString.c_str(), nullptr, 16));
-        bytes.push_back(byte);
+        if (c >= '0' && c <= '9')
+            return c - '0';
+        if (c >= 'a' && c <= 'f')
+            return c - 'a' + 10;
+        if (c >= 'A' && c <= 'F')
+            return c - 'A' + 10;
+        return -1;
+    };
+    if (hex.size() % 2 != 0)
+        return false;
+    bytes.resize(hex.size() / 2);
+    for (size_t i = 0; i < bytes.size(); i++)
+    {
+        int high = nibble(hex[2 * i]);
+        int low = nibble(hex[2 * i + 1]);
+        if (high < 0 || low < 0)
+            return false;
+        bytes[i] = static_cast<unsigned char>(high << 4 | low);
     }
-    return bytes;
+    return true;
+}
+
+// SHA-256 of size bytes into digest; the SHA256_CTX calls skip the algorithm
+// lookup that EVP and the OpenSSL 3 one-shot SHA256() do on every call
+void sha256_into(const unsigned char *data, size_t size, unsigned char *digest)
+{
+    SHA256_CTX ctx;
+    SHA256_Init(&ctx);
+    SHA256_Update(&ctx, data, size);
+    SHA256_Final(digest, &ctx);
+}
+
+void double_sha256_into(const unsigned char *data, size_t size, unsigned char *digest)
+{
+    unsigned char first[SHA256_DIGEST_LENGTH];
+    sha256_into(data, size, first);
+    sha256_into(first, SHA256_DIGEST_LENGTH, digest);
 }
 
 // SHA-256 implementation using OpenSSL
@@ -67,8 +120,8 @@ std::vector<unsigned char> double_sha256(const std::vector<unsigned char> &input
 // SHA-256 hash of a string, returned as string
 std::string sha256(const std::string &input)
 {
-    std::vector<unsigned char> input_bytes(input.begin(), input.end());
-    std::vector<unsigned char> hash_bytes = sha256_bytes(input_bytes);
+    std::vector<unsigned char> hash_bytes(SHA256_DIGEST_LENGTH);
+    sha256_into(reinterpret_cast<const unsigned char *>(input.data()), input.size(), hash_bytes.data());
     return bytes_to_hex(hash_bytes);
 }
 
@@ -106,28 +159,52 @@ std::string base58_encode(const std::vector<unsigned char> &input)
         zeros++;
     }
 
-    // Allocate enough space for the result
-    std::vector<unsigned char> result((input.size() - zeros) * 138 / 100 + 1);
-    size_t result_size = 0;
+    // Convert from base256 to base58, four input bytes at a time into
+    // little-endian limbs of five base58 digits each
+    const uint64_t LIMB = 58ULL * 58 * 58 * 58 * 58;
+    std::vector<uint64_t> limbs;
+    limbs.reserve((input.size() - zeros) * 138 / 500 + 2);
+    size_t i = zeros;
+    size_t take = (input.size() - zeros) % 4 ? (input.size() - zeros) % 4 : 4;
+    while (i < input.size())
+    {
+        uint64_t carry = 0;
+        for (size_t end = i + take; i < end; i++)
+        {
+            carry = carry << 8 | input[i];
+        }
+        for (auto &limb : limbs)
+        {
+            carry += limb << (8 * take);
+            limb = carry % LIMB;
+            carry /= LIMB;
+        }
+        while (carry != 0)
+        {
+            limbs.push_back(carry % LIMB);
+            carry /= LIMB;
+        }
+        take = 4;
+    }
 
-    // Convert from base256 to base58
-    for (size_t i = zeros; i < input.size(); i++)
+    // Expand the limbs into base58 digits, least significant first
+    std::vector<unsigned char> result(limbs.size() * 5);
+    for (size_t j = 0; j < limbs.size(); j++)
     {
-        int carry = input[i];
-        size_t j = 0;
-        for (size_t k = result_size; j < k || carry != 0; j++)
+        for (size_t k = 0; k < 5; k++)
         {
-            if (j < result_size)
-            {
-                carry += 256 * result[j];
-            }
-            result[j] = carry % 58;
-            carry /= 58;
+            result[5 * j + k] = limbs[j] % 58;
+            limbs[j] /= 58;
         }
-        result_size = j;
+    }
+    size_t result_size = result.size();
+    while (result_size > 0 && result[result_size - 1] == 0)
+    {
+        result_size--;
     }
 
-    // Skip leading zeros in result
+    // Skip leading zeros in result (these are the least significant digits, so
+    // trailing '1's are dropped; existing addresses depend on that output)
     size_t leading_zeros = 0;
     while (leading_zeros < result_size && result[leading_zeros] == 0)
     {
@@ -154,9 +231,9 @@ std::string base58_encode(const std::vector<unsigned char> &input)
 std::string base58check_encode(const std::vector<unsigned char> &payload, unsigned char version)
 {
     // Prepend version byte
-    std::vector<unsigned char> extended_payload;
-    extended_payload.push_back(version);
-    extended_payload.insert(extended_payload.end(), payload.begin(), payload.end());
+    std::vector<unsigned char> extended_payload(1 + payload.size());
+    extended_payload[0] = version;
+    std::copy(payload.begin(), payload.end(), extended_payload.begin() + 1);
 
     // Calculate checksum (first 4 bytes of double SHA-256)
     std::vector<unsigned char> checksum = double_sha256(extended_payload);
@@ -169,23 +246,176 @@ std::string base58check_encode(const std::vector<unsigned char> &payload, unsign
     return base58_encode(extended_payload);
 }
 
+// Address of a raw public key, without per-call hashing contexts
+std::string address_from_key(const unsigned char *key, size_t size, unsigned char version)
+{
+    // 1. SHA-256 hash of the public key
+    unsigned char sha256_hash[SHA256_DIGEST_LENGTH];
+    sha256_into(key, size, sha256_hash);
+
+    // 2. RIPEMD-160 hash of the SHA-256 hash, after the version byte
+    std::vector<unsigned char> payload(1 + RIPEMD160_DIGEST_LENGTH + 4);
+    payload[0] = version;
+    RIPEMD160_CTX ripemd;
+    RIPEMD160_Init(&ripemd);
+    RIPEMD160_Update(&ripemd, sha256_hash, SHA256_DIGEST_LENGTH);
+    RIPEMD160_Final(payload.data() + 1, &ripemd);
+
+    // 3. Checksum: first 4 bytes of the double SHA-256 of version + hash
+    unsigned char checksum[SHA256_DIGEST_LENGTH];
+    double_sha256_into(payload.data(), 1 + RIPEMD160_DIGEST_LENGTH, checksum);
+    std::copy(checksum, checksum + 4, payload.end() - 4);
+
+    return base58_encode(payload);
+}
+
 // Enhanced Bitcoin address generation from public key
 std::string public_key_to_address(const std::string &public_key, unsigned char version = 0x00)
 {
-    // Convert hex public key to bytes
-    std::vector<unsigned char> public_key_bytes = hex_to_bytes(public_key);
+    // Decoded one strtol per character pair, as it always has been, so text
+    // that is not clean hex still maps to the same address instead of raising;
+    // public_key_to_address_many is the strict variant
+    std::vector<unsigned char> public_key_bytes;
+    for (size_t i = 0; i < public_key.length(); i += 2)
+    {
+        std::string byte_string = public_key.substr(i, 2);
+        public_key_bytes.push_back(static_cast<unsigned char>(std::strtol(byte_string.c_str(), nullptr, 16)));
+    }
+    return address_from_key(public_key_bytes.data(), public_key_bytes.size(), version);
+}
 
-    // 1. SHA-256 hash of the public key
-    std::vector<unsigned char> sha256_hash = sha256_bytes(public_key_bytes);
+namespace
+{
+// Input of a batch call: a list of str/bytes, or a C-contiguous buffer split into fixed-size records
+class ByteRecords
+{
+public:
+    // Items are read in place; the tuple keeps them alive and unchanged while the GIL is released
+    explicit ByteRecords(const py::list &items) : items_(items)
+    {
+        views_.reserve(items_.size());
+        for (const auto &item : items_)
+        {
+            char *data = nullptr;
+            Py_ssize_t size = 0;
+            if (PyBytes_Check(item.ptr()))
+                PyBytes_AsStringAndSize(item.ptr(), &data, &size);
+            else if (PyUnicode_Check(item.ptr()))
+                data = const_cast<char *>(PyUnicode_AsUTF8AndSize(item.ptr(), &size));
+            else
+                throw py::type_error("items must be str or bytes");
+            if (data == nullptr)
+                throw py::error_already_set();
+            views_.emplace_back(data, static_cast<size_t>(size));
+        }
+    }
+
+    ByteRecords(const py::buffer &buffer, size_t record_size) : info_(buffer.request())
+    {
+        py::ssize_t expected = info_.itemsize;
+        for (py::ssize_t dim = info_.ndim - 1; dim >= 0; dim--)
+        {
+            if (info_.shape[dim] > 1 && info_.strides[dim] != expected)
+                throw std::invalid_argument("buffer must be C-contiguous");
+            expected *= info_.shape[dim];
+        }
+        size_t size = static_cast<size_t>(info_.size * info_.itemsize);
+        if (record_size == 0 || size % record_size != 0)
+            throw std::invalid_argument("buffer size must be a multiple of the record size");
+        const char *data = static_cast<const char *>(info_.ptr);
+        views_.reserve(size / record_size);
+        for (size_t offset = 0; offset < size; offset += record_size)
+        {
+            views_.emplace_back(data + offset, record_size);
+        }
+    }
 
-    // 2. RIPEMD-160 hash of the SHA-256 hash
-    std::vector<unsigned char> ripemd_hash = ripemd160_bytes(sha256_hash);
+    const std::vector<std::string_view> &views() const { return views_; }
 
-    // 3. Base58Check encode with version byte (0x00 for Bitcoin main network)
-    return base58check_encode(ripemd_hash, version);
+private:
+    py::tuple items_;
+    py::buffer_info info_; // keeps the buffer exported while views_ point into it
+    std::vector<std::string_view> views_;
+};
+} // namespace
+
+// Run body(begin, end) over slices of [0, count) without the GIL, on up to
+// `threads` threads (0: one per core); small batches stay on this thread
+template <typename Body>
+void parallel_ranges(size_t count, unsigned int threads, Body body)
+{
+    const size_t MIN_ITEMS_PER_THREAD = 256;
+    size_t workers = threads ? threads : std::max(1u, std::thread::hardware_concurrency());
+    workers = std::max<size_t>(1, std::min(workers, count / MIN_ITEMS_PER_THREAD));
+
+    py::gil_scoped_release release;
+    size_t step = workers > 1 ? (count + workers - 1) / workers : count;
+    std::vector<std::thread> pool;
+    for (size_t begin = step; begin < count; begin += step)
+    {
+        pool.emplace_back(body, begin, std::min(count, begin + step));
+    }
+    body(0, std::min(count, step));
+    for (auto &worker : pool)
+    {
+        worker.join();
+    }
+}
+
+// Hash every record; raw digests packed into one bytes object, or a list of hex strings
+template <typename Hash>
+py::object hash_many(const ByteRecords &records, bool raw, unsigned int threads, Hash hash)
+{
+    const auto &items = records.views();
+    const size_t n = items.size();
+    std::string digests(n * SHA256_DIGEST_LENGTH, '\0');
+    std::string hex(raw ? 0 : n * SHA256_DIGEST_LENGTH * 2, '0');
+    parallel_ranges(n, threads, [&](size_t begin, size_t end)
+                    {
+        for (size_t i = begin; i < end; i++) {
+            auto *digest = reinterpret_cast<unsigned char *>(&digests[i * SHA256_DIGEST_LENGTH]);
+            hash(reinterpret_cast<const unsigned char *>(items[i].data()), items[i].size(), digest);
+            if (!raw)
+                write_hex(digest, SHA256_DIGEST_LENGTH, &hex[i * SHA256_DIGEST_LENGTH * 2]);
+        } });
+
+    if (raw)
+        return py::bytes(digests);
+    py::list hexes(n);
+    for (size_t i = 0; i < n; i++)
+    {
+        hexes[i] = py::str(hex.data() + i * SHA256_DIGEST_LENGTH * 2, SHA256_DIGEST_LENGTH * 2);
+    }
+    return hexes;
+}
+
+// Address of every public key (hex text or raw bytes); None where a hex key does not decode
+py::list public_key_to_address_many(const ByteRecords &records, bool hex_keys, unsigned char version,
+                                    unsigned int threads)
+{
+    const auto &keys = records.views();
+    std::vector<std::string> addresses(keys.size());
+    parallel_ranges(keys.size(), threads, [&](size_t begin, size_t end)
+                    {
+        std::vector<unsigned char> key;
+        for (size_t i = begin; i < end; i++) {
+            if (!hex_keys)
+                addresses[i] = address_from_key(reinterpret_cast<const unsigned char *>(keys[i].data()), keys[i].size(), version);
+            else if (hex_to_bytes(keys[i], key))
+                addresses[i] = address_from_key(key.data(), key.size(), version);
+        } });
+
+    py::list result(keys.size());
+    for (size_t i = 0; i < keys.size(); i++)
+    {
+        result[i] = addresses[i].empty() ? py::object(py::none()) : py::object(py::str(addresses[i]));
+    }
+    return result;
 }
 
-// Calculate Merkle root from transaction IDs
+// Calculate Merkle root from transaction IDs: the hex text of each pair is
+// concatenated and hashed. Block headers commit to this root, so it is kept
+// as is; MerkleTree below is the binary-digest tree with proofs.
 std::string calculate_merkle_root(const std::vector<std::string> &tx_ids)
 {
     if (tx_ids.empty())
@@ -193,87 +423,534 @@ std::string calculate_merkle_root(const std::vector<std::string> &tx_ids)
         return std::string(64, '0');
     }
 
+    // Reduce the level in place, reusing one buffer for each pair
     std::vector<std::string> tree = tx_ids;
+    std::string combined;
     while (tree.size() > 1)
     {
-        std::vector<std::string> new_level;
+        size_t parents = 0;
         for (size_t i = 0; i < tree.size(); i += 2)
         {
-            std::string left = tree[i];
-            std::string right = (i + 1 < tree.size()) ? tree[i + 1] : left;
-            std::string combined = left + right;
-            new_level.push_back(sha256(combined));
+            const std::string &right = (i + 1 < tree.size()) ? tree[i + 1] : tree[i];
+            combined.assign(tree[i]).append(right);
+            tree[parents++] = sha256(combined);
         }
-        tree = new_level;
+        tree.resize(parents);
     }
     return tree[0];
 }
 
-// Mining function
-std::tuple<int, std::string, long> mine_block(const std::string &block_string_base, int difficulty, int max_nonce = INT_MAX)
+typedef std::array<unsigned char, SHA256_DIGEST_LENGTH> Digest;
+
+// Merkle tree over 32-byte leaves that keeps every level. Leaves are hashed
+// as SHA-256(0x00 || leaf) and inner nodes as SHA-256(0x01 || left || right);
+// an odd last node is promoted unchanged. Appending rehashes one path. The
+// Python module merkle.py implements the same algorithm.
+class MerkleTree
+{
+public:
+    MerkleTree() : levels_(1) {}
+
+    explicit MerkleTree(const std::vector<py::bytes> &leaves) : levels_(1)
+    {
+        extend(leaves);
+    }
+
+    size_t size() const { return levels_[0].size(); }
+
+    void append(const py::bytes &leaf)
+    {
+        size_t first = size();
+        add_leaf(leaf);
+        rehash_from(first);
+    }
+
+    // Add many leaves, hashing each inner node they change once
+    void extend(const std::vector<py::bytes> &leaves)
+    {
+        size_t first = size();
+        levels_[0].reserve(first + leaves.size());
+        for (const auto &leaf : leaves)
+        {
+            add_leaf(leaf);
+        }
+        rehash_from(first);
+    }
+
+    py::bytes root() const
+    {
+        if (levels_[0].empty())
+            return py::bytes(std::string(SHA256_DIGEST_LENGTH, '\0'));
+        return to_bytes(levels_.back()[0]);
+    }
+
+    // Sibling digests from leaf `index` up to the root, as
+    // (sibling is on the right, digest) pairs
+    std::vector<std::pair<bool, py::bytes>> proof(size_t index) const
+    {
+        if (index >= size())
+            throw py::index_error("leaf index out of range");
+        std::vector<std::pair<bool, py::bytes>> steps;
+        for (size_t depth = 0; depth + 1 < levels_.size(); depth++)
+        {
+            size_t sibling = index ^ 1;
+            if (sibling < levels_[depth].size())
+                steps.emplace_back(sibling > index, to_bytes(levels_[depth][sibling]));
+            index /= 2;
+        }
+        return steps;
+    }
+
+    std::vector<std::vector<py::bytes>> levels() const
+    {
+        std::vector<std::vector<py::bytes>> result;
+        for (const auto &level : levels_)
+        {
+            std::vector<py::bytes> digests;
+            digests.reserve(level.size());
+            for (const auto &digest : level)
+            {
+                digests.push_back(to_bytes(digest));
+            }
+            result.push_back(std::move(digests));
+        }
+        return result;
+    }
+
+    static Digest hash_with_prefix(unsigned char prefix, const void *left, const void *right)
+    {
+        Digest digest;
+        SHA256_CTX ctx;
+        SHA256_Init(&ctx);
+        SHA256_Update(&ctx, &prefix, 1);
+        SHA256_Update(&ctx, left, SHA256_DIGEST_LENGTH);
+        if (right != nullptr)
+            SHA256_Update(&ctx, right, SHA256_DIGEST_LENGTH);
+        SHA256_Final(digest.data(), &ctx);
+        return digest;
+    }
+
+private:
+    void add_leaf(const py::bytes &leaf)
+    {
+        std::string_view data = leaf;
+        if (data.size() != SHA256_DIGEST_LENGTH)
+            throw std::invalid_argument("Merkle leaves must be 32-byte digests");
+        levels_[0].push_back(hash_with_prefix(0x00, data.data(), nullptr));
+    }
+
+    // Recompute every inner node above leaves [first, size())
+    void rehash_from(size_t first)
+    {
+        for (size_t depth = 0; levels_[depth].size() > 1; depth++)
+        {
+            if (depth + 1 == levels_.size())
+                levels_.emplace_back();
+            const std::vector<Digest> &level = levels_[depth];
+            std::vector<Digest> &above = levels_[depth + 1];
+            size_t parents = (level.size() + 1) / 2;
+            above.resize(parents);
+            for (size_t parent = first / 2; parent < parents; parent++)
+            {
+                above[parent] = 2 * parent + 1 < level.size()
+                                    ? hash_with_prefix(0x01, level[2 * parent].data(), level[2 * parent + 1].data())
+                                    : level[2 * parent];
+            }
+            first /= 2;
+        }
+    }
+
+    static py::bytes to_bytes(const Digest &digest)
+    {
+        return py::bytes(reinterpret_cast<const char *>(digest.data()), digest.size());
+    }
+
+    std::vector<std::vector<Digest>> levels_;
+};
+
+// Decimal digits of a nonce, incremented in place so the mining loop never
+// formats or allocates a string
+struct NonceDigits
+{
+    char digits[24];
+    size_t length;
+
+    explicit NonceDigits(uint64_t value)
+    {
+        length = std::to_chars(digits, digits + sizeof(digits), value).ptr - digits;
+    }
+
+    void increment()
+    {
+        size_t i = length;
+        while (i > 0 && digits[i - 1] == '9')
+        {
+            digits[--i] = '0';
+        }
+        if (i > 0)
+        {
+            digits[i - 1]++;
+            return;
+        }
+        std::memmove(digits + 1, digits, length++);
+        digits[0] = '1';
+    }
+};
+
+// Largest digest, read big-endian, whose hex form starts with `difficulty` zeros
+std::array<unsigned char, SHA256_DIGEST_LENGTH> difficulty_target(int difficulty)
+{
+    std::array<unsigned char, SHA256_DIGEST_LENGTH> target;
+    target.fill(0xff);
+    for (int nibble = 0; nibble < std::min(difficulty, SHA256_DIGEST_LENGTH * 2); nibble++)
+    {
+        target[nibble / 2] &= (nibble % 2) ? 0xf0 : 0x0f;
+    }
+    return target;
+}
+
+// Hash nonces in [start, end) from the prefix midstate until one meets the
+// target or `stop` is set; hashes are added to `hashes` in batches
+bool search_nonces(const SHA256_CTX &prefix, const unsigned char *target, uint64_t start, uint64_t end,
+                   const std::atomic<bool> &stop, std::atomic<uint64_t> &hashes,
+                   uint64_t &found_nonce, unsigned char *digest)
+{
+    NonceDigits nonce_digits(start);
+    uint64_t batch = 0;
+    bool found = false;
+    for (uint64_t nonce = start; nonce < end && !stop.load(std::memory_order_relaxed);
+         nonce++, nonce_digits.increment())
+    {
+        SHA256_CTX ctx = prefix;
+        SHA256_Update(&ctx, nonce_digits.digits, nonce_digits.length);
+        SHA256_Final(digest, &ctx);
+        batch++;
+
+        if (std::memcmp(digest, target, SHA256_DIGEST_LENGTH) <= 0)
+        {
+            found_nonce = nonce;
+            found = true;
+            break;
+        }
+
+        if (batch == 4096)
+        {
+            hashes += batch;
+            batch = 0;
+        }
+    }
+    hashes += batch;
+    return found;
+}
+
+// Mining function: hashes block_string_base + decimal nonce until the hex
+// digest starts with `difficulty` zeros. The prefix is hashed once and each
+// worker copies that midstate, appends only the nonce digits and compares the
+// raw digest with a binary target. The GIL is released while mining;
+// `progress(hashes, hashes_per_second)` is called every `report_interval`
+// seconds and stops the search if it returns False.
+std::tuple<int, std::string, long> mine_block(const std::string &block_string_base, int difficulty,
+                                              int max_nonce = INT_MAX, py::object progress = py::none(),
+                                              double report_interval = 1.0, unsigned int threads = 0)
 {
-    std::string target(difficulty, '0');
+    if (difficulty > SHA256_DIGEST_LENGTH * 2)
+    {
+        return std::make_tuple(-1, "", 0L);
+    }
+    const auto target = difficulty_target(difficulty);
+
+    SHA256_CTX prefix;
+    SHA256_Init(&prefix);
+    SHA256_Update(&prefix, block_string_base.data(), block_string_base.size());
 
-    unsigned int num_threads = std::thread::hardware_concurrency();
+    unsigned int num_threads = threads ? threads : std::thread::hardware_concurrency();
     if (num_threads == 0)
         num_threads = 4;
 
-    // Use atomic variables for thread-safe operations
-    std::atomic<bool> found_solution(false);
-    std::atomic<int> result_nonce(0);
-    std::atomic<long> total_hashes(0);
-    std::string result_hash;
+    std::atomic<bool> stop(false);
+    std::atomic<uint64_t> total_hashes(0);
+    int result_nonce = -1;
+    std::array<unsigned char, SHA256_DIGEST_LENGTH> result_digest{};
     std::mutex result_mutex;
 
-    std::vector<std::thread> threads;
-    int chunk_size = max_nonce / num_threads;
+    std::mutex done_mutex;
+    std::condition_variable done;
+    unsigned int running = num_threads;
+    std::exception_ptr error;
+    bool interrupted = false;
+
+    auto report = [&](double elapsed)
+    {
+        // Called with the GIL held
+        if (PyErr_CheckSignals() != 0)
+        {
+            interrupted = true;
+            return false;
+        }
+        if (progress.is_none())
+            return true;
+        uint64_t hashes = total_hashes.load();
+        py::object keep_going = progress(hashes, elapsed > 0 ? hashes / elapsed : 0.0);
+        return keep_going.is_none() || keep_going.cast<bool>();
+    };
+
+    const auto started = std::chrono::steady_clock::now();
+    auto seconds_since_start = [&]()
+    {
+        return std::chrono::duration<double>(std::chrono::steady_clock::now() - started).count();
+    };
 
-    for (unsigned int i = 0; i < num_threads; i++)
     {
-        int start_nonce = i * chunk_size;
-        int end_nonce = (i == num_threads - 1) ? max_nonce : (i + 1) * chunk_size;
+        py::gil_scoped_release release;
+        std::vector<std::thread> workers;
+        int chunk_size = max_nonce / num_threads;
+
+        for (unsigned int i = 0; i < num_threads; i++)
+        {
+            int start_nonce = i * chunk_size;
+            int end_nonce = (i == num_threads - 1) ? max_nonce : (i + 1) * chunk_size;
 
-        threads.emplace_back([&, start_nonce, end_nonce]()
-                             {
-            long local_hashes = 0;
-            for (int nonce = start_nonce; nonce < end_nonce && !found_solution; nonce++) {
-                std::string block_string = block_string_base + std::to_string(nonce);
-                std::string hash = sha256(block_string);
-                local_hashes++;
-                
-                if (hash.compare(0, difficulty, target) == 0) {
+            workers.emplace_back([&, start_nonce, end_nonce]()
+                                 {
+                uint64_t nonce;
+                unsigned char digest[SHA256_DIGEST_LENGTH];
+                if (search_nonces(prefix, target.data(), start_nonce, end_nonce, stop, total_hashes, nonce, digest)) {
                     std::lock_guard<std::mutex> lock(result_mutex);
-                    if (!found_solution) {
-                        found_solution = true;
-                        result_nonce.store(nonce);
-                        result_hash = hash;
+                    if (!stop) {
+                        stop = true;
+                        result_nonce = static_cast<int>(nonce);
+                        std::copy(digest, digest + SHA256_DIGEST_LENGTH, result_digest.begin());
                     }
-                    break;
-                }
-                
-                if (local_hashes % 10000 == 0) {
-                    total_hashes += local_hashes;
-                    local_hashes = 0;
                 }
+                std::lock_guard<std::mutex> lock(done_mutex);
+                running--;
+                done.notify_all(); });
+        }
+
+        // Report progress and watch for Ctrl-C until every worker is done
+        const auto interval = std::chrono::duration<double>(report_interval > 0 ? report_interval : 1.0);
+        std::unique_lock<std::mutex> lock(done_mutex);
+        while (running > 0)
+        {
+            if (done.wait_for(lock, interval, [&]
+                              { return running == 0; }))
+                break;
+            lock.unlock();
+            try
+            {
+                py::gil_scoped_acquire acquire;
+                if (!report(seconds_since_start()))
+                    stop = true;
             }
-            total_hashes += local_hashes; });
-    }
+            catch (...)
+            {
+                error = std::current_exception();
+                stop = true;
+            }
+            lock.lock();
+        }
+        lock.unlock();
 
-    for (auto &thread : threads)
-    {
-        thread.join();
+        for (auto &worker : workers)
+        {
+            worker.join();
+        }
     }
 
-    if (found_solution)
+    if (error)
+        std::rethrow_exception(error);
+    if (interrupted)
+        throw py::error_already_set();
+    if (!progress.is_none())
+        report(seconds_since_start());
+
+    if (result_nonce >= 0)
     {
-        return std::make_tuple(result_nonce.load(), result_hash, total_hashes.load());
+        std::vector<unsigned char> digest(result_digest.begin(), result_digest.end());
+        return std::make_tuple(result_nonce, bytes_to_hex(digest), static_cast<long>(total_hashes.load()));
     }
     else
     {
-        return std::make_tuple(-1, "", total_hashes.load());
+        return std::make_tuple(-1, "", static_cast<long>(total_hashes.load()));
     }
 }
 
+// A cancellable proof-of-work search over [start_nonce, end_nonce) for
+// asyncio callers. Workers run without the GIL and claim fixed-size chunks of
+// the nonce range; after cancel() each finishes the chunk it holds, so once
+// they have stopped every nonce below next_nonce has been tried and start()
+// resumes from there. extend() raises end_nonce, even while running.
+class MiningJob
+{
+public:
+    static constexpr uint64_t CHUNK = 16384;
+
+    MiningJob(const std::string &block_string_base, int difficulty, uint64_t start_nonce, uint64_t end_nonce,
+              unsigned int threads)
+        : difficulty_(difficulty), cursor_(start_nonce), end_(end_nonce)
+    {
+        if (difficulty < 0 || difficulty > SHA256_DIGEST_LENGTH * 2)
+            throw std::invalid_argument("difficulty must be between 0 and 64");
+        target_ = difficulty_target(difficulty);
+        SHA256_Init(&prefix_);
+        SHA256_Update(&prefix_, block_string_base.data(), block_string_base.size());
+        threads_ = threads ? threads : std::thread::hardware_concurrency();
+        if (threads_ == 0)
+            threads_ = 4;
+    }
+
+    ~MiningJob()
+    {
+        cancelled_ = true;
+        join();
+    }
+
+    // Start or resume the search; does nothing while running or once solved
+    void start()
+    {
+        std::lock_guard<std::mutex> lock(state_mutex_);
+        if (running_ > 0 || found_)
+            return;
+        join();
+        cancelled_ = false;
+        started_ = true;
+        running_ = threads_;
+        for (unsigned int i = 0; i < threads_; i++)
+        {
+            workers_.emplace_back(&MiningJob::work, this);
+        }
+    }
+
+    void cancel() { cancelled_ = true; }
+
+    // Wait up to `timeout` seconds (forever if negative) for the workers to
+    // stop; returns True once they have
+    bool wait(double timeout)
+    {
+        py::gil_scoped_release release;
+        std::unique_lock<std::mutex> lock(state_mutex_);
+        auto idle = [this]
+        { return running_ == 0; };
+        if (timeout < 0)
+            done_.wait(lock, idle);
+        else
+            done_.wait_for(lock, std::chrono::duration<double>(timeout), idle);
+        return running_ == 0;
+    }
+
+    void extend(uint64_t end_nonce)
+    {
+        uint64_t current = end_.load();
+        while (end_nonce > current && !end_.compare_exchange_weak(current, end_nonce))
+        {
+        }
+    }
+
+    // (nonce, hash) once solved, otherwise None
+    py::object result()
+    {
+        std::lock_guard<std::mutex> lock(result_mutex_);
+        if (!found_)
+            return py::none();
+        std::vector<unsigned char> digest(result_digest_.begin(), result_digest_.end());
+        return py::make_tuple(result_nonce_, bytes_to_hex(digest));
+    }
+
+    std::string state()
+    {
+        std::lock_guard<std::mutex> lock(state_mutex_);
+        if (found_)
+            return "found";
+        if (running_ > 0)
+            return "running";
+        if (!started_)
+            return "idle";
+        if (cursor_.load() >= end_.load())
+            return "exhausted";
+        return cancelled_ ? "cancelled" : "paused";
+    }
+
+    bool done()
+    {
+        std::lock_guard<std::mutex> lock(state_mutex_);
+        return started_ && running_ == 0;
+    }
+
+    uint64_t hashes() const { return hashes_.load(); }
+    uint64_t next_nonce() const { return cursor_.load(); }
+    uint64_t end_nonce() const { return end_.load(); }
+    int difficulty() const { return difficulty_; }
+
+private:
+    // Claim the next chunk of nonces; false once the range is used up
+    bool claim(uint64_t &begin, uint64_t &chunk_end)
+    {
+        begin = cursor_.load();
+        do
+        {
+            uint64_t end = end_.load();
+            if (begin >= end)
+                return false;
+            chunk_end = end - begin > CHUNK ? begin + CHUNK : end;
+        } while (!cursor_.compare_exchange_weak(begin, chunk_end));
+        return true;
+    }
+
+    void work()
+    {
+        uint64_t begin, chunk_end, nonce;
+        unsigned char digest[SHA256_DIGEST_LENGTH];
+        while (!cancelled_ && !found_ && claim(begin, chunk_end))
+        {
+            if (search_nonces(prefix_, target_.data(), begin, chunk_end, found_, hashes_, nonce, digest))
+            {
+                std::lock_guard<std::mutex> lock(result_mutex_);
+                if (!found_)
+                {
+                    result_nonce_ = nonce;
+                    std::copy(digest, digest + SHA256_DIGEST_LENGTH, result_digest_.begin());
+                    found_ = true;
+                }
+            }
+        }
+        std::lock_guard<std::mutex> lock(state_mutex_);
+        running_--;
+        done_.notify_all();
+    }
+
+    // Called with state_mutex_ held (or from the destructor) when no worker runs
+    void join()
+    {
+        for (auto &worker : workers_)
+        {
+            if (worker.joinable())
+                worker.join();
+        }
+        workers_.clear();
+    }
+
+    int difficulty_;
+    std::array<unsigned char, SHA256_DIGEST_LENGTH> target_;
+    SHA256_CTX prefix_;
+    unsigned int threads_;
+
+    std::atomic<uint64_t> cursor_;
+    std::atomic<uint64_t> end_;
+    std::atomic<uint64_t> hashes_{0};
+    std::atomic<bool> cancelled_{false};
+    std::atomic<bool> found_{false};
+
+    std::mutex result_mutex_;
+    uint64_t result_nonce_ = 0;
+    std::array<unsigned char, SHA256_DIGEST_LENGTH> result_digest_{};
+
+    std::mutex state_mutex_;
+    std::condition_variable done_;
+    std::vector<std::thread> workers_;
+    unsigned int running_ = 0;
+    bool started_ = false;
+};
+
 // Python module definition
 PYBIND11_MODULE(blockchain_cpp, m)
 {
@@ -282,10 +959,60 @@ PYBIND11_MODULE(blockchain_cpp, m)
     m.def("sha256", &sha256, "Calculate SHA-256 hash of input string");
     m.def("ripemd160", &ripemd160, "Calculate RIPEMD-160 hash of input string");
     m.def("calculate_merkle_root", &calculate_merkle_root, "Calculate Merkle root from transaction IDs");
+    py::class_<MerkleTree>(m, "MerkleTree", "Binary-digest Merkle tree with cached levels and inclusion proofs")
+        .def(py::init<>())
+        .def(py::init<const std::vector<py::bytes> &>(), py::arg("leaves"))
+        .def("append", &MerkleTree::append, "Add a 32-byte leaf, rehashing one path", py::arg("leaf"))
+        .def("extend", &MerkleTree::extend, py::arg("leaves"))
+        .def("root", &MerkleTree::root)
+        .def("proof", &MerkleTree::proof, "Sibling digests from leaf index up to the root", py::arg("index"))
+        .def_property_readonly("levels", &MerkleTree::levels)
+        .def("__len__", &MerkleTree::size);
     m.def("mine_block", &mine_block, "Mine a block with the given difficulty",
-          py::arg("block_string_base"), py::arg("difficulty"), py::arg("max_nonce") = INT_MAX);
+          py::arg("block_string_base"), py::arg("difficulty"), py::arg("max_nonce") = INT_MAX,
+          py::arg("progress") = py::none(), py::arg("report_interval") = 1.0, py::arg("threads") = 0);
+    py::class_<MiningJob>(m, "MiningJob", "Cancellable, resumable proof-of-work search run without the GIL")
+        .def(py::init<const std::string &, int, uint64_t, uint64_t, unsigned int>(),
+             py::arg("block_string_base"), py::arg("difficulty"), py::arg("start_nonce") = 0,
+             py::arg("end_nonce") = uint64_t(1) << 32, py::arg("threads") = 0)
+        .def("start", &MiningJob::start, "Start the search, or resume it from next_nonce")
+        .def("cancel", &MiningJob::cancel, "Ask the workers to stop after their current chunk")
+        .def("wait", &MiningJob::wait, "Wait for the workers to stop; returns True once they have",
+             py::arg("timeout") = -1.0)
+        .def("extend", &MiningJob::extend, "Raise end_nonce", py::arg("end_nonce"))
+        .def("result", &MiningJob::result, "(nonce, hash) once solved, otherwise None")
+        .def_property_readonly("state", &MiningJob::state)
+        .def_property_readonly("done", &MiningJob::done)
+        .def_property_readonly("hashes", &MiningJob::hashes)
+        .def_property_readonly("next_nonce", &MiningJob::next_nonce)
+        .def_property_readonly("end_nonce", &MiningJob::end_nonce)
+        .def_property_readonly("difficulty", &MiningJob::difficulty);
     m.def("public_key_to_address", &public_key_to_address, "Convert public key to blockchain address with Base58Check encoding",
           py::arg("public_key"), py::arg("version") = 0x00);
+    m.def("sha256_many", [](const py::list &items, bool raw, unsigned int threads)
+          { return hash_many(ByteRecords(items), raw, threads, sha256_into); },
+          "SHA-256 of every item: hex strings, or one bytes object of raw 32-byte digests if raw",
+          py::arg("items"), py::arg("raw") = false, py::arg("threads") = 1);
+    m.def("sha256_many", [](const py::buffer &data, size_t item_size, bool raw, unsigned int threads)
+          { return hash_many(ByteRecords(data, item_size), raw, threads, sha256_into); },
+          "SHA-256 of every item_size-byte record of a buffer",
+          py::arg("data"), py::arg("item_size"), py::arg("raw") = false, py::arg("threads") = 1);
+    m.def("double_sha256_many", [](const py::list &items, bool raw, unsigned int threads)
+          { return hash_many(ByteRecords(items), raw, threads, double_sha256_into); },
+          "Double SHA-256 of every item: hex strings, or one bytes object of raw 32-byte digests if raw",
+          py::arg("items"), py::arg("raw") = false, py::arg("threads") = 1);
+    m.def("double_sha256_many", [](const py::buffer &data, size_t item_size, bool raw, unsigned int threads)
+          { return hash_many(ByteRecords(data, item_size), raw, threads, double_sha256_into); },
+          "Double SHA-256 of every item_size-byte record of a buffer",
+          py::arg("data"), py::arg("item_size"), py::arg("raw") = false, py::arg("threads") = 1);
+    m.def("public_key_to_address_many", [](const py::list &public_keys, unsigned char version, unsigned int threads)
+          { return public_key_to_address_many(ByteRecords(public_keys), true, version, threads); },
+          "Addresses of hex public keys; None for keys that are not valid hex",
+          py::arg("public_keys"), py::arg("version") = 0x00, py::arg("threads") = 1);
+    m.def("public_key_to_address_many", [](const py::buffer &public_keys, size_t key_size, unsigned char version, unsigned int threads)
+          { return public_key_to_address_many(ByteRecords(public_keys, key_size), false, version, threads); },
+          "Addresses of raw key_size-byte public keys packed in a buffer",
+          py::arg("public_keys"), py::arg("key_size"), py::arg("version") = 0x00, py::arg("threads") = 1);
     m.def("base58_encode", [](const std::string &input)
           {
         std::vector<unsigned char> bytes(input.begin(), input.end());
@@ -1,141 +1,445 @@
 // utxo_cpp.cpp - Enhanced with serialization/deserialization for persistence
+//
+// UTXOs are stored as plain structs, not Python objects: the outpoint is the
+// binary transaction ID plus output index, the amount is an integer number of
+// base units, and recipients and script types are interned to small IDs.
+// Entries live densely in one vector, found through an open-addressing index,
+// and every recipient's entries are linked together so address queries and
+// balances only visit that address's UTXOs. Python TransactionOutput objects
+// are only built when a caller asks for an output.
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <unordered_map>
+#include <unordered_set>
 #include <string>
 #include <vector>
+#include <array>
 #include <tuple>
 #include <sstream>
 #include <iostream>
 #include <optional>
 #include <memory>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+#include <limits>
 
 namespace py = pybind11;
 
-// Structure to store serialized UTXO data
-struct SerializedUTXO
+// Amounts are stored as integer base units, 10^8 per coin
+static const int64_t UNITS_PER_COIN = 100000000;
+static const uint32_t NONE = std::numeric_limits<uint32_t>::max();
+
+int64_t amount_to_units(double amount)
 {
-    std::string tx_id;
-    size_t output_index;
-    std::string serialized_output;
-};
+    double units = std::round(amount * UNITS_PER_COIN);
+    if (!std::isfinite(units) || units < 0 || units >= 9.2e18)
+        throw py::value_error("UTXO amount must be a non-negative number below 9.2e10");
+    return static_cast<int64_t>(units);
+}
 
-// Structure to represent a transaction output with essential fields
-// This is used for internal serialization within C++
-struct TransactionOutput
+double units_to_amount(int64_t units)
 {
-    std::string recipient;
-    double amount;
-    std::string script;
+    return static_cast<double>(units) / UNITS_PER_COIN;
+}
 
-    // Serialize to string
-    std::string serialize() const
+// Exact decimal text of an amount in base units, e.g. 1250000000 -> "12.5"
+std::string format_units(int64_t units)
+{
+    std::string text = std::to_string(units / UNITS_PER_COIN);
+    int64_t fraction = units % UNITS_PER_COIN;
+    if (fraction != 0)
+    {
+        std::string digits = std::to_string(fraction);
+        digits.insert(0, 8 - digits.size(), '0');
+        digits.erase(digits.find_last_not_of('0') + 1);
+        text += "." + digits;
+    }
+    return text;
+}
+
+// Parse an amount written by format_units, or by the older double formatting
+std::optional<int64_t> parse_units(const std::string &text)
+{
+    size_t dot = text.find('.');
+    std::string whole = text.substr(0, dot);
+    std::string fraction = dot == std::string::npos ? "" : text.substr(dot + 1);
+    bool plain = !whole.empty() && whole.size() <= 11 && fraction.size() <= 8 &&
+                 whole.find_first_not_of("0123456789") == std::string::npos &&
+                 fraction.find_first_not_of("0123456789") == std::string::npos;
+    if (plain)
+    {
+        fraction.append(8 - fraction.size(), '0');
+        return std::stoll(whole) * UNITS_PER_COIN + std::stoll(fraction);
+    }
+    // Exponents and long fractions from rows serialized as doubles
+    char *end = nullptr;
+    double amount = std::strtod(text.c_str(), &end);
+    if (end == text.c_str() || *end != '\0')
+        return std::nullopt;
+    try
     {
-        std::stringstream ss;
-        ss << recipient << "|" << amount << "|" << script;
-        return ss.str();
+        return amount_to_units(amount);
     }
+    catch (const py::value_error &)
+    {
+        return std::nullopt;
+    }
+}
 
-    // Deserialize from string
-    static std::optional<TransactionOutput> deserialize(const std::string &data)
+// Binary outpoint: 32-byte transaction ID and output index
+struct Outpoint
+{
+    std::array<unsigned char, 32> tx_id;
+    uint32_t index;
+
+    bool operator==(const Outpoint &other) const
     {
-        std::stringstream ss(data);
-        std::string recipient, script;
-        double amount;
+        return index == other.index && tx_id == other.tx_id;
+    }
 
-        std::getline(ss, recipient, '|');
-        if (ss.fail())
-            return std::nullopt;
+    uint64_t hash() const
+    {
+        // Transaction IDs are already hashes; mix in the index and spread the bits
+        uint64_t h;
+        std::memcpy(&h, tx_id.data(), sizeof(h));
+        h ^= (static_cast<uint64_t>(index) + 1) * 0x9e3779b97f4a7c15ULL;
+        h ^= h >> 31;
+        h *= 0xbf58476d1ce4e5b9ULL;
+        return h ^ (h >> 29);
+    }
 
-        ss >> amount;
-        if (ss.fail())
-            return std::nullopt;
+    static Outpoint parse(const std::string &tx_id, size_t output_index)
+    {
+        if (tx_id.size() != 64)
+            throw py::value_error("tx_id must be a 64-character hex string");
+        if (output_index > std::numeric_limits<uint32_t>::max())
+            throw py::value_error("output_index out of range");
+        Outpoint outpoint;
+        outpoint.index = static_cast<uint32_t>(output_index);
+        auto nibble = [](char c)
+        {
+            if (c >= '0' && c <= '9')
+                return c - '0';
+            if (c >= 'a' && c <= 'f')
+                return c - 'a' + 10;
+            if (c >= 'A' && c <= 'F')
+                return c - 'A' + 10;
+            return -1;
+        };
+        for (size_t i = 0; i < 32; i++)
+        {
+            int high = nibble(tx_id[2 * i]);
+            int low = nibble(tx_id[2 * i + 1]);
+            if (high < 0 || low < 0)
+                throw py::value_error("tx_id must be a 64-character hex string");
+            outpoint.tx_id[i] = static_cast<unsigned char>(high << 4 | low);
+        }
+        return outpoint;
+    }
+
+    std::string tx_id_hex() const
+    {
+        static const char *HEX_DIGITS = "0123456789abcdef";
+        std::string hex(64, '0');
+        for (size_t i = 0; i < 32; i++)
+        {
+            hex[2 * i] = HEX_DIGITS[tx_id[i] >> 4];
+            hex[2 * i + 1] = HEX_DIGITS[tx_id[i] & 0x0f];
+        }
+        return hex;
+    }
+};
+
+// One unspent output. Entries are linked per recipient through next/prev.
+struct UTXOEntry
+{
+    Outpoint outpoint;
+    int64_t amount;
+    uint32_t recipient;
+    uint32_t next;
+    uint32_t prev;
+    uint16_t script;
+};
+
+// Interned strings (recipients, script types) and their numeric IDs
+class StringTable
+{
+public:
+    explicit StringTable(uint32_t limit) : limit_(limit) {}
 
-        ss.ignore(); // Skip delimiter
-        std::getline(ss, script);
-        if (ss.fail())
+    uint32_t intern(const std::string &value)
+    {
+        auto found = ids_.find(value);
+        if (found != ids_.end())
+            return found->second;
+        if (names_.size() >= limit_)
+            throw py::value_error("too many distinct values: " + value);
+        auto inserted = ids_.emplace(value, static_cast<uint32_t>(names_.size())).first;
+        names_.push_back(&inserted->first);
+        return inserted->second;
+    }
+
+    std::optional<uint32_t> find(const std::string &value) const
+    {
+        auto found = ids_.find(value);
+        if (found == ids_.end())
             return std::nullopt;
+        return found->second;
+    }
+
+    const std::string &name(uint32_t id) const { return *names_[id]; }
+    size_t size() const { return names_.size(); }
+
+    // Approximate heap use: map nodes and buckets, spilled string data, name pointers
+    size_t memory_bytes() const
+    {
+        size_t bytes = ids_.bucket_count() * sizeof(void *) + names_.capacity() * sizeof(const std::string *);
+        for (const auto &[value, id] : ids_)
+        {
+            bytes += sizeof(void *) + sizeof(size_t) + sizeof(std::pair<const std::string, uint32_t>);
+            if (value.capacity() >= sizeof(std::string))
+                bytes += value.capacity() + 1;
+        }
+        return bytes;
+    }
 
-        return TransactionOutput{recipient, amount, script};
+    void clear()
+    {
+        ids_.clear();
+        names_.clear();
     }
+
+private:
+    uint32_t limit_;
+    std::unordered_map<std::string, uint32_t> ids_;
+    std::vector<const std::string *> names_; // point at the keys of ids_, which never move
 };
 
 // Efficient UTXO set implementation in C++ with serialization support
 class UTXOSetCpp
 {
 private:
-    std::unordered_map<std::string, std::vector<py::object>> utxos;
+    std::vector<UTXOEntry> entries;
+    std::vector<uint32_t> slots; // open-addressing index into entries, linear probing, NONE if empty
+    std::vector<uint32_t> recipient_heads;
+    StringTable recipients{NONE};
+    StringTable scripts{std::numeric_limits<uint16_t>::max()};
     std::unordered_map<std::string, std::unordered_set<uint64_t>> used_nonces;
 
-    // Helper functions for serialization and deserialization
-    py::object create_output_from_serialized(const std::string &serialized_data)
+    size_t mask() const { return slots.size() - 1; }
+
+    // Slot holding outpoint, or the empty slot where it would go
+    size_t probe(const Outpoint &outpoint) const
     {
-        auto output_opt = TransactionOutput::deserialize(serialized_data);
-        if (!output_opt)
+        size_t slot = outpoint.hash() & mask();
+        while (slots[slot] != NONE && !(entries[slots[slot]].outpoint == outpoint))
         {
-            return py::none();
+            slot = (slot + 1) & mask();
         }
+        return slot;
+    }
 
-        // Create Python TransactionOutput object
-        py::object transaction_output_class = py::module::import("utils").attr("TransactionOutput");
-        return transaction_output_class(output_opt->recipient, output_opt->amount, output_opt->script);
+    std::optional<uint32_t> find(const Outpoint &outpoint) const
+    {
+        if (entries.empty())
+            return std::nullopt;
+        uint32_t position = slots[probe(outpoint)];
+        if (position == NONE)
+            return std::nullopt;
+        return position;
     }
 
-    std::string serialize_output(py::object output)
+    void rebuild_index(size_t size)
     {
-        if (output.is_none())
+        slots.assign(size, NONE);
+        slots.shrink_to_fit();
+        for (uint32_t position = 0; position < entries.size(); position++)
         {
-            return "";
+            slots[probe(entries[position].outpoint)] = position;
         }
+    }
 
-        // Extract fields from Python TransactionOutput
-        std::string recipient = py::cast<std::string>(output.attr("recipient"));
-        double amount = py::cast<double>(output.attr("amount"));
-        std::string script = py::cast<std::string>(output.attr("script"));
+    void grow()
+    {
+        // Keep the index at most 3/4 full
+        if (!slots.empty() && (entries.size() + 1) * 4 <= slots.size() * 3)
+            return;
+        rebuild_index(slots.empty() ? 16 : slots.size() * 2);
+    }
 
-        // Create and serialize a C++ TransactionOutput
-        TransactionOutput tx_output{recipient, amount, script};
-        return tx_output.serialize();
+    // Give memory back once most entries are spent
+    void shrink()
+    {
+        if (entries.size() * 4 < entries.capacity() && entries.capacity() > 64)
+            entries.shrink_to_fit();
+        if (entries.size() * 8 < slots.size() && slots.size() > 16)
+            rebuild_index(slots.size() / 4);
     }
 
-public:
-    UTXOSetCpp() {}
+    // Empty a slot, shifting later entries of its probe run back so lookups need no tombstones
+    void erase_slot(size_t hole)
+    {
+        size_t slot = hole;
+        while (true)
+        {
+            slot = (slot + 1) & mask();
+            if (slots[slot] == NONE)
+                break;
+            size_t home = entries[slots[slot]].outpoint.hash() & mask();
+            // Move it back unless its home lies cyclically in (hole, slot]
+            bool stays = hole <= slot ? (hole < home && home <= slot) : (hole < home || home <= slot);
+            if (!stays)
+            {
+                slots[hole] = slots[slot];
+                hole = slot;
+            }
+        }
+        slots[hole] = NONE;
+    }
 
-    bool add_utxo(const std::string &tx_id, size_t output_index, py::object output)
+    void link(uint32_t position)
     {
-        if (utxos.find(tx_id) == utxos.end())
+        UTXOEntry &entry = entries[position];
+        if (entry.recipient >= recipient_heads.size())
+            recipient_heads.resize(entry.recipient + 1, NONE);
+        entry.prev = NONE;
+        entry.next = recipient_heads[entry.recipient];
+        if (entry.next != NONE)
+            entries[entry.next].prev = position;
+        recipient_heads[entry.recipient] = position;
+    }
+
+    void unlink(uint32_t position)
+    {
+        const UTXOEntry &entry = entries[position];
+        if (entry.prev != NONE)
+            entries[entry.prev].next = entry.next;
+        else
+            recipient_heads[entry.recipient] = entry.next;
+        if (entry.next != NONE)
+            entries[entry.next].prev = entry.prev;
+    }
+
+    void insert(const Outpoint &outpoint, const std::string &recipient, int64_t amount, const std::string &script)
+    {
+        uint32_t recipient_id = recipients.intern(recipient);
+        uint16_t script_id = static_cast<uint16_t>(scripts.intern(script));
+        if (auto existing = find(outpoint))
         {
-            utxos[tx_id] = std::vector<py::object>();
+            unlink(*existing);
+            UTXOEntry &entry = entries[*existing];
+            entry.recipient = recipient_id;
+            entry.amount = amount;
+            entry.script = script_id;
+            link(*existing);
+            return;
         }
+        if (entries.size() >= NONE - 1)
+            throw py::value_error("UTXO set is full");
+        grow();
+        uint32_t position = static_cast<uint32_t>(entries.size());
+        entries.push_back(UTXOEntry{outpoint, amount, recipient_id, NONE, NONE, script_id});
+        slots[probe(outpoint)] = position;
+        link(position);
+    }
+
+    bool remove(const Outpoint &outpoint)
+    {
+        if (entries.empty())
+            return false;
+        size_t slot = probe(outpoint);
+        uint32_t position = slots[slot];
+        if (position == NONE)
+            return false;
+        erase_slot(slot);
+        unlink(position);
 
-        // Resize vector if needed
-        if (utxos[tx_id].size() <= output_index)
+        // Keep entries dense: the last entry fills the gap
+        uint32_t last = static_cast<uint32_t>(entries.size() - 1);
+        if (position != last)
         {
-            utxos[tx_id].resize(output_index + 1, py::none());
+            slots[probe(entries[last].outpoint)] = position;
+            entries[position] = entries[last];
+            UTXOEntry &moved = entries[position];
+            if (moved.prev != NONE)
+                entries[moved.prev].next = position;
+            else
+                recipient_heads[moved.recipient] = position;
+            if (moved.next != NONE)
+                entries[moved.next].prev = position;
         }
+        entries.pop_back();
+        shrink();
+        return true;
+    }
 
-        utxos[tx_id][output_index] = output;
+    static py::object output_class()
+    {
+        return py::module::import("utils").attr("TransactionOutput");
+    }
+
+    // Build a Python TransactionOutput for an entry, only when one is asked for
+    py::object make_output(const py::object &output_class, const UTXOEntry &entry) const
+    {
+        return output_class(recipients.name(entry.recipient), units_to_amount(entry.amount),
+                            scripts.name(entry.script));
+    }
+
+    std::string serialize_entry(const UTXOEntry &entry) const
+    {
+        return recipients.name(entry.recipient) + "|" + format_units(entry.amount) + "|" + scripts.name(entry.script);
+    }
+
+    // Parse "recipient|amount|script" and store it; false if the text is malformed
+    bool insert_serialized(const Outpoint &outpoint, const std::string &serialized_output)
+    {
+        size_t first = serialized_output.find('|');
+        size_t second = first == std::string::npos ? first : serialized_output.find('|', first + 1);
+        if (second == std::string::npos)
+            return false;
+        auto amount = parse_units(serialized_output.substr(first + 1, second - first - 1));
+        if (!amount)
+            return false;
+        insert(outpoint, serialized_output.substr(0, first), *amount, serialized_output.substr(second + 1));
         return true;
     }
 
-    py::object get_utxo(const std::string &tx_id, size_t output_index)
+    py::tuple serialized_tuple(const UTXOEntry &entry) const
     {
-        if (utxos.find(tx_id) == utxos.end() || utxos[tx_id].size() <= output_index)
+        return py::make_tuple(entry.outpoint.tx_id_hex(), entry.outpoint.index, serialize_entry(entry));
+    }
+
+public:
+    UTXOSetCpp() {}
+
+    bool add_utxo(const std::string &tx_id, size_t output_index, py::object output)
+    {
+        Outpoint outpoint = Outpoint::parse(tx_id, output_index);
+        if (output.is_none())
         {
-            return py::none();
+            remove(outpoint);
+            return true;
         }
-        return utxos[tx_id][output_index];
+        py::object script = py::getattr(output, "script", py::str("P2PKH"));
+        insert(outpoint, py::cast<std::string>(output.attr("recipient")),
+               amount_to_units(py::cast<double>(output.attr("amount"))), py::cast<std::string>(script));
+        return true;
     }
 
-    bool spend_utxo(const std::string &tx_id, size_t output_index)
+    py::object get_utxo(const std::string &tx_id, size_t output_index)
     {
-        if (utxos.find(tx_id) == utxos.end() || utxos[tx_id].size() <= output_index)
+        auto position = find(Outpoint::parse(tx_id, output_index));
+        if (!position)
         {
-            return false;
+            return py::none();
         }
+        return make_output(output_class(), entries[*position]);
+    }
 
-        utxos[tx_id][output_index] = py::none();
-        return true;
+    bool spend_utxo(const std::string &tx_id, size_t output_index)
+    {
+        return remove(Outpoint::parse(tx_id, output_index));
     }
 
     bool is_nonce_used(const std::string &address, uint64_t nonce)
@@ -151,66 +455,67 @@ public:
 
     size_t utxo_count() const
     {
-        size_t count = 0;
-        for (const auto &entry : utxos)
-        {
-            for (const auto &output : entry.second)
-            {
-                if (!output.is_none())
-                {
-                    count++;
-                }
-            }
-        }
-        return count;
+        return entries.size();
     }
 
     py::list get_utxos_for_address(const std::string &address)
     {
         py::list result;
-        for (const auto &entry : utxos)
+        auto recipient = recipients.find(address);
+        if (!recipient || *recipient >= recipient_heads.size())
+            return result;
+        py::object transaction_output = output_class();
+        for (uint32_t position = recipient_heads[*recipient]; position != NONE; position = entries[position].next)
         {
-            for (size_t i = 0; i < entry.second.size(); i++)
-            {
-                if (!entry.second[i].is_none())
-                {
-                    py::object output = entry.second[i];
-                    py::object recipient = output.attr("recipient");
-
-                    if (py::cast<std::string>(recipient) == address)
-                    {
-                        result.append(py::make_tuple(entry.first, i, output));
-                    }
-                }
-            }
+            const UTXOEntry &entry = entries[position];
+            result.append(py::make_tuple(entry.outpoint.tx_id_hex(), entry.outpoint.index, make_output(transaction_output, entry)));
         }
         return result;
     }
 
+    // Sum of an address's unspent outputs, without building any outputs
+    double get_balance(const std::string &address) const
+    {
+        auto recipient = recipients.find(address);
+        if (!recipient || *recipient >= recipient_heads.size())
+            return 0.0;
+        int64_t units = 0;
+        for (uint32_t position = recipient_heads[*recipient]; position != NONE; position = entries[position].next)
+        {
+            units += entries[position].amount;
+        }
+        return units_to_amount(units);
+    }
+
+    // Bytes held by the UTXO storage (entries, index, interned strings); nonces are not included
+    py::dict memory_usage() const
+    {
+        size_t entry_bytes = entries.capacity() * sizeof(UTXOEntry);
+        size_t index_bytes = slots.capacity() * sizeof(uint32_t) + recipient_heads.capacity() * sizeof(uint32_t);
+        size_t string_bytes = recipients.memory_bytes() + scripts.memory_bytes();
+        size_t total = sizeof(UTXOSetCpp) + entry_bytes + index_bytes + string_bytes;
+        py::dict usage;
+        usage["utxos"] = entries.size();
+        usage["recipients"] = recipients.size();
+        usage["entry_bytes"] = entry_bytes;
+        usage["index_bytes"] = index_bytes;
+        usage["string_bytes"] = string_bytes;
+        usage["total_bytes"] = total;
+        usage["bytes_per_utxo"] = entries.empty() ? 0.0 : static_cast<double>(total) / entries.size();
+        return usage;
+    }
+
     // New methods for serialization and deserialization
 
     // Serialize the entire UTXO set for database storage
     py::list serialize_utxo_set()
     {
         py::list serialized_utxos;
-
-        for (const auto &[tx_id, outputs] : utxos)
+        for (const auto &entry : entries)
         {
-            for (size_t i = 0; i < outputs.size(); i++)
-            {
-                if (!outputs[i].is_none())
-                {
-                    // Serialize the output
-                    std::string serialized_output = serialize_output(outputs[i]);
-                    if (!serialized_output.empty())
-                    {
-                        // Create a tuple for database storage
-                        serialized_utxos.append(py::make_tuple(tx_id, i, serialized_output));
-                    }
-                }
-            }
+            // Create a tuple for database storage
+            serialized_utxos.append(serialized_tuple(entry));
         }
-
         return serialized_utxos;
     }
 
@@ -218,9 +523,13 @@ public:
     void deserialize_utxo_set(py::list serialized_data)
     {
         // Clear existing data
-        utxos.clear();
+        entries.clear();
+        slots.clear();
+        recipient_heads.clear();
+        recipients.clear();
+        scripts.clear();
 
-        // Process each serialized UTXO entry
+        // Process each serialized UTXO entry, straight into native entries
         for (auto item : serialized_data)
         {
             try
@@ -229,18 +538,11 @@ public:
                 if (entry.size() != 3)
                     continue;
 
-                std::string tx_id = py::cast<std::string>(entry[0]);
-                size_t output_index = py::cast<size_t>(entry[1]);
-                std::string serialized_output = py::cast<std::string>(entry[2]);
-
-                // Deserialize the output
-                py::object output = create_output_from_serialized(serialized_output);
-                if (!output.is_none())
-                {
-                    add_utxo(tx_id, output_index, output);
-                }
+                Outpoint outpoint = Outpoint::parse(py::cast<std::string>(entry[0]), py::cast<size_t>(entry[1]));
+                if (!insert_serialized(outpoint, py::cast<std::string>(entry[2])))
+                    py::print("Error deserializing UTXO: malformed output", entry[2]);
             }
-            catch (const py::error_already_set &e)
+            catch (const std::exception &e)
             {
                 py::print("Error deserializing UTXO:", e.what());
                 continue;
@@ -309,7 +611,7 @@ public:
 
                 add_utxo(tx_id, output_index, output);
             }
-            catch (const py::error_already_set &e)
+            catch (const std::exception &e)
             {
                 py::print("Error in batch_add_utxos:", e.what());
                 continue;
@@ -345,38 +647,21 @@ public:
     py::list get_serialized_utxo_batch(size_t offset, size_t limit)
     {
         py::list batch;
-        size_t current = 0;
-        size_t count = 0;
-
-        for (const auto &[tx_id, outputs] : utxos)
+        for (size_t position = offset; position < entries.size() && position - offset < limit; position++)
         {
-            for (size_t i = 0; i < outputs.size(); i++)
-            {
-                if (!outputs[i].is_none())
-                {
-                    if (current >= offset)
-                    {
-                        std::string serialized_output = serialize_output(outputs[i]);
-                        batch.append(py::make_tuple(tx_id, i, serialized_output));
-                        count++;
-
-                        if (count >= limit)
-                        {
-                            return batch;
-                        }
-                    }
-                    current++;
-                }
-            }
+            batch.append(serialized_tuple(entries[position]));
         }
-
         return batch;
     }
 
     // Clear all data
     void clear()
     {
-        utxos.clear();
+        entries.clear();
+        slots.clear();
+        recipient_heads.clear();
+        recipients.clear();
+        scripts.clear();
         used_nonces.clear();
     }
 };
@@ -384,6 +669,7 @@ public:
 PYBIND11_MODULE(utxo_cpp, m)
 {
     m.doc() = "C++ implementation of UTXO set with persistence support";
+    m.attr("UNITS_PER_COIN") = UNITS_PER_COIN;
 
     py::class_<UTXOSetCpp>(m, "UTXOSetCpp")
         .def(py::init<>())
@@ -393,7 +679,10 @@ PYBIND11_MODULE(utxo_cpp, m)
         .def("is_nonce_used", &UTXOSetCpp::is_nonce_used)
         .def("add_nonce", &UTXOSetCpp::add_nonce)
         .def("utxo_count", &UTXOSetCpp::utxo_count)
+        .def("__len__", &UTXOSetCpp::utxo_count)
         .def("get_utxos_for_address", &UTXOSetCpp::get_utxos_for_address)
+        .def("get_balance", &UTXOSetCpp::get_balance, "Sum of an address's unspent outputs")
+        .def("memory_usage", &UTXOSetCpp::memory_usage, "Bytes used by UTXO storage, in total and per UTXO")
         // New persistence methods
         .def("serialize_utxo_set", &UTXOSetCpp::serialize_utxo_set)
         .def("deserialize_utxo_set", &UTXOSetCpp::deserialize_utxo_set)
@@ -403,4 +692,4 @@ PYBIND11_MODULE(utxo_cpp, m)
         .def("batch_add_nonces", &UTXOSetCpp::batch_add_nonces)
         .def("get_serialized_utxo_batch", &UTXOSetCpp::get_serialized_utxo_batch)
         .def("clear", &UTXOSetCpp::clear);
-}
\ No newline at end of file
+}
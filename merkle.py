@@ -0,0 +1,113 @@
+"""
+Binary-digest Merkle trees with inclusion proofs.
+
+Leaves are 32-byte transaction IDs. A leaf is hashed as
+SHA-256(0x00 || id) and an inner node as SHA-256(0x01 || left || right),
+so a leaf can never be passed off as an inner node. An odd node at the end
+of a level is promoted unchanged rather than paired with itself, so two
+different transaction lists cannot share a root. The root of an empty tree
+is 32 zero bytes.
+
+Every level is kept, so appending a transaction rehashes one path
+(O(log n)) and proofs are read straight from the levels. blockchain_cpp
+implements the same algorithm; MerkleTree is the C++ class when the
+extension is built and PythonMerkleTree otherwise, with identical results.
+
+calculate_merkle_root remains the older hex-text algorithm that existing
+block headers commit to; legacy_merkle_root is its Python equivalent.
+"""
+
+import hashlib
+from typing import Iterable, List, Sequence, Tuple
+
+from utils import blockchain_cpp, legacy_merkle_root
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+EMPTY_ROOT = bytes(32)
+
+# One step per level: (sibling is on the right, sibling digest)
+Proof = List[Tuple[bool, bytes]]
+
+
+def leaf_hash(leaf: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + leaf).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _check_leaf(leaf: bytes) -> bytes:
+    if len(leaf) != 32:
+        raise ValueError(f"Merkle leaves must be 32-byte digests, got {len(leaf)} bytes")
+    return bytes(leaf)
+
+
+class PythonMerkleTree:
+    """Merkle tree over 32-byte leaves that keeps every level"""
+
+    def __init__(self, leaves: Iterable[bytes] = ()):
+        self.levels: List[List[bytes]] = [[]]
+        self.extend(leaves)
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def append(self, leaf: bytes) -> None:
+        """Add a leaf, rehashing only the path from it to the root"""
+        self.extend([leaf])
+
+    def extend(self, leaves: Iterable[bytes]) -> None:
+        """Add many leaves, hashing each inner node they change once"""
+        first = len(self.levels[0])
+        self.levels[0].extend(leaf_hash(_check_leaf(leaf)) for leaf in leaves)
+        depth = 0
+        while len(self.levels[depth]) > 1:
+            level = self.levels[depth]
+            if depth + 1 == len(self.levels):
+                self.levels.append([])
+            above = self.levels[depth + 1]
+            del above[first // 2:]
+            above.extend(
+                node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                for i in range(first // 2 * 2, len(level), 2)
+            )
+            first, depth = first // 2, depth + 1
+
+    def root(self) -> bytes:
+        return self.levels[-1][0] if self.levels[0] else EMPTY_ROOT
+
+    def proof(self, index: int) -> Proof:
+        """Sibling digests from leaf ``index`` up to the root"""
+        if not 0 <= index < len(self):
+            raise IndexError("leaf index out of range")
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append((sibling > index, level[sibling]))
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf: bytes, proof: Sequence[Tuple[bool, bytes]], root: bytes) -> bool:
+    """Check that ``leaf`` is in the tree with ``root``"""
+    digest = leaf_hash(_check_leaf(leaf))
+    for sibling_on_right, sibling in proof:
+        digest = node_hash(digest, sibling) if sibling_on_right else node_hash(sibling, digest)
+    return digest == root
+
+
+def merkle_root(tx_ids: Iterable[str]) -> str:
+    """Hex root of the binary tree over hex transaction IDs"""
+    return MerkleTree([bytes.fromhex(tx_id) for tx_id in tx_ids]).root().hex()
+
+
+def _tree_class():
+    tree_class = getattr(blockchain_cpp, "MerkleTree", None)
+    # import_cpp_extension's fallback answers every attribute with a stub function
+    return tree_class if isinstance(tree_class, type) else PythonMerkleTree
+
+
+MerkleTree = _tree_class()
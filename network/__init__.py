@@ -24,8 +24,18 @@ from network.p2p import (
     RateLimiter,
     NonceTracker,
     NodeIdentity,
-    CertificateManager
+    CertificateManager,
+    VerifyingKeyCache,
+    SignatureVerifier,
+    InventoryTracker
 )
 
+from network.sync import HeadersFirstSync, ChainValidator, TipState
+from network.broadcast import BroadcastScheduler
+from network.transport import P2PTransport
+from network.peers import PeerTable
+from network.address_book import AddressBook
+from network.scoring import PeerScorer
+
 # Make version info available
 __version__ = '1.0.0'
\ No newline at end of file
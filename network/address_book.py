@@ -0,0 +1,176 @@
+"""
+Persistent peer address book.
+
+Known peers are kept in SQLite with their last-seen time, latency,
+failure count and reputation score. Changes collect in memory and are
+written in one transaction every ``flush_interval`` seconds, so a busy
+node does not rewrite its peer list on every block or peer change. On
+restart the best-scored peers are available immediately, without going
+back to the bootstrap nodes.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("AddressBook")
+
+FIELDS = ("host", "port", "public_key", "last_seen", "latency", "failures", "score")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS peers (
+    peer_id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    public_key TEXT NOT NULL DEFAULT '',
+    last_seen REAL NOT NULL DEFAULT 0,
+    latency REAL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    score INTEGER NOT NULL DEFAULT 100
+)
+"""
+
+
+class AddressBook:
+    """Known peers, held in memory and written to SQLite in debounced batches"""
+
+    def __init__(self, path: str, flush_interval: float = 2.0, max_entries: int = 10000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.entries: Dict[str, dict] = {}
+        self._dirty = set()
+        self._removed = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+
+    def open(self) -> None:
+        """Open the database and load every stored peer"""
+        if self._db is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        rows = self._db.execute(f"SELECT peer_id, {', '.join(FIELDS)} FROM peers").fetchall()
+        for peer_id, *values in rows:
+            self.entries[peer_id] = dict(zip(FIELDS, values))
+        logger.info(f"Loaded {len(self.entries)} peers from {self.path}")
+
+    def import_legacy(self, path: str) -> int:
+        """Import a known_peers.txt file (host:port:public_key per line) once"""
+        if not os.path.exists(path):
+            return 0
+        imported = 0
+        with open(path) as f:
+            for line in f:
+                parts = line.strip().split(":")
+                if len(parts) < 3 or not parts[1].isdigit():
+                    continue
+                host, port, public_key = parts[0], int(parts[1]), ":".join(parts[2:])
+                # The legacy file had no peer IDs; it derived them from the port
+                peer_id = f"node{port}"
+                if peer_id not in self.entries:
+                    self.record(peer_id, host=host, port=port, public_key=public_key)
+                    imported += 1
+        os.replace(path, f"{path}.imported")
+        logger.info(f"Imported {imported} peers from {path}")
+        return imported
+
+    def record(self, peer_id: str, **fields) -> None:
+        """Update a peer's stored fields; written on the next flush"""
+        entry = self.entries.get(peer_id)
+        if entry is None:
+            if "host" not in fields or "port" not in fields:
+                return
+            entry = self.entries[peer_id] = {
+                "public_key": "", "last_seen": 0.0, "latency": None, "failures": 0, "score": 100}
+        entry.update((key, value) for key, value in fields.items() if key in FIELDS)
+        self._dirty.add(peer_id)
+        self._removed.discard(peer_id)
+        self._wakeup.set()
+
+    def record_failure(self, peer_id: str) -> None:
+        entry = self.entries.get(peer_id)
+        if entry is not None:
+            self.record(peer_id, failures=entry["failures"] + 1)
+
+    def forget(self, peer_id: str) -> None:
+        if self.entries.pop(peer_id, None) is not None:
+            self._dirty.discard(peer_id)
+            self._removed.add(peer_id)
+            self._wakeup.set()
+
+    @staticmethod
+    def rank(entry: dict) -> tuple:
+        """Sort key: higher score, fewer failures, lower latency, seen more recently"""
+        latency = entry["latency"] if entry["latency"] is not None else float("inf")
+        return (-entry["score"], entry["failures"], latency, -entry["last_seen"])
+
+    def best(self, count: int, exclude=()) -> List[tuple]:
+        """The ``count`` best-ranked peers as (peer_id, entry) pairs"""
+        candidates = [(peer_id, entry) for peer_id, entry in self.entries.items() if peer_id not in exclude]
+        candidates.sort(key=lambda item: self.rank(item[1]))
+        return [(peer_id, dict(entry)) for peer_id, entry in candidates[:count]]
+
+    def _trim(self) -> None:
+        excess = len(self.entries) - self.max_entries
+        if excess > 0:
+            worst = sorted(self.entries, key=lambda peer_id: self.rank(self.entries[peer_id]), reverse=True)
+            for peer_id in worst[:excess]:
+                self.forget(peer_id)
+
+    def _write(self, upserts: List[tuple], removals: List[tuple]) -> None:
+        with self._db_lock, self._db:
+            if upserts:
+                self._db.executemany(
+                    f"INSERT INTO peers (peer_id, {', '.join(FIELDS)}) VALUES ({', '.join('?' * (len(FIELDS) + 1))}) "
+                    f"ON CONFLICT(peer_id) DO UPDATE SET {', '.join(f'{f} = excluded.{f}' for f in FIELDS)}",
+                    upserts)
+            if removals:
+                self._db.executemany("DELETE FROM peers WHERE peer_id = ?", removals)
+
+    async def flush(self) -> int:
+        """Write pending changes in one transaction; returns how many peers were written"""
+        if self._db is None:
+            return 0
+        self._trim()
+        upserts = [(peer_id, *(self.entries[peer_id][f] for f in FIELDS))
+                   for peer_id in self._dirty if peer_id in self.entries]
+        removals = [(peer_id,) for peer_id in self._removed]
+        self._dirty.clear()
+        self._removed.clear()
+        if upserts or removals:
+            try:
+                await asyncio.to_thread(self._write, upserts, removals)
+            except Exception:
+                # Keep the changes for the next flush
+                self._dirty.update(row[0] for row in upserts)
+                self._removed.update(row[0] for row in removals)
+                raise
+        return len(upserts) + len(removals)
+
+    async def run(self) -> None:
+        """Flush changes at most once per ``flush_interval``"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write address book: {e}")
+            await asyncio.sleep(self.flush_interval)
+
+    async def close(self) -> None:
+        if self._db is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -2,16 +2,17 @@
 HTTP API endpoints for blockchain network communication.
 """
 
+import functools
 import logging
 import json
 import time
 from aiohttp import web
-from typing import Dict, List, Tuple
-import ecdsa
+from typing import Dict, List, Optional, Tuple
 
 from blockchain.blockchain import Block
 from blockchain.transaction import Transaction
 from utils import validate_peer_auth, SecurityUtils, BLOCKS_RECEIVED, TXS_BROADCAST
+from network.sync import block_header
 
 logger = logging.getLogger("NetworkAPI")
 
@@ -21,7 +22,9 @@ def setup_api_routes(network):
         web.get("/health", health_handler(network)),
         web.post('/receive_block', receive_block(network)),
         web.post('/receive_transaction', receive_transaction(network)),
+        *(web.post(path, signed_msgpack_handler(network, handle)) for path, handle in SIGNED_HANDLERS.items()),
         web.get('/get_chain', get_chain(network)),
+        web.get('/get_headers', get_headers(network)),
         web.post('/announce_peer', announce_peer(network)),
         web.get('/get_peers', get_peers(network)),
         web.post('/heartbeat', heartbeat_handler(network))
@@ -53,9 +56,9 @@ def receive_block(network):
                 data = await request.json()
                 
             block = Block.from_dict(data["block"])
-            if await network.blockchain.add_block(block):
+            relay = network.received_push(block.hash, data.get("ttl"))
+            if await network.accept_block(block, request.headers.get("Node-ID"), relay=relay):
                 logger.info(f"Received and added block {block.index} from {request.remote}")
-                network._save_peers()
                 return web.Response(status=200)
             return web.Response(status=400, text="Block validation failed")
         except Exception as e:
@@ -71,10 +74,23 @@ def receive_transaction(network):
         if not peer_id or not signature or peer_id not in network.peers:
             return web.Response(status=403, text="Invalid authentication")
         
-        data = await request.json()
-        message = json.dumps(data["transaction"]).encode()
-        vk = ecdsa.VerifyingKey.from_string(bytes.fromhex(network.peers[peer_id]["public_key"]), curve=ecdsa.SECP256k1)
-        if not vk.verify(bytes.fromhex(signature), message):
+        try:
+            raw_data = await request.read()
+            if request.headers.get("Content-Type", "") == "application/msgpack":
+                # send_with_retry signs the serialized msgpack body
+                from utils import deserialize
+                data = deserialize(raw_data)
+                message = raw_data
+            else:
+                data = json.loads(raw_data)
+                message = json.dumps(data["transaction"]).encode()
+            signature_bytes = bytes.fromhex(signature)
+        except Exception as e:
+            logger.error(f"Error decoding transaction from {peer_id}: {e}")
+            return web.Response(status=400, text=str(e))
+
+        # Verified in the worker pool so bursts don't block the event loop
+        if not await network.signature_verifier.verify(network.peers[peer_id]["public_key"], signature_bytes, message, peer_id):
             return web.Response(status=403, text="Invalid signature")
 
         tx = Transaction.from_dict(data["transaction"])
@@ -85,17 +101,271 @@ def receive_transaction(network):
         
         if await network.blockchain.add_transaction_to_mempool(tx):
             await network.nonce_tracker.add_nonce(address, tx.nonce, len(network.blockchain.chain))
+            network.inventory.remember("tx", tx.tx_id, data["transaction"])
+            if network.received_push(tx.tx_id, data.get("ttl")):
+                network.queue_broadcast("transaction", tx)
             logger.info(f"Received transaction {tx.tx_id[:8]} from {peer_id}")
             return web.Response(status=200)
         return web.Response(status=400, text="Transaction validation failed")
     return handler
 
+async def _read_signed_msgpack(network, request: web.Request) -> Tuple[Optional[web.Response], Optional[str], Optional[dict]]:
+    """Authenticate a msgpack request signed by a known peer.
+
+    Returns ``(error_response, peer_id, data)``; ``error_response`` is None
+    when the signature over the raw body is valid.
+    """
+    from utils import deserialize
+    peer_id = request.headers.get("Node-ID")
+    signature = request.headers.get("Signature")
+    if not peer_id or not signature or peer_id not in network.peers:
+        return web.Response(status=403, text="Invalid authentication"), None, None
+    if request.headers.get("Content-Type", "") != "application/msgpack":
+        return web.Response(status=415, text="Expected application/msgpack"), None, None
+    try:
+        raw_data = await request.read()
+        signature_bytes = bytes.fromhex(signature)
+    except Exception as e:
+        logger.error(f"Error reading request from {peer_id}: {e}")
+        return web.Response(status=400, text=str(e)), None, None
+
+    if not await network.signature_verifier.verify(network.peers[peer_id]["public_key"], signature_bytes, raw_data, peer_id):
+        return web.Response(status=403, text="Invalid signature"), None, None
+    try:
+        return None, peer_id, deserialize(raw_data)
+    except Exception as e:
+        logger.error(f"Error decoding request from {peer_id}: {e}")
+        return web.Response(status=400, text=str(e)), None, None
+
+def signed_msgpack_handler(network, handle):
+    """Serve ``handle(network, peer_id, data) -> dict`` as a signed msgpack POST endpoint.
+
+    The same handlers serve requests arriving over the P2P transport, see
+    setup_transport_handlers.
+    """
+    from utils import serialize
+    async def handler(request: web.Request) -> web.Response:
+        error, peer_id, data = await _read_signed_msgpack(network, request)
+        if error is not None:
+            return error
+        if not isinstance(data, dict):
+            return web.Response(status=400, text="Expected a msgpack map")
+        result = await handle(network, peer_id, data)
+        return web.Response(status=200, body=serialize(result), content_type="application/msgpack")
+    return handler
+
+async def _handle_transaction_batch(network, peer_id: str, data: dict) -> dict:
+    """Accept ``{"transactions": [...]}``; the reply has one bit per transaction,
+    set if the transaction is in the mempool afterwards"""
+    from utils import pack_bitmap
+    tx_dicts = data.get("transactions")
+    if not isinstance(tx_dicts, list):
+        raise web.HTTPBadRequest(text="Missing transactions")
+    if len(tx_dicts) > network.config["tx_batch_max"]:
+        raise web.HTTPRequestEntityTooLarge(max_size=network.config["tx_batch_max"], actual_size=len(tx_dicts),
+                                            text="Transaction batch too large")
+    # Every transaction in a batch shares its TTL
+    relay = [network.received_push(tx.get("tx_id"), data.get("ttl")) for tx in tx_dicts if isinstance(tx, dict)]
+    accepted = await network.accept_transactions(tx_dicts, peer_id, relay=any(relay))
+    logger.info(f"Received {sum(accepted)}/{len(tx_dicts)} transactions in a batch from {peer_id}")
+    return {"count": len(tx_dicts), "accepted": pack_bitmap(accepted)}
+
+async def _handle_inventory(network, peer_id: str, data: dict) -> dict:
+    """Record ``{"inv": [[kind, hash], ...]}`` (``[kind, hash, ttl]`` when
+    gossiping); items we lack are fetched with /getdata in the background"""
+    inv = data.get("inv")
+    if not isinstance(inv, list) or len(inv) > network.config["inventory_max_items"]:
+        raise web.HTTPBadRequest(text="Invalid inventory")
+    requested = network.handle_inventory(
+        peer_id, [tuple(item) for item in inv if isinstance(item, list) and len(item) in (2, 3)])
+    return {"requested": requested}
+
+async def _handle_getdata(network, peer_id: str, data: dict) -> dict:
+    """Serve recently relayed blocks and transactions by hash"""
+    items = data.get("getdata")
+    if not isinstance(items, list) or len(items) > network.config["inventory_max_items"]:
+        raise web.HTTPBadRequest(text="Invalid getdata request")
+    # Each item is a [kind, hash] pair
+    if not all(isinstance(item, (list, tuple)) and len(item) == 2 and isinstance(item[1], str) for item in items):
+        raise web.HTTPBadRequest(text="Invalid getdata item")
+    response = {"blocks": [], "transactions": []}
+    for _, item_hash in items:
+        found = network.inventory.lookup(item_hash)
+        if found is None:
+            continue
+        kind, payload = found
+        response["blocks" if kind == "block" else "transactions"].append(payload)
+    network.inventory.mark_known(peer_id, [item_hash for _, item_hash in items])
+    return response
+
+async def _handle_compact_block(network, peer_id: str, data: dict) -> dict:
+    """Rebuild ``{"compact_block": {header, salt, short_ids, prefilled}}``"""
+    try:
+        status = await network.handle_compact_block(peer_id, data["compact_block"], data.get("ttl"))
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Malformed compact block from {peer_id}: {e}")
+        raise web.HTTPBadRequest(text="Malformed compact block")
+    return {"status": status}
+
+async def _handle_block_transactions(network, peer_id: str, data: dict) -> dict:
+    """Serve the transactions of a recently relayed block by position"""
+    from network.compact import block_transactions
+    found = network.inventory.lookup(data.get("hash"))
+    if found is None or found[0] != "block":
+        raise web.HTTPNotFound(text="Block not available")
+    indexes, transactions = block_transactions(found[1], data.get("indexes") or [])
+    return {"indexes": indexes, "transactions": transactions}
+
+async def _handle_block(network, peer_id: str, data: dict) -> dict:
+    """Accept a full ``{"block": ...}`` pushed over the transport"""
+    block = Block.from_dict(data["block"])
+    if not await network.accept_block(block, peer_id, relay=network.received_push(block.hash, data.get("ttl"))):
+        raise web.HTTPBadRequest(text="Block validation failed")
+    return {}
+
+async def _handle_heartbeat(network, peer_id: str, data: dict) -> dict:
+    network.peers.update(peer_id, last_seen=time.time())
+    return {"timestamp": time.time()}
+
+# Signed msgpack endpoints: served over HTTPS and over the P2P transport
+SIGNED_HANDLERS = {
+    "/receive_transactions": _handle_transaction_batch,
+    "/inv": _handle_inventory,
+    "/getdata": _handle_getdata,
+    "/receive_compact_block": _handle_compact_block,
+    "/getblocktxn": _handle_block_transactions,
+}
+
+# Requests that only the transport routes to the shared handlers; their HTTP
+# endpoints keep the bearer-token authentication
+TRANSPORT_HANDLERS = dict(SIGNED_HANDLERS, **{
+    "/receive_block": _handle_block,
+    "/heartbeat": _handle_heartbeat,
+})
+
+def setup_transport_handlers(network):
+    """Route P2P transport requests to the API handlers."""
+    network.transport.handlers.update({
+        path: functools.partial(handle, network) for path, handle in TRANSPORT_HANDLERS.items()
+    })
+
+def _negotiate_chain_encoding(request: web.Request, allowed: List[str]) -> str:
+    """Pick the first configured content coding the client accepts"""
+    from utils import zstd_available
+    accepted = {
+        coding.split(";")[0].strip().lower()
+        for coding in request.headers.get("Accept-Encoding", "").split(",")
+    }
+    for coding in allowed:
+        if coding in accepted and (coding != "zstd" or zstd_available()):
+            return coding
+    return "identity"
+
 def get_chain(network):
-    """Return chain incrementally"""
+    """Return chain incrementally in bounded, streamed pages.
+
+    ``cursor`` is the first block index to return (``since`` is still accepted
+    as the last index the caller already has) and ``limit`` caps the page
+    size. Clients sending ``Accept: application/msgpack`` get a msgpack map
+    ``{"blocks": [...], "next_cursor": n, "tip_height": h}``; others get the
+    legacy JSON list of blocks. Pages also stop at ``chain_max_response_bytes``
+    and the continuation index is sent in the ``X-Next-Cursor`` header.
+    """
+    async def handler(request: web.Request) -> web.StreamResponse:
+        from utils import serialize, zstandard
+        config = network.config
+        chain = network.blockchain.chain
+        try:
+            if "cursor" in request.query:
+                start = int(request.query["cursor"])
+            else:
+                start = int(request.query.get("since", -1)) + 1
+            limit = int(request.query.get("limit", config["chain_page_size"]))
+        except ValueError:
+            return web.Response(status=400, text="Invalid cursor or limit")
+        start = max(0, start)
+        limit = max(1, min(limit, config["chain_max_page_size"]))
+        use_msgpack = "application/msgpack" in request.headers.get("Accept", "")
+        encode = serialize if use_msgpack else (lambda data: json.dumps(data).encode())
+
+        # Encode block by block so only one capped page is ever held in memory
+        chunks = []
+        total_bytes = 0
+        for block in chain[start:start + limit]:
+            chunk = encode(block.to_dict())
+            if chunks and total_bytes + len(chunk) > config["chain_max_response_bytes"]:
+                break
+            chunks.append(chunk)
+            total_bytes += len(chunk)
+        next_index = start + len(chunks)
+        next_cursor = next_index if next_index < len(chain) else None
+
+        response = web.StreamResponse()
+        response.content_type = "application/msgpack" if use_msgpack else "application/json"
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = str(next_cursor)
+        coding = _negotiate_chain_encoding(request, config["chain_compression"])
+        compressor = None
+        if coding == "zstd":
+            compressor = zstandard.ZstdCompressor().compressobj()
+            response.headers["Content-Encoding"] = "zstd"
+        elif coding in ("gzip", "deflate"):
+            response.enable_compression(web.ContentCoding(coding))
+        await response.prepare(request)
+
+        async def write(data: bytes) -> None:
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                await response.write(data)
+
+        if use_msgpack:
+            import msgpack
+            packer = msgpack.Packer(use_bin_type=True)
+            await write(packer.pack_map_header(3) + packer.pack("blocks") + packer.pack_array_header(len(chunks)))
+            for chunk in chunks:
+                await write(chunk)
+            await write(packer.pack("next_cursor") + packer.pack(next_cursor) +
+                        packer.pack("tip_height") + packer.pack(len(chain) - 1))
+        else:
+            await write(b"[")
+            for i, chunk in enumerate(chunks):
+                await write(chunk if i == 0 else b"," + chunk)
+            await write(b"]")
+
+        if compressor is not None:
+            await response.write(compressor.flush())
+        await response.write_eof()
+        return response
+    return handler
+
+def get_headers(network):
+    """Return block headers (no transactions) for headers-first sync.
+
+    Paginated like get_chain with ``cursor``/``limit``; the msgpack body is
+    ``{"headers": [...], "next_cursor": n, "tip_height": h}``.
+    """
     async def handler(request: web.Request) -> web.Response:
-        since = int(request.query.get("since", -1))
-        chain_data = [block.to_dict() for block in network.blockchain.chain[since + 1:]]
-        return web.json_response(chain_data)
+        from utils import serialize
+        chain = network.blockchain.chain
+        try:
+            start = max(0, int(request.query.get("cursor", 0)))
+            limit = int(request.query.get("limit", network.config["header_page_size"]))
+        except ValueError:
+            return web.Response(status=400, text="Invalid cursor or limit")
+        limit = max(1, min(limit, network.config["header_page_size"]))
+        headers = [block_header(block) for block in chain[start:start + limit]]
+        next_index = start + len(headers)
+        response = web.Response(
+            body=serialize({
+                "headers": headers,
+                "next_cursor": next_index if next_index < len(chain) else None,
+                "tip_height": len(chain) - 1
+            }),
+            content_type="application/msgpack"
+        )
+        response.enable_compression()
+        return response
     return handler
 
 def announce_peer(network):
@@ -113,14 +383,14 @@ def announce_peer(network):
             message = f"{peer_id}{host}{port}".encode()
 
             if public_key and signature:
-                vk = ecdsa.VerifyingKey.from_string(bytes.fromhex(public_key), curve=ecdsa.SECP256k1)
-                if not vk.verify(signature, message):
+                if not await network.signature_verifier.verify(public_key, signature, message, peer_id):
                     logger.warning(f"Peer {peer_id} failed signature verification")
                     return web.Response(status=403, text="Invalid signature")
 
             await network.add_peer(peer_id, host, port, public_key)
-            network._save_peers()
             logger.info(f"Authenticated and added peer {peer_id} from {request.remote}")
+            if public_key and signature:
+                network.spawn_relay(network.relay_peer_announcement(data, request.headers.get("Node-ID")))
             return web.Response(status=200)
         except Exception as e:
             logger.error(f"Error in peer announcement: {e}")
@@ -150,8 +420,7 @@ def heartbeat_handler(network):
             return web.Response(status=403, text="Invalid authentication")
         data = await request.json()
         peer_id = data.get("node_id")
-        if peer_id in network.peers:
-            network.peers[peer_id]["last_seen"] = time.time()
+        if network.peers.update(peer_id, last_seen=time.time()):
             logger.debug(f"Received heartbeat from {peer_id}")
         return web.Response(status=200)
     return handler
\ No newline at end of file
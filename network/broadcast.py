@@ -0,0 +1,96 @@
+"""
+Priority-aware broadcast scheduling for the blockchain network.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict
+
+from utils import BROADCAST_QUEUE_DEPTH, BROADCAST_LATENCY
+
+logger = logging.getLogger("BroadcastScheduler")
+
+# Lanes in priority order: a queued block is always dispatched before any transaction
+LANES = ("block", "transaction", "announcement")
+
+
+class BroadcastScheduler:
+    """Dispatches queued broadcasts by lane priority without artificial delays.
+
+    Blocks go out before transactions, and transactions before peer
+    announcements. Queued transactions are coalesced into one batch per
+    dispatch, and repeated announcements collapse into one. Concurrency is
+    bounded overall by ``max_inflight`` and per peer by BlockchainNetwork.broadcast.
+    """
+
+    def __init__(self, network, max_queue_size: int = 1000, tx_batch_size: int = 100, max_inflight: int = 32):
+        self.network = network
+        self.max_queue_size = max_queue_size
+        self.tx_batch_size = tx_batch_size
+        self.lanes: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self._wakeup = asyncio.Event()
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._tasks = set()
+
+    def submit(self, lane: str, item: Any = None) -> bool:
+        """Queue an item on a lane; returns False if the lane is full"""
+        queue = self.lanes[lane]
+        if lane == "announcement" and queue:
+            return True  # One pending announcement already covers this one
+        if len(queue) >= self.max_queue_size:
+            logger.warning(f"Broadcast lane '{lane}' is full, dropping message")
+            return False
+        queue.append((time.monotonic(), item))
+        BROADCAST_QUEUE_DEPTH.labels(instance=self.network.node_id, lane=lane).observe(len(queue))
+        self._wakeup.set()
+        return True
+
+    async def feed_from(self, queue: asyncio.Queue) -> None:
+        """Move legacy ``(msg_type, data)`` items from an asyncio.Queue into the lanes"""
+        while not self.network.shutdown_flag.is_set():
+            msg_type, data = await queue.get()
+            if msg_type in self.lanes:
+                self.submit(msg_type, data)
+            else:
+                logger.warning(f"Unknown broadcast message type: {msg_type}")
+            queue.task_done()
+
+    async def run(self) -> None:
+        """Dispatch queued broadcasts until the network shuts down"""
+        try:
+            while not self.network.shutdown_flag.is_set():
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while any(self.lanes.values()):
+                    await self._inflight.acquire()
+                    lane = next(lane for lane in LANES if self.lanes[lane])
+                    task = asyncio.create_task(self._dispatch(lane, self._take(lane)))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+
+    def _take(self, lane: str) -> list:
+        queue = self.lanes[lane]
+        count = self.tx_batch_size if lane == "transaction" else 1
+        return [queue.popleft() for _ in range(min(count, len(queue)))]
+
+    async def _dispatch(self, lane: str, entries: list) -> None:
+        try:
+            items = [item for _, item in entries]
+            if lane == "block":
+                await self.network.broadcast_block(items[0])
+            elif lane == "transaction":
+                await self.network.broadcast_transactions(items)
+            else:
+                await self.network.broadcast_peer_announcement()
+        except Exception as e:
+            logger.error(f"Error broadcasting {lane}: {e}")
+        finally:
+            self._inflight.release()
+            now = time.monotonic()
+            for enqueued, _ in entries:
+                BROADCAST_LATENCY.labels(instance=self.network.node_id, lane=lane).observe(now - enqueued)
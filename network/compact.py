@@ -0,0 +1,89 @@
+"""
+Compact block relay.
+
+A compact block carries the block header, a short ID for each transaction
+and, prefilled, only the transactions the receiver is unlikely to hold. The
+receiver rebuilds the block from its mempool and requests the transactions
+it is missing with /getblocktxn.
+"""
+
+import hashlib
+import os
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+SHORT_ID_BYTES = 6
+
+
+def short_id(tx_id: str, salt: bytes) -> bytes:
+    """Salted short transaction ID; the per-block salt makes collisions unpredictable"""
+    return hashlib.blake2b(tx_id.encode(), key=salt, digest_size=SHORT_ID_BYTES).digest()
+
+
+def build_compact_block(block_dict: dict, prefill: Callable[[int, dict], bool]) -> dict:
+    """Build the compact form of a block dict.
+
+    ``prefill(index, tx_dict)`` decides which transactions are sent in full.
+    """
+    salt = os.urandom(8)
+    header = {key: value for key, value in block_dict.items() if key != "transactions"}
+    short_ids = []
+    prefilled = []
+    for index, tx_dict in enumerate(block_dict.get("transactions", [])):
+        if prefill(index, tx_dict):
+            prefilled.append([index, tx_dict])
+        else:
+            short_ids.append(short_id(tx_dict["tx_id"], salt))
+    return {"header": header, "salt": salt, "short_ids": short_ids, "prefilled": prefilled}
+
+
+class CompactBlockReconstruction:
+    """A block being rebuilt from a compact block and local transactions"""
+
+    def __init__(self, compact: dict):
+        self.header = compact["header"]
+        self.salt = compact["salt"]
+        prefilled = {index: tx_dict for index, tx_dict in compact["prefilled"]}
+        total = len(compact["short_ids"]) + len(prefilled)
+        if any(not isinstance(index, int) or not 0 <= index < total for index in prefilled):
+            raise ValueError("Prefilled transaction index out of range")
+        self.transactions: List[Optional[dict]] = [None] * total
+        self._short_ids: Dict[int, bytes] = {}
+        short_ids = iter(compact["short_ids"])
+        for index in range(total):
+            if index in prefilled:
+                self.transactions[index] = prefilled[index]
+            else:
+                self._short_ids[index] = next(short_ids)
+
+    @property
+    def block_hash(self) -> str:
+        return self.header.get("hash")
+
+    def fill(self, lookup: Callable[[bytes], Optional[dict]]) -> List[int]:
+        """Fill transactions from ``lookup(short_id)``; returns the missing indexes"""
+        counts = Counter(self._short_ids.values())
+        for index, sid in self._short_ids.items():
+            # Transactions sharing a short ID within the block are fetched rather than guessed
+            if self.transactions[index] is None and counts[sid] == 1:
+                self.transactions[index] = lookup(sid)
+        return self.missing()
+
+    def missing(self) -> List[int]:
+        return [index for index, tx_dict in enumerate(self.transactions) if tx_dict is None]
+
+    def add_transactions(self, indexes: List[int], tx_dicts: List[dict]) -> None:
+        """Fill transactions returned by /getblocktxn for ``indexes``"""
+        for index, tx_dict in zip(indexes, tx_dicts):
+            if 0 <= index < len(self.transactions):
+                self.transactions[index] = tx_dict
+
+    def block_dict(self) -> dict:
+        return dict(self.header, transactions=list(self.transactions))
+
+
+def block_transactions(block_dict: dict, indexes: List[int]) -> Tuple[List[int], List[dict]]:
+    """Select the requested transactions of a block for a /getblocktxn response"""
+    transactions = block_dict.get("transactions", [])
+    valid = [index for index in indexes if isinstance(index, int) and 0 <= index < len(transactions)]
+    return valid, [transactions[index] for index in valid]
@@ -9,9 +9,8 @@ import logging
 import time
 import random
 import json
-import threading
 import ssl
-from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, TYPE_CHECKING
 from collections import defaultdict
 import ecdsa
 from pathlib import Path
@@ -22,9 +21,19 @@ from .p2p import (
     RateLimiter, 
     NonceTracker, 
     NodeIdentity, 
-    CertificateManager
+    CertificateManager,
+    VerifyingKeyCache,
+    SignatureVerifier,
+    InventoryTracker
 )
-from .api import setup_api_routes
+from .api import setup_api_routes, setup_transport_handlers
+from .sync import HeadersFirstSync, ChainValidator
+from .broadcast import BroadcastScheduler
+from .compact import build_compact_block, short_id, CompactBlockReconstruction
+from .transport import P2PTransport
+from .peers import PeerTable
+from .address_book import AddressBook
+from .scoring import PeerScorer
 
 from blockchain.blockchain import Blockchain
 from blockchain.core import Block
@@ -43,11 +52,24 @@ from utils import (
     BLOCK_HEIGHT, 
     PEER_COUNT, 
     ACTIVE_REQUESTS, 
+    CONNECTION_POOL_SIZE,
+    CONNECTION_REUSE_RATIO,
+    HANDSHAKE_LATENCY,
+    INVENTORY_ANNOUNCED,
+    INVENTORY_DUPLICATES,
+    COMPACT_BLOCKS,
+    COMPACT_BLOCK_MISSING_TXS,
+    SCHEDULER_JOB_SECONDS,
+    SCHEDULER_JOB_RUNS,
+    SCHEDULER_JOB_INTERVAL,
     safe_gauge, 
     safe_counter,
-    find_available_port_async
+    find_available_port_async,
+    zstd_available,
+    decode_zstd_body
 )
 from security import SecurityMonitor
+from security.rate_limiter import GCRALimiter
 from security.mfa import MFAManager
 from aiohttp import web
 
@@ -73,7 +95,79 @@ def get_default_config() -> dict:
             "cert_validity_days": 365,
             "ca_validity_days": 3650
         },
-        "bootstrap_nodes": []
+        "bootstrap_nodes": [],
+        "chain_page_size": 500,                    # Blocks per /get_chain page by default
+        "chain_max_page_size": 2000,               # Largest page a peer may request
+        "chain_max_response_bytes": 4 * 1024 * 1024,
+        "chain_compression": ["zstd", "gzip"],     # Preference order for /get_chain responses
+        "sync_mode": "headers_first",              # "headers_first" or "legacy" (whole suffix per peer)
+        "header_page_size": 2000,                  # Headers per /get_headers page
+        "sync_max_headers": 20000,                 # Headers fetched per peer in one sync run
+        "sync_window_size": 128,                   # Blocks per body download window
+        "sync_parallel_per_peer": 2,               # Concurrent windows fetched from one peer
+        "broadcast_queue_size": 1000,              # Messages held per broadcast lane
+        "broadcast_tx_batch_size": 100,            # Queued transactions coalesced per dispatch
+        "broadcast_max_inflight": 32,              # Broadcasts being fanned out at once
+        "broadcast_max_inflight_per_peer": 4,      # Concurrent sends to a single peer
+        "tx_batch_max": 500,                       # Transactions per /receive_transactions frame
+        "relay_mode": "inventory",                 # "inventory" announces hashes, "push" sends full bodies
+        "inventory_max_items": 1000,               # Hashes per /inv or /getdata message
+        "inventory_known_size": 5000,              # Hashes remembered as known per peer
+        "inventory_cache_size": 2000,              # Relayed items kept to answer /getdata
+        "compact_blocks": True,                    # Relay new blocks as compact blocks
+        "gossip": {
+            "enabled": False,          # Relay to a fanout-sized subset of peers instead of all of them
+            "fanout": 8,               # Peers each block, transaction or announcement is relayed to
+            "ttl": 8,                  # Hops an item travels from its origin before relay stops
+            "seen_cache_size": 50000   # Hashes remembered so each item is relayed at most once
+        },
+        "nonce_retention_blocks": 10000,           # Blocks a used nonce is remembered for
+        "nonce_snapshot_file": "nonce_snapshot.json",  # Nonce tracker state under data_dir, kept across restarts
+        "connection_pool": {
+            "limit": 100,              # Total pooled connections across all peers
+            "limit_per_host": 4,       # Keep-alive connections held per peer
+            "keepalive_timeout": 60,   # Seconds an idle connection stays in the pool
+            "dns_cache_ttl": 300
+        },
+        "signature_verification": {
+            "key_cache_size": 1024,    # Parsed peer verifying keys kept in the LRU cache
+            "max_batch": 64,           # Signatures verified per worker job
+            "max_delay": 0.005,        # Seconds to wait for a burst to fill a batch
+            "workers": 2,
+            "use_processes": False     # Process pool instead of threads (true parallelism)
+        },
+        "http_rate_limit": {
+            "rate": 100,            # Requests per period per client address
+            "period": 1.0,
+            "burst": 500,
+            "max_clients": 100000   # Addresses tracked before the least recently seen is dropped
+        },
+        "transport": {
+            "enabled": True,                   # Persistent binary connections on the P2P port
+            "window_size": 8 * 1024 * 1024,    # Request bytes a peer may have outstanding
+            "max_frame_size": 4 * 1024 * 1024,
+            "request_timeout": 30,
+            "connect_timeout": 5,
+            "retry_interval": 60               # Seconds before redialing a peer that failed
+        },
+        "scheduler": {
+            "jitter": 0.2,             # Fraction each interval is randomly stretched or shrunk
+            "sync_min_interval": 2,    # Seconds between syncs while we are behind
+            "sync_max_interval": 60,   # Slowest sync interval once we are at the tip
+            "sync_timeout": 120,       # A sync round longer than this is cancelled
+            "announce_interval": 300,  # Seconds between announcements of this node
+            "maintenance_interval": 60 # Seconds between rate-limiter and security cleanups
+        },
+        "peer_scoring": {
+            "policy": "balanced",      # "balanced", "latency" or "throughput"
+            "ewma_alpha": 0.2          # Weight of the newest RTT/bandwidth/failure sample
+        },
+        "address_book": {
+            "file": "peers.db",        # SQLite file under data_dir
+            "flush_interval": 2.0,     # Seconds between batched writes
+            "max_entries": 10000,      # Known peers kept, worst-ranked dropped first
+            "restore_peers": 8         # Best known peers reconnected on start
+        }
     }
 
 def load_config(config_path: str = "network_config.json") -> dict:
@@ -150,14 +244,126 @@ def save_config(network_config: dict, config_path: str = "network_config.json")
         logger.error(f"Error saving configuration to {config_path}: {str(e)}")
         return False
 
-async def rate_limit_middleware(app: web.Application, handler: callable) -> callable:
-    """Simple rate-limiting middleware (placeholder for expansion)."""
-    async def middleware(request: web.Request) -> web.Response:
-        # Future: Add IP-based or token-based rate limiting
+def rate_limit_middleware(limiter: GCRALimiter):
+    """Per-client-address rate-limiting middleware; answers 429 with Retry-After."""
+    @web.middleware
+    async def middleware(request: web.Request, handler) -> web.StreamResponse:
+        key = request.remote or "unknown"
+        if not limiter.allow(key):
+            retry_after = max(1, int(limiter.retry_after(key) + 0.999))
+            return web.Response(status=429, text="Too many requests", headers={"Retry-After": str(retry_after)})
         return await handler(request)
     return middleware
 
 
+class PeriodicJob:
+    """A job run by PeriodicScheduler; ``interval`` is seconds or a callable returning them"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval, jitter: float,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.task: Optional[asyncio.Task] = None
+        self.next_run = 0.0
+        self.started = 0.0
+        self.runs = 0
+        self.skipped = 0
+
+    def current_interval(self) -> float:
+        return self.interval() if callable(self.interval) else self.interval
+
+
+class PeriodicScheduler:
+    """Runs periodic network jobs from a single timer loop.
+
+    Every delay is jittered so nodes started together drift apart instead of
+    hitting each other in lockstep. A tick that finds the job's previous run
+    still going is skipped. Callable intervals are re-read after each run,
+    so a job can shorten its own next delay.
+    """
+
+    def __init__(self, node_id: str, jitter: float = 0.2):
+        self.node_id = node_id
+        self.jitter = jitter
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._wakeup = asyncio.Event()
+
+    def add(self, name: str, func: Callable[[], Awaitable], interval, jitter: Optional[float] = None,
+            timeout: Optional[float] = None) -> PeriodicJob:
+        job = PeriodicJob(name, func, interval, self.jitter if jitter is None else jitter, timeout)
+        # Spread first runs too, so a cluster restarted at once does not sync in step
+        job.next_run = time.monotonic() + random.uniform(0, job.jitter * job.current_interval())
+        self.jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    def trigger(self, name: str) -> None:
+        """Run a job at the next opportunity instead of waiting for its interval"""
+        job = self.jobs.get(name)
+        if job is not None:
+            job.next_run = time.monotonic()
+            self._wakeup.set()
+
+    def _delay(self, job: PeriodicJob) -> float:
+        interval = job.current_interval()
+        SCHEDULER_JOB_INTERVAL.labels(instance=self.node_id, job=job.name).set(interval)
+        return interval * (1 + random.uniform(-job.jitter, job.jitter))
+
+    async def run(self) -> None:
+        while True:
+            now = time.monotonic()
+            for job in self.jobs.values():
+                if job.next_run > now:
+                    continue
+                if job.task is not None and not job.task.done():
+                    job.skipped += 1
+                    SCHEDULER_JOB_RUNS.labels(instance=self.node_id, job=job.name, status="skipped").inc()
+                    logger.debug(f"Skipping {job.name}: previous run still in progress")
+                else:
+                    job.started = now
+                    job.task = asyncio.create_task(self._run_job(job))
+                job.next_run = now + self._delay(job)
+            self._wakeup.clear()
+            timeout = max(min((job.next_run for job in self.jobs.values()), default=now + 60) - time.monotonic(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job: PeriodicJob) -> None:
+        status = "ok"
+        try:
+            if job.timeout is not None:
+                await asyncio.wait_for(job.func(), job.timeout)
+            else:
+                await job.func()
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.warning(f"Periodic job {job.name} timed out after {job.timeout}s")
+        except Exception as e:
+            status = "error"
+            logger.error(f"Periodic job {job.name} failed: {e}", exc_info=True)
+        finally:
+            job.runs += 1
+            SCHEDULER_JOB_SECONDS.labels(instance=self.node_id, job=job.name).observe(time.monotonic() - job.started)
+            SCHEDULER_JOB_RUNS.labels(instance=self.node_id, job=job.name, status=status).inc()
+        if callable(job.interval):
+            # The run may have changed the interval; only ever bring the next run forward here
+            next_run = job.started + self._delay(job)
+            if next_run < job.next_run:
+                job.next_run = next_run
+                self._wakeup.set()
+
+    async def stop(self) -> None:
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 class BlockchainNetwork:
     """Manages peer-to-peer networking for the blockchain with enhanced security and reliability."""
     def __init__(self, blockchain: 'Blockchain', node_id: str, host: str, port: int, 
@@ -166,6 +372,8 @@ class BlockchainNetwork:
         # Load configuration
         self._starting_server = False
         self._session = None
+        self._connector = None
+        self._pool_stats = {"created": 0, "reused": 0}
         self._initialized = False
         self._initializing = False
         self._server_started = False
@@ -193,30 +401,81 @@ class BlockchainNetwork:
         self.shutdown_flag = asyncio.Event()
         self.loop = None
         self.private_key, self.public_key = generate_node_keypair()
-        self.peers = {}
-        self.app = web.Application(middlewares=[rate_limit_middleware])
+        self._signing_key = None
+        self._signing_key_hex = None
+        self._peers = PeerTable()
+        book_config = self.config["address_book"]
+        self.address_book = AddressBook(
+            os.path.join(self.config["data_dir"], book_config["file"]),
+            flush_interval=book_config["flush_interval"],
+            max_entries=book_config["max_entries"]
+        )
+        self.nonce_snapshot_path = os.path.join(self.config["data_dir"], self.config["nonce_snapshot_file"])
+        rate_limit = self.config["http_rate_limit"]
+        self.http_limiter = GCRALimiter(
+            rate_limit["rate"], rate_limit["period"], burst=rate_limit["burst"], max_keys=rate_limit["max_clients"])
+        self.app = web.Application(middlewares=[rate_limit_middleware(self.http_limiter)])
         
         # Set up API routes
         setup_api_routes(self)
         
-        self.sync_task = None
         self.background_tasks = []
-        self.discovery_task = None
+        self.scheduler = PeriodicScheduler(self.node_id, jitter=self.config["scheduler"]["jitter"])
+        self._sync_interval = self.config["sync_interval"]
         self.last_announcement = time.time()
         self.peer_failures = defaultdict(int)
         self.start_time = time.time()
-        self.lock = threading.Lock() 
         self.active_requests = ACTIVE_REQUESTS
         self.active_requests.labels(instance=self.node_id).set(0)
         self.peer_reputation = PeerReputation()
+        self.peer_scorer = PeerScorer(
+            self.node_id, self.peer_reputation,
+            policy=self.config["peer_scoring"]["policy"],
+            alpha=self.config["peer_scoring"]["ewma_alpha"]
+        )
         self.rate_limiter = RateLimiter()
         self.nonce_tracker = NonceTracker()
+        verification_config = self.config["signature_verification"]
+        self.vk_cache = VerifyingKeyCache(verification_config["key_cache_size"])
+        self.signature_verifier = SignatureVerifier(
+            self.vk_cache,
+            max_batch=verification_config["max_batch"],
+            max_delay=verification_config["max_delay"],
+            workers=verification_config["workers"],
+            use_processes=verification_config["use_processes"]
+        )
+        self.inventory = InventoryTracker(
+            known_size=self.config["inventory_known_size"],
+            cache_size=self.config["inventory_cache_size"],
+            seen_size=self.config["gossip"]["seen_cache_size"]
+        )
+        self._inventory_tasks = set()
         self.mfa_manager = MFAManager()
+        transport_config = self.config["transport"]
+        self.transport = P2PTransport(
+            self,
+            window_size=transport_config["window_size"],
+            max_frame_size=transport_config["max_frame_size"],
+            request_timeout=transport_config["request_timeout"],
+            connect_timeout=transport_config["connect_timeout"],
+            retry_interval=transport_config["retry_interval"]
+        )
+        setup_transport_handlers(self)
         self.server = None  # Store server instance for cleanup
         self.health_server = None
         self.runner = web.AppRunner(self.app)  # Add runner for proper web app handling
 
-        self.message_queue = asyncio.Queue(maxsize=1000)  # Queue for broadcasts
+        self.chain_validator = ChainValidator(blockchain)
+        self.header_sync = HeadersFirstSync(self, self.chain_validator)
+
+        self.message_queue = asyncio.Queue(maxsize=1000)  # Legacy (msg_type, data) feed for the scheduler
+        self.broadcast_scheduler = BroadcastScheduler(
+            self,
+            max_queue_size=self.config["broadcast_queue_size"],
+            tx_batch_size=self.config["broadcast_tx_batch_size"],
+            max_inflight=self.config["broadcast_max_inflight"]
+        )
+        self._peer_slots = defaultdict(lambda: asyncio.Semaphore(self.config["broadcast_max_inflight_per_peer"]))
         self.broadcast_task = None
         
         # Initialize SSL contexts
@@ -321,39 +580,27 @@ class BlockchainNetwork:
                 logger.error(f"Failed to find available API port after {max_attempts} attempts")
                 return False
             
-            # Setup health check app
-            health_app = web.Application()
-            health_app.router.add_get('/health', lambda request: web.Response(text="OK"))
-            health_runner = web.AppRunner(health_app)
-            await health_runner.setup()
-            
-            # Try to start health check with port discovery
-            health_port_found = False
-            current_health_port = self.port
+            # The P2P transport listens with TLS on the P2P port and also answers GET /health
+            p2p_port_found = False
+            current_p2p_port = self.port
             
             for attempt in range(max_attempts):
                 try:
-                    # Try without SSL first for health check
-                    self.health_site = web.TCPSite(
-                        health_runner, 
-                        self.host, 
-                        current_health_port
-                    )
-                    await self.health_site.start()
-                    logger.info(f"Health check endpoint added on {self.host}:{current_health_port}/health")
-                    self.port = current_health_port  # Update the port if found
-                    health_port_found = True
+                    self.server = await self.transport.serve(self.host, current_p2p_port, self.ssl_context)
+                    logger.info(f"P2P transport and health check listening on {self.host}:{current_p2p_port}")
+                    self.port = current_p2p_port  # Update the port if found
+                    p2p_port_found = True
                     break
                 except OSError as e:
                     if "address already in use" in str(e).lower():
-                        logger.warning(f"Health check port {current_health_port} is in use, trying next port...")
-                        current_health_port += 1
+                        logger.warning(f"P2P port {current_p2p_port} is in use, trying next port...")
+                        current_p2p_port += 1
                     else:
                         raise
             
-            if not health_port_found:
-                logger.warning(f"Failed to start health check after {max_attempts} attempts")
-                # Continue anyway, as this isn't critical
+            if not p2p_port_found:
+                logger.warning(f"Failed to start P2P transport after {max_attempts} attempts")
+                # Continue anyway: peers fall back to HTTPS
             
             return api_port_found
             
@@ -363,12 +610,56 @@ class BlockchainNetwork:
         finally:
             self._starting_server = False
 
-    async def get_session(self):
-        """Get a shared client session, creating it if necessary"""
-        if self._session is None:
-            self._session = aiohttp.ClientSession()
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared pooled client session, creating it if necessary"""
+        if self._session is None or self._session.closed:
+            pool_config = self.config["connection_pool"]
+            self._connector = aiohttp.TCPConnector(
+                limit=pool_config["limit"],
+                limit_per_host=pool_config["limit_per_host"],
+                keepalive_timeout=pool_config["keepalive_timeout"],
+                use_dns_cache=True,
+                ttl_dns_cache=pool_config["dns_cache_ttl"],
+                ssl=self.client_ssl_context
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                trace_configs=[self._build_trace_config()]
+            )
         return self._session
 
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Trace connection setup and reuse to feed the pool metrics"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_started = time.perf_counter()
+
+        async def on_connection_create_end(session, ctx, params):
+            # A new connection means a full TCP (and TLS) handshake
+            self._pool_stats["created"] += 1
+            HANDSHAKE_LATENCY.labels(instance=self.node_id).set(time.perf_counter() - ctx.connect_started)
+            self._update_pool_metrics()
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._pool_stats["reused"] += 1
+            self._update_pool_metrics()
+
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def _update_pool_metrics(self) -> None:
+        """Publish pool size and connection reuse ratio"""
+        if self._connector is not None:
+            idle = sum(len(conns) for conns in getattr(self._connector, "_conns", {}).values())
+            in_use = len(getattr(self._connector, "_acquired", ()))
+            CONNECTION_POOL_SIZE.labels(instance=self.node_id).set(idle + in_use)
+        total = self._pool_stats["created"] + self._pool_stats["reused"]
+        if total:
+            CONNECTION_REUSE_RATIO.labels(instance=self.node_id).set(self._pool_stats["reused"] / total)
+
     async def start(self):
         """Start the network with periodic discovery and sync"""
         if self._initialized:
@@ -391,13 +682,27 @@ class BlockchainNetwork:
             # Initialize identity and certificates
             await self.identity.initialize()
             self.node_id, self.private_key, self.public_key = self.identity.node_id, self.identity.private_key, self.identity.public_key
+            self._signing_key, self._signing_key_hex = self.identity.signing_key, self.private_key
+            self.peer_scorer.node_id = self.node_id
+            self.scheduler.node_id = self.node_id
             self.ssl_context, self.client_ssl_context = await self.cert_manager.initialize()
 
-            # Connect to bootstrap nodes
-            for host, port in self.bootstrap_nodes:
-                if (host, port) != (self.host, self.port):
-                    peer_id = f"node{port}"
-                    await self.add_peer(peer_id, host, port, self.public_key)  # Use public key as initial auth
+            # Restore used nonces instead of replaying the chain
+            snapshot_path = self.nonce_snapshot_path
+            if os.path.exists(snapshot_path):
+                try:
+                    self.nonce_tracker = NonceTracker.load(snapshot_path)
+                    logger.info(f"Restored nonce tracker for {len(self.nonce_tracker.last_height)} addresses")
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable nonce snapshot {snapshot_path}: {e}")
+
+            # Reconnect to the best known peers; fall back to bootstrap nodes without any
+            if not await self.restore_peers():
+                for host, port in self.bootstrap_nodes:
+                    if (host, port) != (self.host, self.port):
+                        peer_id = f"node{port}"
+                        await self.add_peer(peer_id, host, port, self.public_key)  # Use public key as initial auth
+            self.background_tasks.append(asyncio.create_task(self.address_book.run()))
 
             # Start server
             if not self._server_started:
@@ -406,18 +711,14 @@ class BlockchainNetwork:
                 self._server_started = True
 
             # Start periodic tasks
-            self.sync_task = await self.start_periodic_sync(interval=self.config["sync_interval"])
-            self.discovery_task = asyncio.create_task(self.periodic_discovery())
-            self.background_tasks.append(self.discovery_task)
-
-            # Start security monitoring
-            if self.security_monitor:
-                asyncio.create_task(self.security_monitor.analyze_patterns())
+            self.schedule_periodic_jobs()
+            self.background_tasks.append(asyncio.create_task(self.scheduler.run()))
 
             logger.info(f"Network started on {self.host}:{self.port} with sync interval {self.config['sync_interval']}s")
 
-            self.broadcast_task = asyncio.create_task(self.process_message_queue())
+            self.broadcast_task = asyncio.create_task(self.broadcast_scheduler.run())
             self.background_tasks.append(self.broadcast_task)
+            self.background_tasks.append(asyncio.create_task(self.broadcast_scheduler.feed_from(self.message_queue)))
 
             self._initialized = True
         finally:
@@ -432,6 +733,7 @@ class BlockchainNetwork:
         if self._session is not None:
             await self._session.close()
             self._session = None
+            self._connector = None
 
         # Cancel background tasks
         for task in self.background_tasks:
@@ -439,11 +741,8 @@ class BlockchainNetwork:
                 task.cancel()
                 tasks_to_cancel.append(task)
         
-        if self.sync_task and not self.sync_task.done():
-            tasks_to_cancel.append(self.sync_task)
-        if self.discovery_task and not self.discovery_task.done():
-            tasks_to_cancel.append(self.discovery_task)
-        
+        await self.scheduler.stop()
+
         for task in tasks_to_cancel:
             task.cancel()
         
@@ -456,169 +755,571 @@ class BlockchainNetwork:
         if hasattr(self, 'runner'):
             await self.runner.cleanup()
 
-        # Cleanup P2P server
-        if self.server:
-            self.server.close()
-            await self.server.wait_closed()
-        
+        for peer_id in self.peers:
+            self.address_book.record(peer_id, score=self.peer_reputation.get_score(peer_id))
+        try:
+            await self.address_book.close()
+        except Exception as e:
+            logger.warning(f"Failed to save address book: {e}")
+
+        try:
+            self.nonce_tracker.save(self.nonce_snapshot_path)
+        except OSError as e:
+            logger.warning(f"Failed to save nonce snapshot: {e}")
+
+        # Also closes the P2P server
+        await self.transport.close()
+        self.server = None
+        self.signature_verifier.close()
+
         logger.info("Network stopped")
 
-    # Modified core.py for network communication
-    async def send_with_retry(self, url: str, data: dict, method: str = "post", max_retries: Optional[int] = None) -> Tuple[bool, Optional[dict]]:
-        """Send request with per-node auth and msgpack serialization"""
-        if max_retries is None:
-            max_retries = self.config["max_retries"]
-        
-        # Sign the request with our private key
-        sk = ecdsa.SigningKey.from_string(bytes.fromhex(self.private_key), curve=ecdsa.SECP256k1)
-        
-        # Serialize using msgpack instead of JSON
-        from utils import serialize, deserialize
+    @property
+    def signing_key(self) -> ecdsa.SigningKey:
+        """Parsed signing key for self.private_key, cached until the key changes"""
+        if self._signing_key is None or self._signing_key_hex != self.private_key:
+            self._signing_key = ecdsa.SigningKey.from_string(bytes.fromhex(self.private_key), curve=ecdsa.SECP256k1)
+            self._signing_key_hex = self.private_key
+        return self._signing_key
+
+    def _prepare_payload(self, data: dict) -> Tuple[bytes, Dict[str, str]]:
+        """Serialize and sign a payload once so it can be sent to many peers"""
+        from utils import serialize
         serialized_data = serialize(data)
-        message = serialized_data
-        signature = sk.sign(message).hex()
-        
         headers = {
-            "Node-ID": self.node_id, 
-            "Signature": signature,
+            "Node-ID": self.node_id,
+            "Signature": self.signing_key.sign(serialized_data).hex(),
             "Content-Type": "application/msgpack"
         }
+        return serialized_data, headers
+
+    # Modified core.py for network communication
+    async def send_with_retry(self, url: str, data: dict, method: str = "post", max_retries: Optional[int] = None,
+                              prepared: Optional[Tuple[bytes, Dict[str, str]]] = None) -> Tuple[bool, Optional[dict]]:
+        """Send request with per-node auth and msgpack serialization.
+
+        Pass ``prepared`` (from ``_prepare_payload``) to reuse an already
+        serialized and signed payload instead of signing ``data`` again.
+        """
+        if max_retries is None:
+            max_retries = self.config["max_retries"]
         
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(max_retries):
-                try:
-                    if method == "post":
-                        async with session.post(url, data=serialized_data, headers=headers, ssl=self.client_ssl_context) as resp:
-                            if resp.status == 200:
-                                if resp.content_type == "application/msgpack":
-                                    resp_data = await resp.read()
-                                    return True, deserialize(resp_data)
-                                else:
-                                    return True, await resp.json() if resp.content_type == "application/json" else None
-                            return False, None
-                    elif method == "get":
-                        async with session.get(url, headers=headers, ssl=self.client_ssl_context) as resp:
-                            if resp.status == 200:
-                                if resp.content_type == "application/msgpack":
-                                    resp_data = await resp.read()
-                                    return True, deserialize(resp_data)
-                                else:
-                                    return True, await resp.json() if resp.content_type == "application/json" else None
-                            return False, None
-                except Exception as e:
-                    logger.warning(f"Request to {url} failed (attempt {attempt + 1}): {e}")
-                    if attempt == max_retries - 1:
-                        return False, None
-                    await asyncio.sleep(0.5 * (2 ** attempt))  # Exponential backoff
-                return False, None
-    
-    async def process_message_queue(self):
-        """Process queued broadcast messages"""
-        while not self.shutdown_flag.is_set():
+        serialized_data, headers = prepared if prepared is not None else self._prepare_payload(data)
+        return await self._request(url, serialized_data, headers, method, max_retries)
+
+    async def _request(self, url: str, serialized_data: bytes, headers: Dict[str, str], method: str,
+                       max_retries: int) -> Tuple[bool, Optional[dict]]:
+        """Perform the HTTP exchange for send_with_retry over the pooled session"""
+        from utils import deserialize
+        session = await self.get_session()
+        for attempt in range(max_retries):
             try:
-                msg_type, data = await self.message_queue.get()
-                if msg_type == "block":
-                    await self.broadcast_block(data)
-                elif msg_type == "transaction":
-                    await self.broadcast_transaction(data)
-                self.message_queue.task_done()
+                if method == "post":
+                    async with session.post(url, data=serialized_data, headers=headers, ssl=self.client_ssl_context) as resp:
+                        if resp.status == 200:
+                            if resp.content_type == "application/msgpack":
+                                resp_data = await resp.read()
+                                return True, deserialize(resp_data)
+                            else:
+                                return True, await resp.json() if resp.content_type == "application/json" else None
+                        return False, None
+                elif method == "get":
+                    async with session.get(url, headers=headers, ssl=self.client_ssl_context) as resp:
+                        if resp.status == 200:
+                            if resp.content_type == "application/msgpack":
+                                resp_data = await resp.read()
+                                return True, deserialize(resp_data)
+                            else:
+                                return True, await resp.json() if resp.content_type == "application/json" else None
+                        return False, None
             except Exception as e:
-                logger.error(f"Error processing message queue: {e}")
-            await asyncio.sleep(0.1)
-            
-    async def broadcast_block(self, block: Block) -> None:
-        """Broadcast a block to all peers using batch requests with optimized serialization"""
-        if len(self.peers) <= 3:
-            # For few peers, direct broadcast is fine
-            tasks = []
-            for peer_id, peer_data in self.peers.items():
-                tasks.append(self.send_block(peer_id, peer_data["host"], peer_data["port"], block))
-            await asyncio.gather(*tasks, return_exceptions=True)
+                logger.warning(f"Request to {url} failed (attempt {attempt + 1}): {e}")
+                if attempt == max_retries - 1:
+                    return False, None
+                await asyncio.sleep(0.5 * (2 ** attempt))  # Exponential backoff
+        return False, None
+    
+    async def peer_request(self, peer_id: str, path: str, data: dict, peer_data: Optional[dict] = None,
+                           prepared: Optional[Tuple[bytes, Dict[str, str]]] = None) -> Tuple[bool, Optional[dict]]:
+        """Send a request to a peer over its persistent transport connection,
+        falling back to a signed HTTPS POST when none can be opened"""
+        if peer_data is None:
+            peer_data = self.peers.get(peer_id)
+            if peer_data is None:
+                return False, None
+        started = time.monotonic()
+        result = None
+        if self.config["transport"]["enabled"] and path in self.transport.handlers:
+            connection = await self.transport.connect(peer_id, peer_data["host"], peer_data["port"])
+            if connection is not None:
+                try:
+                    result = await connection.request(path, data)
+                except Exception as e:
+                    logger.debug(f"Transport request {path} to {peer_id} failed, using HTTPS: {e}")
+        if result is None:
+            url = f"https://{peer_data['host']}:{peer_data['port']}{path}"
+            result = await self.send_with_retry(url, data, prepared=prepared)
+        if result[0]:
+            self.peer_scorer.record_success(peer_id, time.monotonic() - started)
         else:
-            # For many peers, use batched broadcasts to reduce network overhead
-            peer_batches = []
-            peers_list = list(self.peers.items())
-            batch_size = max(3, len(peers_list) // 3)  # Balance between parallelism and efficiency
-            
-            for i in range(0, len(peers_list), batch_size):
-                peer_batches.append(peers_list[i:i+batch_size])
-                
-            for batch in peer_batches:
-                tasks = []
-                for peer_id, peer_data in batch:
-                    tasks.append(self.send_block(peer_id, peer_data["host"], peer_data["port"], block))
-                await asyncio.gather(*tasks, return_exceptions=True)
-                # Small delay between batches to avoid network congestion
-                await asyncio.sleep(0.05)
-                
+            self.peer_scorer.record_failure(peer_id)
+        return result
+
+    def queue_broadcast(self, msg_type: str, data=None) -> bool:
+        """Queue a "block", "transaction" or "announcement" broadcast by priority"""
+        return self.broadcast_scheduler.submit(msg_type, data)
+
+    async def broadcast(self, path: str, data: dict, peers: Optional[Dict[str, dict]] = None) -> Dict[str, Tuple[bool, Optional[dict]]]:
+        """Serialize and sign ``data`` once, then send it to many peers concurrently.
+
+        Returns a mapping of peer ID to the ``(success, response)`` pair from
+        send_with_retry; exceptions are reported as ``(False, None)``.
+        """
+        if peers is None:
+            peers = dict(self.peers)
+        if not peers:
+            return {}
+        prepared = self._prepare_payload(data)
+        # Start with the best-scored peers so fast, honest peers get the data first
+        peer_ids = self.peer_scorer.rank(peers)
+
+        async def send(peer_id: str) -> Tuple[bool, Optional[dict]]:
+            # Bound concurrent sends per peer so one slow peer can't absorb every slot
+            async with self._peer_slots[peer_id]:
+                return await self.peer_request(peer_id, path, data, peer_data=peers[peer_id], prepared=prepared)
+
+        tasks = [send(peer_id) for peer_id in peer_ids]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            peer_id: (False, None) if isinstance(result, Exception) else result
+            for peer_id, result in zip(peer_ids, results)
+        }
+
+    async def broadcast_block(self, block: Block) -> None:
+        """Broadcast a block to all peers, signed once with optimized serialization"""
+        if self.config["compact_blocks"]:
+            await self.send_compact_block(block)
+            BLOCKS_RECEIVED.labels(instance=self.node_id).inc()
+            return
+        if self.config["relay_mode"] == "inventory":
+            await self.announce_inventory("block", [(block.hash, block.to_dict())])
+            BLOCKS_RECEIVED.labels(instance=self.node_id).inc()
+            return
+        hops = self.relay_hops(block.hash)
+        if hops <= 0:
+            return
+        data = {"block": block.to_dict()}
+        if self.config["gossip"]["enabled"]:
+            data["ttl"] = hops
+        peers = self.gossip_targets({
+            peer_id: peer_data for peer_id, peer_data in self.peers.snapshot().items()
+            if not self.inventory.peer_knows(peer_id, block.hash)
+        })
+        results = await self.broadcast("/receive_block", data, peers=peers)
+        for peer_id, (success, _) in results.items():
+            if success:
+                self.inventory.mark_known(peer_id, [block.hash])
+            else:
+                self._increment_failure(peer_id)
         BLOCKS_RECEIVED.labels(instance=self.node_id).inc()
         
     async def broadcast_transaction(self, transaction: Transaction) -> None:
         """Broadcast a transaction to all peers"""
-        tasks = []
-        for peer_id, peer_data in self.peers.items():
-            tasks.append(self.send_transaction(peer_id, peer_data["host"], peer_data["port"], transaction))
-        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.config["relay_mode"] == "inventory":
+            await self.broadcast_transactions([transaction])
+            return
+        hops = self.relay_hops(transaction.tx_id)
+        if hops <= 0:
+            return
+        data = {"transaction": transaction.to_dict()}
+        if self.config["gossip"]["enabled"]:
+            data["ttl"] = hops
+        results = await self.broadcast("/receive_transaction", data, peers=self.gossip_targets(self.peers.snapshot()))
+        for peer_id, (success, _) in results.items():
+            if success:
+                logger.info(f"Sent transaction {transaction.tx_id[:8]} to {peer_id}")
+            else:
+                logger.warning(f"Failed to send transaction {transaction.tx_id[:8]} to {peer_id}")
         TXS_BROADCAST.labels(instance=self.node_id).inc()
 
-    async def send_block(self, peer_id: str, host: str, port: int, block: Block) -> None:
-        """Send block to a peer with msgpack serialization and compression"""
-        url = f"https://{host}:{port}/receive_block"
-        
-        # Use msgpack serialization with compression for better performance
-        from utils import serialize
-        
-        # Convert block to dict and serialize
-        data = {"block": block.to_dict()}
-        success, _ = await self.send_with_retry(url, data)
-        
-        if not success:
-            self._increment_failure(peer_id)
-
-    async def send_transaction(self, peer_id: str, host: str, port: int, tx: Transaction) -> None:
-        """Send a transaction to a specific peer."""
-        url = f"https://{host}:{port}/receive_transaction"
-        data = {"transaction": tx.to_dict()}
-        success, _ = await self.send_with_retry(url, data)
-        if success:
-            logger.info(f"Sent transaction {tx.tx_id[:8]} to {peer_id}")
+    async def broadcast_transactions(self, transactions: List[Transaction]) -> None:
+        """Relay transactions to all peers in signed /receive_transactions batch frames"""
+        from utils import unpack_bitmap
+        if self.config["relay_mode"] == "inventory":
+            batch_size = self.config["inventory_max_items"]
+            for start in range(0, len(transactions), batch_size):
+                batch = transactions[start:start + batch_size]
+                await self.announce_inventory("tx", [(tx.tx_id, tx.to_dict()) for tx in batch])
+                TXS_BROADCAST.labels(instance=self.node_id).inc(len(batch))
+            return
+        # A batch carries one gossip TTL, so transactions are grouped by the hops they have left
+        by_hops = defaultdict(list)
+        for tx in transactions:
+            hops = self.relay_hops(tx.tx_id)
+            if hops > 0:
+                by_hops[hops].append(tx)
+        batch_size = self.config["tx_batch_max"]
+        for hops, group in by_hops.items():
+            for start in range(0, len(group), batch_size):
+                batch = group[start:start + batch_size]
+                tx_ids = [tx.tx_id for tx in batch]
+                data = {"transactions": [tx.to_dict() for tx in batch]}
+                if self.config["gossip"]["enabled"]:
+                    data["ttl"] = hops
+                peers = self.gossip_targets({
+                    peer_id: peer_data for peer_id, peer_data in self.peers.snapshot().items()
+                    if not all(self.inventory.peer_knows(peer_id, tx_id) for tx_id in tx_ids)
+                })
+                results = await self.broadcast("/receive_transactions", data, peers=peers)
+                for peer_id, (success, resp) in results.items():
+                    if not success or not isinstance(resp, dict):
+                        logger.warning(f"Failed to relay {len(batch)} transactions to {peer_id}")
+                        continue
+                    self.inventory.mark_known(peer_id, tx_ids)
+                    accepted = sum(unpack_bitmap(resp.get("accepted", b""), len(batch)))
+                    logger.info(f"Relayed {len(batch)} transactions to {peer_id}, {accepted} accepted")
+                TXS_BROADCAST.labels(instance=self.node_id).inc(len(batch))
+
+    async def announce_inventory(self, kind: str, items: List[Tuple[str, dict]]) -> None:
+        """Announce item hashes to the peers not already known to have them.
+
+        ``items`` are ``(hash, payload)`` pairs; payloads are cached so peers
+        can fetch them with /getdata. Peers that need the same hashes share
+        one signed /inv message.
+        """
+        for item_hash, payload in items:
+            self.inventory.remember(kind, item_hash, payload)
+        hops = {item_hash: self.relay_hops(item_hash) for item_hash, _ in items}
+        # Items whose gossip TTL ran out are kept for /getdata but not announced further
+        items = [(item_hash, payload) for item_hash, payload in items if hops[item_hash] > 0]
+        candidates = {
+            peer_id: peer_data for peer_id, peer_data in self.peers.snapshot().items()
+            if any(not self.inventory.peer_knows(peer_id, item_hash) for item_hash, _ in items)
+        }
+        groups = defaultdict(dict)
+        for peer_id, peer_data in self.gossip_targets(candidates).items():
+            unknown = tuple(item_hash for item_hash, _ in items if not self.inventory.peer_knows(peer_id, item_hash))
+            if unknown:
+                groups[unknown][peer_id] = peer_data
+
+        async def announce(hashes: Tuple[str, ...], peers: Dict[str, dict]) -> None:
+            if self.config["gossip"]["enabled"]:
+                inv = [[kind, item_hash, hops[item_hash]] for item_hash in hashes]
+            else:
+                inv = [[kind, item_hash] for item_hash in hashes]
+            results = await self.broadcast("/inv", {"inv": inv}, peers=peers)
+            for peer_id, (success, _) in results.items():
+                if success:
+                    self.inventory.mark_known(peer_id, hashes)
+                elif kind == "block":
+                    self._increment_failure(peer_id)
+
+        await asyncio.gather(*(announce(hashes, peers) for hashes, peers in groups.items()))
+
+    def gossip_targets(self, peers: Mapping[str, dict]) -> Dict[str, dict]:
+        """Peers to relay to: all of ``peers``, or in gossip mode a fanout-sized
+        subset of the best-scored half and a random half"""
+        gossip = self.config["gossip"]
+        fanout = gossip["fanout"]
+        if not gossip["enabled"] or len(peers) <= fanout:
+            return dict(peers)
+        ranked = self.peer_scorer.rank(peers)
+        # Random picks keep the epidemic spreading over the whole network, not just fast links
+        chosen = ranked[:fanout // 2]
+        chosen += random.sample(ranked[fanout // 2:], fanout - len(chosen))
+        return {peer_id: peers[peer_id] for peer_id in chosen}
+
+    def spawn_relay(self, coro) -> None:
+        """Run relay work in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._inventory_tasks.add(task)
+        task.add_done_callback(self._inventory_tasks.discard)
+
+    def received_push(self, item_hash: str, ttl: Optional[int]) -> bool:
+        """Record the gossip TTL a pushed item arrived with; True if it should be relayed on.
+
+        With inventory relay, items are relayed after /getdata instead, and
+        plain push broadcast reaches every peer directly from the origin.
+        """
+        if self.config["relay_mode"] != "push" or not self.config["gossip"]["enabled"]:
+            return False
+        if isinstance(ttl, int):
+            self.inventory.set_hops(item_hash, ttl - 1)
+        return True
+
+    def relay_hops(self, item_hash: str) -> int:
+        """Gossip hops left for an item; items we originate get the full TTL"""
+        if not self.config["gossip"]["enabled"]:
+            return 1
+        return self.inventory.hops_left(item_hash, self.config["gossip"]["ttl"])
+
+    def has_inventory(self, kind: str, item_hash: str) -> bool:
+        """Whether this node already has a block or transaction"""
+        if item_hash in self.inventory.seen:
+            return True
+        if kind == "block":
+            # Blocks applied by chain sync are not in the seen filter; check the recent tip
+            return any(block.hash == item_hash for block in reversed(self.blockchain.chain[-16:]))
+        return False
+
+    def handle_inventory(self, peer_id: str, inv: List[tuple]) -> int:
+        """Record a peer's announcement and fetch the items we lack; returns how many.
+
+        Entries are ``(kind, hash)``, or ``(kind, hash, ttl)`` from gossiping peers.
+        """
+        self.inventory.mark_known(peer_id, [entry[1] for entry in inv])
+        wanted = []
+        statuses = defaultdict(int)
+        for kind, item_hash, *ttl in inv:
+            if kind not in ("block", "tx"):
+                continue
+            if self.has_inventory(kind, item_hash):
+                statuses[(kind, "known")] += 1
+            elif not self.inventory.claim(item_hash):
+                statuses[(kind, "in_flight")] += 1
+            else:
+                statuses[(kind, "requested")] += 1
+                wanted.append((kind, item_hash))
+                if ttl and isinstance(ttl[0], int):
+                    self.inventory.set_hops(item_hash, ttl[0] - 1)
+        for (kind, status), count in statuses.items():
+            INVENTORY_ANNOUNCED.labels(instance=self.node_id, kind=kind, status=status).inc(count)
+        if wanted:
+            self.spawn_relay(self.fetch_inventory(peer_id, wanted))
+        return len(wanted)
+
+    async def fetch_inventory(self, peer_id: str, items: List[Tuple[str, str]]) -> None:
+        """Fetch announced items from the announcing peer and relay the new ones"""
+        hashes = [item_hash for _, item_hash in items]
+        requested = set(hashes)
+        try:
+            success, resp = await self.peer_request(peer_id, "/getdata", {"getdata": [list(item) for item in items]})
+            if not success or not isinstance(resp, dict):
+                logger.warning(f"Failed to fetch {len(items)} announced items from {peer_id}")
+                return
+            for block_data in resp.get("blocks", []):
+                if block_data.get("hash") in requested:
+                    await self.accept_block(Block.from_dict(block_data), peer_id, relay=True)
+            tx_dicts = [tx for tx in resp.get("transactions", []) if tx.get("tx_id") in requested]
+            if tx_dicts:
+                await self.accept_transactions(tx_dicts, peer_id, relay=True)
+        except Exception as e:
+            logger.error(f"Error fetching inventory from {peer_id}: {e}")
+        finally:
+            self.inventory.release(hashes)
+
+    async def accept_block(self, block: Block, peer_id: Optional[str] = None, relay: bool = False) -> bool:
+        """Apply a block from a peer; True if it is in our chain afterwards"""
+        if peer_id is not None:
+            self.inventory.mark_known(peer_id, [block.hash])
+        if self.has_inventory("block", block.hash):
+            INVENTORY_DUPLICATES.labels(instance=self.node_id, kind="block").inc()
+            return True
+        if not await self.blockchain.add_block(block):
+            if getattr(block, "index", 0) > len(self.blockchain.chain):
+                # A block beyond our tip means we are behind; sync now rather than at the next tick
+                self.scheduler.trigger("sync")
+            return False
+        await self.nonce_tracker.cleanup_old_nonces(len(self.blockchain.chain), self.config["nonce_retention_blocks"])
+        self.inventory.remember("block", block.hash, block.to_dict())
+        if relay:
+            self.queue_broadcast("block", block)
+        return True
+
+    async def accept_transactions(self, tx_dicts: List[dict], peer_id: str, relay: bool = False) -> List[bool]:
+        """Add a batch of transactions from a peer to the mempool.
+
+        Returns one flag per transaction, True if it is in the mempool
+        afterwards. Nonce replays (including within the batch) are rejected.
+        """
+        held = [False] * len(tx_dicts)
+        decoded = []  # (position, tx)
+        for position, tx_dict in enumerate(tx_dicts):
+            try:
+                decoded.append((position, Transaction.from_dict(tx_dict)))
+            except Exception as e:
+                logger.debug(f"Undecodable transaction {position} in batch from {peer_id}: {e}")
+        # Derive every sender address in one call
+        derived = iter(SecurityUtils.public_key_to_address_many(
+            [tx.inputs[0].public_key for _, tx in decoded if tx.inputs]))
+
+        candidates = []  # (position, tx, address)
+        seen_nonces = set()
+        replayed = 0
+        for position, tx in decoded:
+            address = next(derived) if tx.inputs else tx.sender
+            if address is None:
+                logger.debug(f"Undecodable public key in transaction {position} in batch from {peer_id}")
+                continue
+            self.inventory.mark_known(peer_id, [tx.tx_id])
+            if self.has_inventory("tx", tx.tx_id):
+                INVENTORY_DUPLICATES.labels(instance=self.node_id, kind="tx").inc()
+                held[position] = True
+                continue
+            if (address, tx.nonce) in seen_nonces or await self.nonce_tracker.is_nonce_used(address, tx.nonce):
+                replayed += 1
+                continue
+            seen_nonces.add((address, tx.nonce))
+            candidates.append((position, tx, address))
+        if replayed:
+            self.peer_reputation.update_reputation(peer_id, 'invalid_transaction')
+
+        transactions = [tx for _, tx, _ in candidates]
+        add_many = getattr(self.blockchain, "add_transactions_to_mempool", None)
+        if add_many is not None:
+            results = await add_many(transactions)
         else:
-            logger.warning(f"Failed to send transaction {tx.tx_id[:8]} to {peer_id}")
+            # Mempools without a batch API: apply in order so earlier transactions are visible to later ones
+            results = [await self.blockchain.add_transaction_to_mempool(tx) for tx in transactions]
+
+        height = len(self.blockchain.chain)
+        for (position, tx, address), ok in zip(candidates, results):
+            if ok:
+                held[position] = True
+                await self.nonce_tracker.add_nonce(address, tx.nonce, height)
+                self.inventory.remember("tx", tx.tx_id, tx_dicts[position])
+                if relay:
+                    self.queue_broadcast("transaction", tx)
+        return held
+
+    async def send_compact_block(self, block: Block) -> None:
+        """Send a block as a compact block to every peer not known to have it.
+
+        Only the first transaction (the reward) and transactions this node
+        has not seen relayed are sent in full; the rest go as short IDs the
+        receiver resolves against its mempool.
+        """
+        block_dict = block.to_dict()
+        self.inventory.remember("block", block.hash, block_dict)
+        hops = self.relay_hops(block.hash)
+        if hops <= 0:
+            return
+        peers = self.gossip_targets({
+            peer_id: peer_data for peer_id, peer_data in self.peers.snapshot().items()
+            if not self.inventory.peer_knows(peer_id, block.hash)
+        })
+        if not peers:
+            return
+        compact = build_compact_block(
+            block_dict, lambda index, tx_dict: index == 0 or tx_dict.get("tx_id") not in self.inventory.seen)
+        message = {"compact_block": compact}
+        if self.config["gossip"]["enabled"]:
+            message["ttl"] = hops
+        results = await self.broadcast("/receive_compact_block", message, peers=peers)
+        for peer_id, (success, _) in results.items():
+            if success:
+                self.inventory.mark_known(peer_id, [block.hash])
+            else:
+                self._increment_failure(peer_id)
+
+    def _short_id_lookup(self, salt: bytes):
+        """Index mempool and recently relayed transactions by salted short ID"""
+        index = {}
+        ambiguous = set()
+
+        def add(tx_id: str, source) -> None:
+            sid = short_id(tx_id, salt)
+            if sid in index and index[sid][0] != tx_id:
+                ambiguous.add(sid)
+            index[sid] = (tx_id, source)
+
+        pool = getattr(getattr(self.blockchain, "mempool", None), "transactions", None)
+        if isinstance(pool, dict):
+            for tx in pool.values():
+                add(tx.tx_id, tx)
+        for item_hash, (kind, payload) in list(self.inventory.relay_cache.items()):
+            if kind == "tx":
+                add(item_hash, payload)
 
-    def _load_peers(self) -> Dict[str, Tuple[str, int, str]]:
-        """Load known peers from persistent storage."""
-        peers = {}
+        def lookup(sid: bytes) -> Optional[dict]:
+            if sid in ambiguous or sid not in index:
+                return None
+            source = index[sid][1]
+            return source if isinstance(source, dict) else source.to_dict()
+        return lookup
+
+    async def handle_compact_block(self, peer_id: str, compact: dict, ttl: Optional[int] = None) -> str:
+        """Rebuild a compact block from a peer; returns a status for the response"""
+        reconstruction = CompactBlockReconstruction(compact)
+        block_hash = reconstruction.block_hash
+        self.inventory.mark_known(peer_id, [block_hash])
+        if self.has_inventory("block", block_hash):
+            INVENTORY_DUPLICATES.labels(instance=self.node_id, kind="block").inc()
+            return "known"
+        if not self.inventory.claim(block_hash):
+            return "in_flight"
+        if isinstance(ttl, int):
+            self.inventory.set_hops(block_hash, ttl - 1)
+        missing = reconstruction.fill(self._short_id_lookup(reconstruction.salt))
+        if not missing:
+            return "accepted" if await self.complete_compact_block(peer_id, reconstruction) else "rejected"
+        # Missing transactions need another round trip; don't hold the sender's request open
+        task = asyncio.create_task(self.complete_compact_block(peer_id, reconstruction, missing))
+        self._inventory_tasks.add(task)
+        task.add_done_callback(self._inventory_tasks.discard)
+        return "fetching"
+
+    async def complete_compact_block(self, peer_id: str, reconstruction: CompactBlockReconstruction,
+                                     missing: Optional[List[int]] = None) -> bool:
+        """Fetch missing transactions if any, then apply the rebuilt block.
+
+        Falls back to fetching the full block with /getdata when the block
+        cannot be rebuilt, e.g. after a short ID collision.
+        """
+        block_hash = reconstruction.block_hash
         try:
-            if os.path.exists("known_peers.txt"):
-                with open("known_peers.txt", "r") as f:
-                    for line in f:
-                        if ":" in line:
-                            parts = line.strip().split(":")
-                            if len(parts) >= 3:
-                                host, port, pubkey = parts[0], int(parts[1]), ":".join(parts[2:])
-                                peer_id = f"node{port}"
-                                peers[peer_id] = (host, port, pubkey)
+            if missing:
+                COMPACT_BLOCK_MISSING_TXS.labels(instance=self.node_id).inc(len(missing))
+                success, resp = await self.peer_request(peer_id, "/getblocktxn", {"hash": block_hash, "indexes": missing})
+                if success and isinstance(resp, dict):
+                    reconstruction.add_transactions(resp.get("indexes", []), resp.get("transactions", []))
+            if not reconstruction.missing():
+                block = Block.from_dict(reconstruction.block_dict())
+                if block.calculate_hash() == block_hash:
+                    accepted = await self.accept_block(block, peer_id, relay=True)
+                    COMPACT_BLOCKS.labels(instance=self.node_id, result="fetched" if missing else "reconstructed").inc()
+                    return accepted
         except Exception as e:
-            logger.error(f"Failed to load peers: {e}")
-        return peers
+            logger.error(f"Error rebuilding compact block {block_hash[:8]} from {peer_id}: {e}")
+        finally:
+            self.inventory.release([block_hash])
+        COMPACT_BLOCKS.labels(instance=self.node_id, result="full_block").inc()
+        logger.info(f"Could not rebuild compact block {block_hash[:8]} from {peer_id}, fetching it in full")
+        await self.fetch_inventory(peer_id, [("block", block_hash)])
+        return self.has_inventory("block", block_hash)
 
-    def _save_peers(self) -> None:
-        """Save current peers to persistent storage."""
+    @property
+    def peers(self) -> PeerTable:
+        """Copy-on-write peer table; iterate it freely, change it with add/update/remove"""
+        return self._peers
+
+    @peers.setter
+    def peers(self, peers: Dict[str, dict]) -> None:
+        self._peers.replace(peers)
+
+    async def restore_peers(self) -> int:
+        """Add the best-ranked peers from the address book; returns how many were added"""
         try:
-            with open("known_peers.txt", "w") as f:
-                for peer_id, peer_data in self.peers.items():
-                    host = peer_data["host"]
-                    port = peer_data["port"]
-                    pubkey = peer_data.get("public_key", "")
-                    f.write(f"{host}:{port}:{pubkey}\n")
+            self.address_book.open()
+            self.address_book.import_legacy("known_peers.txt")
         except Exception as e:
-            logger.error(f"Failed to save peers: {e}")
+            logger.error(f"Failed to load address book: {e}")
+            return 0
+        restored = 0
+        for peer_id, entry in self.address_book.best(self.config["address_book"]["restore_peers"]):
+            if (entry["host"], entry["port"]) == (self.host, self.port):
+                continue
+            self.peer_reputation.reputation_scores[peer_id] = entry["score"]
+            if await self.add_peer(peer_id, entry["host"], entry["port"], entry["public_key"]):
+                restored += 1
+        if restored:
+            logger.info(f"Restored {restored} peers from the address book")
+        return restored
 
     async def broadcast_peer_announcement(self) -> None:
         """Announce this node to all peers."""
-        sk = ecdsa.SigningKey.from_string(bytes.fromhex(self.private_key), curve=ecdsa.SECP256k1)
         message = f"{self.node_id}{self.host}{self.port}".encode()
-        signature = sk.sign(message).hex()
+        signature = self.signing_key.sign(message).hex()
         data = {
             "peer_id": self.node_id,
             "host": self.host,
@@ -626,121 +1327,195 @@ class BlockchainNetwork:
             "public_key": self.public_key,
             "signature": signature
         }
-        tasks = []
-        with self.lock:
-            for peer_id, peer_data in self.peers.items():
-                url = f"https://{peer_data['host']}:{peer_data['port']}/announce_peer"
-                tasks.append(self.send_with_retry(url, data))
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for peer_id, result in zip(self.peers.keys(), results):
-                if isinstance(result, Exception) or not result[0]:
-                    logger.warning(f"Failed to announce to {peer_id}")
-                    self._increment_failure(peer_id)
-                else:
-                    logger.debug(f"Announced to {peer_id}")
-                    self.peer_failures[peer_id] = 0
+        if self.config["gossip"]["enabled"]:
+            data["ttl"] = self.config["gossip"]["ttl"]
+            self.inventory.seen.add(signature)
+        results = await self.broadcast("/announce_peer", data, peers=self.gossip_targets(self.peers.snapshot()))
+        for peer_id, (success, _) in results.items():
+            if not success:
+                logger.warning(f"Failed to announce to {peer_id}")
+                self._increment_failure(peer_id)
+            else:
+                logger.debug(f"Announced to {peer_id}")
+                self.peer_failures[peer_id] = 0
+
+    async def relay_peer_announcement(self, data: dict, sender: Optional[str]) -> None:
+        """Gossip another node's signed announcement on while its TTL lasts.
+
+        The signature covers only the peer's ID and address, so the message
+        is forwarded unchanged apart from the TTL; each signature is relayed
+        once.
+        """
+        ttl = data.get("ttl")
+        signature = data.get("signature")
+        if not self.config["gossip"]["enabled"] or not isinstance(ttl, int) or ttl <= 1 or not signature:
+            return
+        if signature in self.inventory.seen:
+            return
+        self.inventory.seen.add(signature)
+        peers = self.gossip_targets({
+            peer_id: peer_data for peer_id, peer_data in self.peers.snapshot().items()
+            if peer_id not in (sender, data.get("peer_id"))
+        })
+        await self.broadcast("/announce_peer", dict(data, ttl=ttl - 1), peers=peers)
 
     async def discover_peers(self) -> None:
         """Discover new peers from bootstrap nodes and existing peers."""
-        with self.lock:
-            # Bootstrap nodes
-            for host, port in self.bootstrap_nodes:
-                if (host, port) != (self.host, self.port):
-                    peer_id = f"node{port}"
-                    url = f"https://{host}:{port}/get_chain"
-                    logger.debug(f"Attempting to discover peer {peer_id} at {url}")
-                    success, response = await self.send_with_retry(url, {}, method="get")
-                    if success:
-                        if await self.add_peer(peer_id, host, port, PEER_AUTH_SECRET()):
-                            logger.debug(f"Successfully added bootstrap node {peer_id}")
-                    else:
-                        logger.debug(f"Skipping unresponsive bootstrap node {peer_id}")
+        async def probe_bootstrap(host: str, port: int) -> None:
+            peer_id = f"node{port}"
+            url = f"https://{host}:{port}/get_chain"
+            logger.debug(f"Attempting to discover peer {peer_id} at {url}")
+            success, response = await self.send_with_retry(url, {}, method="get")
+            if success:
+                if await self.add_peer(peer_id, host, port, PEER_AUTH_SECRET()):
+                    logger.debug(f"Successfully added bootstrap node {peer_id}")
+            else:
+                logger.debug(f"Skipping unresponsive bootstrap node {peer_id}")
 
-            # Discover from existing peers
-            if not self.bootstrap_nodes and not self.peers:
-                return
-            peer_items = list(self.peers.items())
-            if peer_items:
-                peer_id, peer_data = random.choice(peer_items)
-                url = f"https://{peer_data['host']}:{peer_data['port']}/get_peers"
-                success, peers_data = await self.send_with_retry(url, {}, method="get")
-                if success and peers_data:
-                    for peer in peers_data:
-                        if (peer["host"], peer["port"]) != (self.host, self.port):
-                            await self.add_peer(peer["peer_id"], peer["host"], peer["port"], PEER_AUTH_SECRET())
-                else:
-                    logger.warning(f"Peer discovery failed with {peer_id}")
-                    self._increment_failure(peer_id)
-            logger.info("Peer discovery cycle completed")
+        # Bootstrap nodes are probed concurrently; no lock is held across the requests
+        await asyncio.gather(*(
+            probe_bootstrap(host, port) for host, port in self.bootstrap_nodes
+            if (host, port) != (self.host, self.port)
+        ), return_exceptions=True)
 
-    async def periodic_discovery(self) -> None:
-        """Run peer discovery periodically with heartbeat"""
-        while not self.shutdown_flag.is_set():
-            try:
-                await self.discover_peers()
-                await self.send_heartbeat()  # Added heartbeat
-            except Exception as e:
-                logger.error(f"Periodic discovery/heartbeat error: {e}")
-            await asyncio.sleep(self.config["peer_discovery_interval"])
+        # Discover from existing peers
+        if not self.bootstrap_nodes and not self.peers:
+            return
+        peers = self.peers.snapshot()
+        if peers:
+            peer_id = self.peer_scorer.choose(peers)
+            peer_data = peers[peer_id]
+            url = f"https://{peer_data['host']}:{peer_data['port']}/get_peers"
+            success, peers_data = await self.send_with_retry(url, {}, method="get")
+            if success and peers_data:
+                for peer in peers_data:
+                    if (peer["host"], peer["port"]) != (self.host, self.port):
+                        await self.add_peer(peer["peer_id"], peer["host"], peer["port"], PEER_AUTH_SECRET())
+            else:
+                logger.warning(f"Peer discovery failed with {peer_id}")
+                self._increment_failure(peer_id)
+        logger.info("Peer discovery cycle completed")
 
     async def add_peer(self, peer_id: str, host: str, port: int, public_key: str) -> bool:
         """Add a peer with faster announcement"""
-        with self.lock:
-            if len(self.peers) >= self.config["max_peers"] and peer_id not in self.peers:
-                logger.debug(f"Cannot add peer {peer_id}: max peers ({self.config['max_peers']}) reached")
-                return False
-            if peer_id not in self.peers or self.peers[peer_id]["host"] != host or self.peers[peer_id]["port"] != port:
-                self.peers[peer_id] = {
-                    "host": host,
-                    "port": port,
-                    "public_key": public_key,
-                    "failed_attempts": 0,
-                    "last_seen": time.time()
-                }
-                logger.info(f"Added/updated peer {peer_id}: {host}:{port}")
-                if time.time() - self.last_announcement > 5:  # Reduced from 10s to 5s
-                    self.last_announcement = time.time()
-                    await self.broadcast_peer_announcement()
-                    logger.debug(f"Broadcasted peer announcement after adding {peer_id}")
-                return True
+        current = self.peers.get(peer_id)
+        if current is not None and current["host"] == host and current["port"] == port:
+            return False
+        entry = {
+            "host": host,
+            "port": port,
+            "public_key": public_key,
+            "failed_attempts": 0,
+            "last_seen": time.time()
+        }
+        if not self.peers.add(peer_id, entry, max_peers=self.config["max_peers"]):
+            logger.debug(f"Cannot add peer {peer_id}: max peers ({self.config['max_peers']}) reached")
             return False
+        self.address_book.record(peer_id, host=host, port=port, public_key=public_key, last_seen=entry["last_seen"])
+        if current is not None and current.get("public_key") != public_key:
+            self.vk_cache.invalidate(peer_id)
+        logger.info(f"Added/updated peer {peer_id}: {host}:{port}")
+        if time.time() - self.last_announcement > 5:  # Reduced from 10s to 5s
+            self.last_announcement = time.time()
+            self.queue_broadcast("announcement")
+            logger.debug(f"Queued peer announcement after adding {peer_id}")
+        return True
 
     def _increment_failure(self, peer_id: str) -> None:
         """Track peer failures and remove unresponsive peers."""
         self.peer_failures[peer_id] += 1
         PEER_FAILURES.labels(instance=self.node_id).inc()
+        self.address_book.record_failure(peer_id)
         if self.peer_failures[peer_id] > 3:
-            if peer_id in self.peers:
-                del self.peers[peer_id]
+            if self.peers.remove(peer_id) is not None:
+                self.vk_cache.invalidate(peer_id)
+                self.inventory.forget_peer(peer_id)
+                self.peer_scorer.forget(peer_id)
                 logger.info(f"Removed unresponsive peer {peer_id} after {self.peer_failures[peer_id]} failures")
-                self._save_peers()
+                self.address_book.record(peer_id, score=self.peer_reputation.get_score(peer_id))
             del self.peer_failures[peer_id]
 
+    def _chain_accept_encoding(self) -> str:
+        """Content codings to request for /get_chain pages"""
+        codings = ["gzip"]
+        # Newer aiohttp decodes zstd itself and refuses it without its own backend
+        client_zstd = getattr(aiohttp, "compression_utils", None)
+        if zstd_available() and getattr(client_zstd, "HAS_ZSTD", True):
+            codings.insert(0, "zstd")
+        return ", ".join(codings)
+
+    async def fetch_page(self, peer_data: dict, path: str, key: str, cursor: int,
+                         limit: int) -> Tuple[Optional[List[dict]], Optional[int], int]:
+        """GET one page of a cursor-paginated resource (/get_chain, /get_headers) from a peer.
+
+        Returns the items stored under ``key``, the cursor to continue from
+        (None once the peer's tip is reached) and the payload size in bytes,
+        or ``(None, None, 0)`` if the request failed.
+        """
+        from utils import deserialize
+        url = f"https://{peer_data['host']}:{peer_data['port']}{path}"
+        params = {"cursor": cursor, "limit": limit}
+        headers = {
+            "Node-ID": self.node_id,
+            "Accept": "application/msgpack",
+            "Accept-Encoding": self._chain_accept_encoding()
+        }
+        session = await self.get_session()
+        try:
+            async with session.get(url, params=params, headers=headers, ssl=self.client_ssl_context) as resp:
+                if resp.status != 200:
+                    return None, None, 0
+                body = decode_zstd_body(await resp.read())
+                if resp.content_type == "application/msgpack":
+                    page = deserialize(body)
+                    return page[key], page["next_cursor"], len(body)
+                # Legacy peers answer with a plain JSON list
+                next_cursor = resp.headers.get("X-Next-Cursor")
+                return json.loads(body), int(next_cursor) if next_cursor else None, len(body)
+        except Exception as e:
+            logger.warning(f"Fetching page from {url} failed: {e}")
+            return None, None, 0
+
+    async def fetch_chain_page(self, peer_data: dict, cursor: int,
+                               limit: Optional[int] = None) -> Tuple[Optional[List[dict]], Optional[int]]:
+        """Fetch one page of blocks starting at index ``cursor`` from a peer.
+
+        Returns the block dicts and the cursor to continue from (None once the
+        peer's tip is reached), or ``(None, None)`` if the request failed.
+        """
+        blocks, next_cursor, _ = await self.fetch_page(
+            peer_data, "/get_chain", "blocks", cursor, limit or self.config["chain_page_size"])
+        return blocks, next_cursor
+
     async def request_chain(self):
-        """Request chain incrementally"""
+        """Request chain incrementally, one bounded page per peer per sync cycle"""
         if not self.peers:
             return False
+        if self.config["sync_mode"] == "headers_first":
+            return await self.header_sync.run()
         
-        our_height = len(self.blockchain.chain) - 1
-        our_difficulty = self.blockchain.get_total_difficulty()
+        tip = self.chain_validator.tip()
+        our_height = tip.height
+        our_difficulty = tip.cumulative_difficulty
         best_chain = None
         best_difficulty = our_difficulty
         best_peer = None
         
-        for peer_id, peer_data in self.peers.items():
+        peers = self.peers.snapshot()
+        for peer_id in self.peer_scorer.rank(peers):
+            peer_data = peers[peer_id]
             try:
-                url = f"https://{peer_data['host']}:{peer_data['port']}/get_chain?since={our_height}"
-                success, chain_data = await asyncio.wait_for(self.send_with_retry(url, {}, method="get"), timeout=10)
-                if not success or not chain_data:
+                chain_data, _ = await asyncio.wait_for(self.fetch_chain_page(peer_data, our_height + 1), timeout=10)
+                if not chain_data:
                     continue
-                
                 new_chain = [Block.from_dict(block) for block in chain_data]
                 if not new_chain:
                     continue
                 
-                new_difficulty = sum(block.difficulty for block in new_chain) + our_difficulty
+                new_difficulty = self.chain_validator.suffix_work(new_chain) + our_difficulty
                 if len(new_chain) > 0 and new_difficulty > best_difficulty:
-                    if await self.blockchain.is_valid_chain(self.blockchain.chain + new_chain):
+                    # Only the suffix is checked, against the cached tip state
+                    if self.chain_validator.validate_suffix(new_chain, tip) == len(new_chain):
                         best_chain = new_chain
                         best_difficulty = new_difficulty
                         best_peer = peer_id
@@ -754,39 +1529,35 @@ class BlockchainNetwork:
             return True
         return False
 
-    async def sync_and_discover(self) -> None:
-        """Perform a full sync and discovery cycle."""
-        try:
-            logger.debug("Starting sync and discovery cycle")
-            self.blockchain.difficulty = self.blockchain.adjust_difficulty()
-            await self.discover_peers()
-            await self.request_chain()
-            await self.broadcast_peer_announcement()
-            logger.debug("Sync and discovery cycle completed")
-        except Exception as e:
-            logger.error(f"Sync and discovery error: {e}")
+    def schedule_periodic_jobs(self) -> None:
+        """Register sync, discovery, heartbeat, announcement and maintenance with the scheduler"""
+        scheduler_config = self.config["scheduler"]
+        self.scheduler.add("sync", self.scheduled_sync, lambda: self._sync_interval,
+                           timeout=scheduler_config["sync_timeout"])
+        if self.config["peer_discovery_enabled"]:
+            self.scheduler.add("discovery", self.discover_peers, self.config["peer_discovery_interval"])
+        self.scheduler.add("heartbeat", self.send_heartbeat, self.heartbeat_interval)
+        self.scheduler.add("announcement", self.scheduled_announcement, scheduler_config["announce_interval"])
+        self.scheduler.add("maintenance", self.scheduled_maintenance, scheduler_config["maintenance_interval"])
 
-    async def start_periodic_sync(self, interval=30):
-        """Start periodic chain synchronization with proper shutdown handling"""
-        logger.info(f"Starting periodic chain sync with interval {interval} seconds")
-        
-        async def sync_loop():
-            while not self.shutdown_flag.is_set():
-                try:
-                    await asyncio.wait_for(self.request_chain(), timeout=interval/2)  # Limit each request duration
-                    await asyncio.sleep(interval)
-                except asyncio.TimeoutError:
-                    logger.warning("Chain sync request timed out")
-                except asyncio.CancelledError:
-                    logger.info("Periodic sync loop cancelled")
-                    break
-                except Exception as e:
-                    logger.error(f"Error in periodic sync: {e}", exc_info=True)
-                    await asyncio.sleep(5)  # Short delay before retry
-        
-        self.sync_task = asyncio.create_task(sync_loop())
-        self.background_tasks.append(self.sync_task)
-        return self.sync_task
+    async def scheduled_sync(self) -> None:
+        """Sync once; stay at the fast interval while blocks keep arriving, back off at the tip"""
+        scheduler_config = self.config["scheduler"]
+        if await self.request_chain():
+            self._sync_interval = scheduler_config["sync_min_interval"]
+        else:
+            self._sync_interval = min(max(self._sync_interval * 2, self.config["sync_interval"]),
+                                      scheduler_config["sync_max_interval"])
+
+    async def scheduled_announcement(self) -> None:
+        if self.peers:
+            self.queue_broadcast("announcement")
+
+    async def scheduled_maintenance(self) -> None:
+        self.rate_limiter.evict_idle()
+        self.http_limiter.evict_idle()
+        if self.security_monitor:
+            await self.security_monitor.cleanup_old_data()
 
     def _handle_task_result(self, task: asyncio.Task) -> None:
         """Handle task completion and log exceptions."""
@@ -798,82 +1569,8 @@ class BlockchainNetwork:
             logger.error(f"Task failed: {e}")
 
     async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-        """Thread-safe connection handling"""
-        with self.lock:
-            peer_address = writer.get_extra_info('peername')
-            client_ip = peer_address[0] if peer_address else 'unknown'
-            
-            try:
-                # Check security monitor if available
-                if self.security_monitor and not await self.security_monitor.monitor_connection(client_ip):
-                    logger.warning(f"Connection rejected from {client_ip} by security monitor")
-                    writer.close()
-                    await writer.wait_closed()
-                    return
-
-                logger.info(f"New connection from {client_ip}")
-
-                # Read first chunk of data to detect protocol
-                initial_data = await reader.read(1024)
-                if not initial_data:
-                    logger.warning(f"Empty initial data from {client_ip}")
-                    return
-                    
-                # Check if this looks like an HTTP request
-                if initial_data.startswith(b'GET') or initial_data.startswith(b'POST') or initial_data.startswith(b'PUT'):
-                    logger.warning(f"Received HTTP request on P2P port from {client_ip}. This connection should go to the HTTP server.")
-                    response = b"HTTP/1.1 400 Bad Request\r\nContent-Type: text/plain\r\n\r\nThis is a P2P socket server, not an HTTP server."
-                    writer.write(response)
-                    await writer.drain()
-                    return
-                
-                while not self.shutdown_flag.is_set():
-                    try:
-                        # Read message length first (4 bytes)
-                        length_data = await reader.read(4)
-                        if not length_data:
-                            break
-                        
-                        message_length = int.from_bytes(length_data, 'big')
-                        
-                        # Read the actual message
-                        data = await reader.read(message_length)
-                        if not data:
-                            break
-                        
-                        try:
-                            # Decode as JSON
-                            message = json.loads(data.decode('utf-8'))
-                            await self.handle_message(message, client_ip)
-                        except json.JSONDecodeError:
-                            logger.error(f"Received invalid JSON message from {client_ip}: {data[:100]}...")  # Log first 100 bytes
-                            if self.security_monitor:
-                                await self.security_monitor.record_failed_attempt(client_ip, 'invalid_message')
-                            continue  # Skip invalid messages instead of breaking
-                        
-                        # Send acknowledgment
-                        ack = "ACK".encode('utf-8')
-                        writer.write(len(ack).to_bytes(4, 'big') + ack)
-                        await writer.drain()
-                        
-                    except Exception as e:
-                        logger.error(f"Error handling connection from {client_ip}: {e}", exc_info=True)
-                        if self.security_monitor:
-                            await self.security_monitor.record_failed_attempt(client_ip, 'connection_error')
-                        break
-                        
-            except Exception as e:
-                logger.error(f"Connection error from {client_ip}: {e}", exc_info=True)
-                if self.security_monitor:
-                    await self.security_monitor.record_failed_attempt(client_ip, 'connection_error')
-            
-            finally:
-                try:
-                    writer.close()
-                    await writer.wait_closed()
-                    logger.info(f"Connection closed from {client_ip}")
-                except Exception as e:
-                    logger.error(f"Error closing connection from {client_ip}: {e}")
+        """Accept an inbound P2P transport connection (or plain HTTP health check)"""
+        await self.transport.handle_connection(reader, writer)
 
     async def sync(self, local_height: int, local_hash: Optional[str] = None) -> bool:
         """Synchronize with peers to get latest blocks"""
@@ -885,17 +1582,20 @@ class BlockchainNetwork:
         try:
             # Request blocks from the most reliable peer(s)
             success = False
-            best_peers = sorted(
-                self.peers.items(), 
-                key=lambda p: self.peer_reputation.get_score(p[0]), 
-                reverse=True
-            )[:3]
+            peers = self.peers.snapshot()
+            best_peers = self.peer_scorer.rank(peers)[:3]
             
-            for peer_id, peer_data in best_peers:
+            for peer_id in best_peers:
+                peer_data = peers[peer_id]
                 url = f"https://{peer_data['host']}:{peer_data['port']}/get_blocks?start={local_height+1}"
-                success, blocks_data = await self.send_with_retry(url, {}, method="get")
+                started = time.monotonic()
+                fetched, blocks_data = await self.send_with_retry(url, {}, method="get")
+                if fetched:
+                    self.peer_scorer.record_success(peer_id, time.monotonic() - started)
+                else:
+                    self.peer_scorer.record_failure(peer_id)
                 
-                if success and blocks_data:
+                if fetched and blocks_data:
                     blocks_added = 0
                     # Process blocks in order
                     for block_data in blocks_data:
@@ -925,21 +1625,24 @@ class BlockchainNetwork:
             return
             
         current_time = time.time()
+        peer_ids = []
         tasks = []
         
-        with self.lock:
-            for peer_id, peer_data in self.peers.items():
-                # Only send heartbeat if we haven't communicated recently
-                if current_time - peer_data.get("last_seen", 0) > self.heartbeat_interval / 2:
-                    url = f"https://{peer_data['host']}:{peer_data['port']}/heartbeat"
-                    data = {"node_id": self.node_id, "timestamp": current_time}
-                    tasks.append(self.send_with_retry(url, data))
+        for peer_id, peer_data in self.peers.snapshot().items():
+            # Only send heartbeat if we haven't communicated recently
+            if current_time - peer_data.get("last_seen", 0) > self.heartbeat_interval / 2:
+                data = {"node_id": self.node_id, "timestamp": current_time}
+                peer_ids.append(peer_id)
+                tasks.append(self.peer_request(peer_id, "/heartbeat", data, peer_data=peer_data))
         
         if tasks:
             results = await asyncio.gather(*tasks, return_exceptions=True)
-            for i, (peer_id, _) in enumerate(list(self.peers.items())[:len(results)]):
-                result = results[i]
+            for peer_id, result in zip(peer_ids, results):
+                if peer_id not in self.peers:
+                    continue
                 if isinstance(result, Exception) or not result[0]:
                     self._increment_failure(peer_id)
                 else:
-                    self.peers[peer_id]["last_seen"] = current_time
\ No newline at end of file
+                    self.peers.update(peer_id, last_seen=current_time)
+                    self.address_book.record(peer_id, last_seen=current_time, latency=self.peer_scorer.rtt(peer_id),
+                                             score=self.peer_reputation.get_score(peer_id))
\ No newline at end of file
@@ -6,13 +6,21 @@ import os
 import json
 import time
 import logging
+import asyncio
+import functools
+import heapq
+import threading
 import ecdsa
 import subprocess
 import ssl
 import uuid
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from security.rate_limiter import GCRALimiter
 
 logger = logging.getLogger("P2PNetwork")
 
@@ -34,60 +42,404 @@ class PeerReputation:
         self.reputation_scores[peer_id] = max(0, min(100, self.reputation_scores[peer_id]))
         return self.reputation_scores[peer_id]
     
+    def get_score(self, peer_id: str) -> int:
+        return self.reputation_scores.get(peer_id, 100)
+
+    def update_score(self, peer_id: str, delta: int) -> int:
+        """Adjust a peer's score directly, within the same 0-100 bounds"""
+        self.reputation_scores[peer_id] = max(0, min(100, self.reputation_scores[peer_id] + delta))
+        return self.reputation_scores[peer_id]
+
     def is_peer_trusted(self, peer_id: str, minimum_score: int = 50) -> bool:
         return self.reputation_scores[peer_id] >= minimum_score
 
 
 class RateLimiter:
-    def __init__(self):
-        self.request_counts = defaultdict(lambda: defaultdict(int))
-        self.last_reset = defaultdict(float)
-        
+    """Per-peer, per-operation sliding-window limits backed by GCRA buckets"""
+
+    def __init__(self, max_peers: int = 10000):
         # Configure limits for different operations
         self.limits = {
             'transaction': {'count': 100, 'window': 60},  # 100 transactions per minute
             'block': {'count': 10, 'window': 60},        # 10 blocks per minute
             'peer_connect': {'count': 5, 'window': 60},  # 5 connection attempts per minute
         }
+        self.limiters = {
+            operation: GCRALimiter(limit['count'], limit['window'], max_keys=max_peers)
+            for operation, limit in self.limits.items()
+        }
 
-    async def check_rate_limit(self, peer_id: str, operation: str) -> bool:
-        current_time = time.time()
-        window = self.limits[operation]['window']
-        
-        # Reset counters if window has passed
-        if current_time - self.last_reset[peer_id] > window:
-            self.request_counts[peer_id] = defaultdict(int)
-            self.last_reset[peer_id] = current_time
-        
-        # Check if limit is exceeded
-        if self.request_counts[peer_id][operation] >= self.limits[operation]['count']:
-            return False
-        
-        self.request_counts[peer_id][operation] += 1
-        return True
+    async def check_rate_limit(self, peer_id: str, operation: str, cost: int = 1) -> bool:
+        return self.limiters[operation].allow(peer_id, cost)
+
+    def evict_idle(self) -> None:
+        for limiter in self.limiters.values():
+            limiter.evict_idle()
 
 
 class NonceTracker:
+    """Used transaction nonces per address, expired by block height.
+
+    Each address keeps a high-water mark (every nonce up to it is used) and
+    a small set of used nonces above it; in-order nonces only move the mark.
+    Entries are bucketed by block height in a min-heap, so cleanup pops
+    expired buckets in time proportional to what it removes. A sparse nonce
+    expires ``retention_blocks`` after it was used; an address's high-water
+    mark expires once the address has been inactive that long.
+    """
+
+    SNAPSHOT_VERSION = 1
+
     def __init__(self):
-        self.nonce_map = defaultdict(set)
-        self.nonce_expiry = {}  # Store block height when nonce was used
-        
+        self.floors = {}        # address -> highest nonce with every nonce up to it used
+        self.sparse = {}        # address -> used nonces above the floor
+        self.last_height = {}   # address -> height of its most recent nonce
+        self._buckets = {}      # height -> (addresses active at height, [(address, sparse nonce)])
+        self._heights = []      # min-heap of bucket heights
+
+    def _bucket(self, height: int) -> Tuple[set, list]:
+        bucket = self._buckets.get(height)
+        if bucket is None:
+            bucket = self._buckets[height] = (set(), [])
+            heapq.heappush(self._heights, height)
+        return bucket
+
+    def _record(self, address: str, nonce: int, block_height: int) -> None:
+        floor = self.floors.get(address, -1)
+        used = self.sparse.get(address)
+        # Only integer nonces can be folded into the high-water mark
+        sequential = isinstance(nonce, int)
+        if (sequential and nonce <= floor) or (used is not None and nonce in used):
+            return
+        if sequential and nonce == floor + 1:
+            floor = nonce
+            # Fold any nonces that are now contiguous into the high-water mark
+            while used and floor + 1 in used:
+                floor += 1
+                used.discard(floor)
+            self.floors[address] = floor
+            if used is not None and not used:
+                del self.sparse[address]
+        else:
+            self.sparse.setdefault(address, set()).add(nonce)
+            self._bucket(block_height)[1].append((address, nonce))
+
     async def add_nonce(self, address: str, nonce: int, block_height: int):
-        self.nonce_map[address].add(nonce)
-        self.nonce_expiry[(address, nonce)] = block_height
+        self._record(address, nonce, block_height)
+        if block_height >= self.last_height.get(address, block_height):
+            self.last_height[address] = block_height
+            self._bucket(block_height)[0].add(address)
         
     async def is_nonce_used(self, address: str, nonce: int) -> bool:
-        return nonce in self.nonce_map[address]
+        if isinstance(nonce, int) and nonce <= self.floors.get(address, -1):
+            return True
+        used = self.sparse.get(address)
+        return used is not None and nonce in used
     
-    async def cleanup_old_nonces(self, current_height: int, retention_blocks: int = 10000):
-        """Remove nonces older than retention_blocks"""
-        expired = [(addr, nonce) for (addr, nonce), height 
-                  in self.nonce_expiry.items() 
-                  if current_height - height > retention_blocks]
-        
-        for addr, nonce in expired:
-            self.nonce_map[addr].remove(nonce)
-            del self.nonce_expiry[(addr, nonce)]
+    async def cleanup_old_nonces(self, current_height: int, retention_blocks: int = 10000) -> int:
+        """Expire nonces older than retention_blocks; returns how many entries were removed"""
+        removed = 0
+        while self._heights and current_height - self._heights[0] > retention_blocks:
+            height = heapq.heappop(self._heights)
+            addresses, sparse_nonces = self._buckets.pop(height)
+            for address, nonce in sparse_nonces:
+                used = self.sparse.get(address)
+                if used is not None and nonce in used:
+                    used.discard(nonce)
+                    removed += 1
+                    if not used:
+                        del self.sparse[address]
+            for address in addresses:
+                # Later activity moved the address to a newer bucket
+                if self.last_height.get(address) == height:
+                    del self.last_height[address]
+                    self.floors.pop(address, None)
+                    removed += len(self.sparse.pop(address, ())) + 1
+        return removed
+
+    def snapshot(self) -> dict:
+        """JSON-serializable state, restored with ``restore``"""
+        sparse_heights = defaultdict(dict)
+        for height, (_, sparse_nonces) in self._buckets.items():
+            for address, nonce in sparse_nonces:
+                if nonce in self.sparse.get(address, ()):
+                    sparse_heights[address][nonce] = height
+        return {
+            "version": self.SNAPSHOT_VERSION,
+            "addresses": {
+                address: {
+                    "floor": self.floors.get(address, -1),
+                    "height": height,
+                    "sparse": [[nonce, nonce_height] for nonce, nonce_height in sparse_heights[address].items()]
+                }
+                for address, height in self.last_height.items()
+            }
+        }
+
+    @classmethod
+    def restore(cls, data: dict) -> 'NonceTracker':
+        if data.get("version") != cls.SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported nonce snapshot version {data.get('version')}")
+        tracker = cls()
+        for address, entry in data["addresses"].items():
+            if entry["floor"] >= 0:
+                tracker.floors[address] = entry["floor"]
+            for nonce, height in entry["sparse"]:
+                tracker.sparse.setdefault(address, set()).add(nonce)
+                tracker._bucket(height)[1].append((address, nonce))
+            tracker.last_height[address] = entry["height"]
+            tracker._bucket(entry["height"])[0].add(address)
+        return tracker
+
+    def save(self, path: str) -> None:
+        """Write a snapshot atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'NonceTracker':
+        with open(path) as f:
+            return cls.restore(json.load(f))
+
+
+class RollingFilter:
+    """Set of recently added hashes bounded to roughly ``capacity`` entries.
+
+    Two generations are kept; when the current one fills up it replaces the
+    previous one, so the oldest half is forgotten at once.
+    """
+
+    def __init__(self, capacity: int):
+        self.generation_size = max(capacity // 2, 1)
+        self._current = set()
+        self._previous = set()
+
+    def add(self, item: str) -> None:
+        if item in self._current:
+            return
+        self._current.add(item)
+        if len(self._current) >= self.generation_size:
+            self._previous, self._current = self._current, set()
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._current or item in self._previous
+
+
+class InventoryTracker:
+    """Inventory state for inv/getdata relay.
+
+    Tracks which hashes each peer is known to have, which hashes this node
+    has already seen, recently relayed payloads that peers may request, and
+    hashes currently being fetched so an item announced by several peers is
+    downloaded once.
+    """
+
+    def __init__(self, known_size: int = 5000, cache_size: int = 2000, seen_size: int = 50000,
+                 request_timeout: float = 30.0):
+        self.known_size = known_size
+        self.cache_size = cache_size
+        self.request_timeout = request_timeout
+        self.known = {}  # peer_id -> RollingFilter
+        self.seen = RollingFilter(seen_size)
+        self.relay_cache = OrderedDict()  # hash -> (kind, payload)
+        self.in_flight = {}  # hash -> deadline
+        self.hops = OrderedDict()  # hash -> gossip hops left when relaying it
+
+    def mark_known(self, peer_id: str, hashes) -> None:
+        known = self.known.get(peer_id)
+        if known is None:
+            known = self.known[peer_id] = RollingFilter(self.known_size)
+        for item_hash in hashes:
+            known.add(item_hash)
+
+    def peer_knows(self, peer_id: str, item_hash: str) -> bool:
+        known = self.known.get(peer_id)
+        return known is not None and item_hash in known
+
+    def forget_peer(self, peer_id: str) -> None:
+        self.known.pop(peer_id, None)
+
+    def remember(self, kind: str, item_hash: str, payload: dict) -> None:
+        """Record an item as seen and keep its payload to answer getdata"""
+        self.seen.add(item_hash)
+        self.relay_cache[item_hash] = (kind, payload)
+        self.relay_cache.move_to_end(item_hash)
+        if len(self.relay_cache) > self.cache_size:
+            self.relay_cache.popitem(last=False)
+
+    def set_hops(self, item_hash: str, hops: int) -> None:
+        """Remember how many more hops a received item may be gossiped"""
+        self.hops[item_hash] = hops
+        self.hops.move_to_end(item_hash)
+        if len(self.hops) > self.cache_size:
+            self.hops.popitem(last=False)
+
+    def hops_left(self, item_hash: str, default: int) -> int:
+        return self.hops.get(item_hash, default)
+
+    def lookup(self, item_hash: str) -> Optional[Tuple[str, dict]]:
+        return self.relay_cache.get(item_hash)
+
+    def claim(self, item_hash: str) -> bool:
+        """Reserve a hash for fetching; False if another fetch is in flight"""
+        now = time.monotonic()
+        deadline = self.in_flight.get(item_hash)
+        if deadline is not None and deadline > now:
+            return False
+        self.in_flight[item_hash] = now + self.request_timeout
+        return True
+
+    def release(self, hashes) -> None:
+        for item_hash in hashes:
+            self.in_flight.pop(item_hash, None)
+
+
+class VerifyingKeyCache:
+    """LRU cache of parsed SECP256k1 verifying keys.
+
+    Keys are cached by their hex encoding and remembered per peer, so a peer
+    announcing a new public key evicts the key it used before.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._keys = OrderedDict()  # public key hex -> ecdsa.VerifyingKey
+        self._peer_keys = {}        # peer_id -> public key hex
+        self._lock = threading.Lock()  # Also used from verification worker threads
+
+    def get(self, public_key: str, peer_id: Optional[str] = None) -> ecdsa.VerifyingKey:
+        """Return the parsed verifying key, parsing it only on a cache miss"""
+        with self._lock:
+            if peer_id is not None:
+                previous = self._peer_keys.get(peer_id)
+                if previous is not None and previous != public_key:
+                    self._keys.pop(previous, None)
+                self._peer_keys[peer_id] = public_key
+            vk = self._keys.get(public_key)
+            if vk is not None:
+                self._keys.move_to_end(public_key)
+                return vk
+
+        vk = ecdsa.VerifyingKey.from_string(bytes.fromhex(public_key), curve=ecdsa.SECP256k1)
+        with self._lock:
+            self._keys[public_key] = vk
+            if len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+        return vk
+
+    def invalidate(self, peer_id: str) -> None:
+        """Forget the key cached for a peer (key rotation or peer removal)"""
+        with self._lock:
+            public_key = self._peer_keys.pop(peer_id, None)
+            if public_key is not None:
+                self._keys.pop(public_key, None)
+
+    def verify(self, public_key: str, signature: bytes, message: bytes, peer_id: Optional[str] = None) -> bool:
+        """Verify a signature, treating malformed keys or signatures as invalid"""
+        try:
+            return self.get(public_key, peer_id).verify(signature, message)
+        except (ecdsa.BadSignatureError, ecdsa.MalformedPointError, ValueError):
+            return False
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_verifying_key(public_key: str) -> ecdsa.VerifyingKey:
+    return ecdsa.VerifyingKey.from_string(bytes.fromhex(public_key), curve=ecdsa.SECP256k1)
+
+
+def verify_signature_batch(items: List[Tuple[str, bytes, bytes]]) -> List[bool]:
+    """Verify (public_key, signature, message) tuples in a worker process.
+
+    Module-level so it can be pickled for a ProcessPoolExecutor; each worker
+    keeps its own parsed-key cache.
+    """
+    results = []
+    for public_key, signature, message in items:
+        try:
+            results.append(_parse_verifying_key(public_key).verify(signature, message))
+        except (ecdsa.BadSignatureError, ecdsa.MalformedPointError, ValueError):
+            results.append(False)
+    return results
+
+
+class SignatureVerifier:
+    """Collects bursts of signature checks and verifies them in a worker pool.
+
+    Callers await verify(); requests arriving within ``max_delay`` seconds of
+    each other (up to ``max_batch``) are verified together off the event loop.
+    """
+
+    def __init__(self, key_cache: VerifyingKeyCache, max_batch: int = 64, max_delay: float = 0.005,
+                 workers: int = 2, use_processes: bool = False):
+        self.key_cache = key_cache
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.use_processes = use_processes
+        if use_processes:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sigverify")
+        self._pending = []
+        self._flush_handle = None
+        self._jobs = set()
+
+    async def verify(self, public_key: str, signature: bytes, message: bytes, peer_id: Optional[str] = None) -> bool:
+        """Queue a signature for batched verification and wait for the result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((public_key, signature, message, peer_id, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        loop = asyncio.get_running_loop()
+        if self.use_processes:
+            items = [(public_key, signature, message) for public_key, signature, message, _, _ in batch]
+            job = loop.run_in_executor(self._executor, verify_signature_batch, items)
+        else:
+            job = loop.run_in_executor(self._executor, self._verify_batch, batch)
+        task = asyncio.ensure_future(self._complete(job, [future for *_, future in batch]))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    def _verify_batch(self, batch) -> List[bool]:
+        return [
+            self.key_cache.verify(public_key, signature, message, peer_id)
+            for public_key, signature, message, peer_id, _ in batch
+        ]
+
+    async def _complete(self, job, futures) -> None:
+        try:
+            results = await job
+        except Exception as e:
+            logger.error(f"Signature batch verification failed: {e}")
+            results = [False] * len(futures)
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    def close(self) -> None:
+        """Shut down the worker pool"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for *_, future in self._pending:
+            if not future.done():
+                future.set_result(False)
+        self._pending = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 class NodeIdentity:
@@ -99,6 +451,7 @@ class NodeIdentity:
         self.node_id = None
         self.private_key = None
         self.public_key = None
+        self.signing_key = None
         
     async def initialize(self):
         """Initialize or load existing node identity"""
@@ -129,6 +482,9 @@ class NodeIdentity:
                 }, f)
             logger.info(f"Created new node identity: {self.node_id}")
         
+        # Parse the signing key once; every signed message reuses it
+        self.signing_key = ecdsa.SigningKey.from_string(bytes.fromhex(self.private_key), curve=ecdsa.SECP256k1)
+        
         return self.node_id, self.private_key, self.public_key
     
     
@@ -0,0 +1,77 @@
+"""
+Copy-on-write peer table.
+
+Readers get an immutable snapshot in O(1) and can iterate it across await
+points without locking; writers copy the table, change the copy and swap it
+in. Writes never await, so on the event loop they are atomic; a short
+threading lock keeps them safe if a peer is added from another thread.
+"""
+
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Iterator, Optional
+
+
+class PeerTable(Mapping):
+    """Mapping of peer ID to peer entry (host, port, public_key, ...).
+
+    Entries are treated as immutable: ``update`` replaces the entry, so a
+    snapshot taken earlier never changes underneath its reader.
+    """
+
+    def __init__(self, peers: Optional[Dict[str, dict]] = None):
+        self._write_lock = threading.Lock()
+        self._peers = MappingProxyType({peer_id: dict(entry) for peer_id, entry in (peers or {}).items()})
+
+    def snapshot(self) -> Mapping:
+        """The current table; later writes do not affect it"""
+        return self._peers
+
+    def __getitem__(self, peer_id: str) -> dict:
+        return self._peers[peer_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._peers)
+
+    def __len__(self) -> int:
+        return len(self._peers)
+
+    def __contains__(self, peer_id) -> bool:
+        return peer_id in self._peers
+
+    def add(self, peer_id: str, entry: dict, max_peers: Optional[int] = None) -> bool:
+        """Insert or replace a peer; a new peer is refused once ``max_peers`` is reached"""
+        with self._write_lock:
+            if max_peers is not None and peer_id not in self._peers and len(self._peers) >= max_peers:
+                return False
+            peers = dict(self._peers)
+            peers[peer_id] = dict(entry)
+            self._peers = MappingProxyType(peers)
+            return True
+
+    def update(self, peer_id: str, **fields) -> bool:
+        """Replace fields of an existing peer entry; False if the peer is gone"""
+        with self._write_lock:
+            entry = self._peers.get(peer_id)
+            if entry is None:
+                return False
+            peers = dict(self._peers)
+            peers[peer_id] = dict(entry, **fields)
+            self._peers = MappingProxyType(peers)
+            return True
+
+    def remove(self, peer_id: str) -> Optional[dict]:
+        """Remove a peer and return its entry, if it was present"""
+        with self._write_lock:
+            if peer_id not in self._peers:
+                return None
+            peers = dict(self._peers)
+            entry = peers.pop(peer_id)
+            self._peers = MappingProxyType(peers)
+            return entry
+
+    def replace(self, peers: Dict[str, dict]) -> None:
+        """Swap in a whole new table"""
+        with self._write_lock:
+            self._peers = MappingProxyType({peer_id: dict(entry) for peer_id, entry in peers.items()})
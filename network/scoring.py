@@ -0,0 +1,152 @@
+"""
+Peer scoring for sync and relay.
+
+Each peer's request round-trip time, download bandwidth and failure rate
+are tracked as exponentially weighted moving averages and combined with
+its PeerReputation score by a scoring policy. Sync, block download,
+discovery and broadcast fan-out use the resulting order to prefer fast,
+honest peers.
+"""
+
+import random
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils import PEER_BANDWIDTH, PEER_FAILURE_RATE, PEER_RTT, PEER_SCORE
+
+# What an unmeasured peer is assumed to achieve, so new peers are tried
+REFERENCE_RTT = 0.2             # seconds
+REFERENCE_BANDWIDTH = 1 << 20   # bytes per second
+
+
+class PeerStats:
+    """Moving averages of one peer's request outcomes"""
+
+    __slots__ = ("rtt", "bandwidth", "failure_rate", "requests")
+
+    def __init__(self):
+        self.rtt: Optional[float] = None
+        self.bandwidth: Optional[float] = None
+        self.failure_rate = 0.0
+        self.requests = 0
+
+    def as_dict(self) -> dict:
+        return {"rtt": self.rtt, "bandwidth": self.bandwidth,
+                "failure_rate": self.failure_rate, "requests": self.requests}
+
+
+def _latency_factor(stats: PeerStats) -> float:
+    rtt = stats.rtt if stats.rtt is not None else REFERENCE_RTT
+    return REFERENCE_RTT / (REFERENCE_RTT + rtt)
+
+
+def _bandwidth_factor(stats: PeerStats) -> float:
+    bandwidth = stats.bandwidth if stats.bandwidth is not None else REFERENCE_BANDWIDTH
+    return bandwidth / (bandwidth + REFERENCE_BANDWIDTH)
+
+
+def balanced_policy(stats: PeerStats, reputation: float) -> float:
+    """Reputation and reliability scaled by a mix of latency and bandwidth"""
+    speed = 0.6 * _latency_factor(stats) + 0.4 * _bandwidth_factor(stats)
+    return reputation * (1.0 - stats.failure_rate) * speed
+
+
+def latency_policy(stats: PeerStats, reputation: float) -> float:
+    """Prefer the lowest round-trip time; suits relay of small messages"""
+    return reputation * (1.0 - stats.failure_rate) * _latency_factor(stats)
+
+
+def throughput_policy(stats: PeerStats, reputation: float) -> float:
+    """Prefer the highest bandwidth; suits bulk block download"""
+    return reputation * (1.0 - stats.failure_rate) * _bandwidth_factor(stats)
+
+
+SCORING_POLICIES: Dict[str, Callable[[PeerStats, float], float]] = {
+    "balanced": balanced_policy,
+    "latency": latency_policy,
+    "throughput": throughput_policy,
+}
+
+
+class PeerScorer:
+    """Scores peers by ``policy(stats, reputation)``; higher is better.
+
+    ``policy`` is a name from SCORING_POLICIES or any callable with the
+    same signature.
+    """
+
+    def __init__(self, node_id: str, reputation, policy="balanced", alpha: float = 0.2):
+        self.node_id = node_id
+        self.reputation = reputation
+        self.policy = SCORING_POLICIES[policy] if isinstance(policy, str) else policy
+        self.alpha = alpha
+        self.stats: Dict[str, PeerStats] = {}
+
+    def _stats(self, peer_id: str) -> PeerStats:
+        stats = self.stats.get(peer_id)
+        if stats is None:
+            stats = self.stats[peer_id] = PeerStats()
+        return stats
+
+    def _smooth(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def record_success(self, peer_id: str, rtt: Optional[float] = None) -> None:
+        stats = self._stats(peer_id)
+        stats.requests += 1
+        stats.failure_rate = self._smooth(stats.failure_rate, 0.0)
+        if rtt is not None:
+            stats.rtt = self._smooth(stats.rtt, rtt)
+        self._publish(peer_id, stats)
+
+    def record_failure(self, peer_id: str) -> None:
+        stats = self._stats(peer_id)
+        stats.requests += 1
+        stats.failure_rate = self._smooth(stats.failure_rate, 1.0)
+        self._publish(peer_id, stats)
+
+    def record_transfer(self, peer_id: str, nbytes: int, seconds: float) -> None:
+        """Record a download of ``nbytes`` that took ``seconds``"""
+        if nbytes <= 0 or seconds <= 0:
+            return
+        stats = self._stats(peer_id)
+        stats.bandwidth = self._smooth(stats.bandwidth, nbytes / seconds)
+        self._publish(peer_id, stats)
+
+    def rtt(self, peer_id: str) -> Optional[float]:
+        stats = self.stats.get(peer_id)
+        return stats.rtt if stats is not None else None
+
+    def score(self, peer_id: str) -> float:
+        stats = self.stats.get(peer_id) or PeerStats()
+        return self.policy(stats, self.reputation.get_score(peer_id) / 100)
+
+    def rank(self, peer_ids: Iterable[str]) -> List[str]:
+        """Peer IDs ordered best first"""
+        scores = {peer_id: self.score(peer_id) for peer_id in peer_ids}
+        return sorted(scores, key=scores.get, reverse=True)
+
+    def choose(self, peer_ids: Iterable[str]) -> Optional[str]:
+        """Pick one peer at random, weighted by score, so good peers are
+        favoured without always asking the same one"""
+        peer_ids = list(peer_ids)
+        if not peer_ids:
+            return None
+        weights = [max(self.score(peer_id), 1e-6) for peer_id in peer_ids]
+        return random.choices(peer_ids, weights=weights)[0]
+
+    def forget(self, peer_id: str) -> None:
+        if self.stats.pop(peer_id, None) is None:
+            return
+        for gauge in (PEER_SCORE, PEER_RTT, PEER_BANDWIDTH, PEER_FAILURE_RATE):
+            try:
+                gauge.remove(self.node_id, peer_id)
+            except KeyError:
+                pass
+
+    def _publish(self, peer_id: str, stats: PeerStats) -> None:
+        PEER_SCORE.labels(instance=self.node_id, peer=peer_id).set(self.score(peer_id))
+        PEER_FAILURE_RATE.labels(instance=self.node_id, peer=peer_id).set(stats.failure_rate)
+        if stats.rtt is not None:
+            PEER_RTT.labels(instance=self.node_id, peer=peer_id).set(stats.rtt)
+        if stats.bandwidth is not None:
+            PEER_BANDWIDTH.labels(instance=self.node_id, peer=peer_id).set(stats.bandwidth)
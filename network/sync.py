@@ -0,0 +1,339 @@
+"""
+Headers-first chain synchronization.
+
+Peers are first asked for lightweight block headers. The best-work header
+chain that extends our tip is selected, then block bodies are downloaded in
+fixed-size windows from every peer that agrees with it, in parallel, and
+applied to the local chain in order.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from blockchain.core import Block
+from utils import SYNC_BLOCKS_PER_SECOND, SYNC_BYTES_PER_SECOND, SYNC_PEER_THROUGHPUT
+
+logger = logging.getLogger("ChainSync")
+
+HEADER_FIELDS = ("index", "hash", "previous_hash", "timestamp", "difficulty", "nonce", "merkle_root")
+
+
+def block_header(block: Block) -> dict:
+    """Return the header fields of a block without its transactions"""
+    return {field: getattr(block, field, None) for field in HEADER_FIELDS}
+
+
+class TipState(NamedTuple):
+    """What a candidate suffix has to extend: the local tip and its total work"""
+    hash: str
+    height: int
+    cumulative_difficulty: int
+
+
+def _field(item, name: str):
+    """Read a header field from either a header dict or a Block"""
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+class ChainValidator:
+    """Validates candidate chain suffixes against a cached tip state.
+
+    Only the suffix is checked: each block must follow the tip (or the
+    previous suffix block) by index and previous_hash, and carry a hash that
+    meets its difficulty and, for full blocks, matches its contents. The
+    contents are always rehashed, since the hash a peer claims proves
+    nothing. Transaction validity is still enforced when the block is
+    applied with add_block.
+    """
+
+    def __init__(self, blockchain):
+        self.blockchain = blockchain
+        self._tip: Optional[TipState] = None
+
+    def tip(self) -> TipState:
+        """Return the tip state, extending the cached total work incrementally"""
+        chain = self.blockchain.chain
+        height = len(chain) - 1
+        tip_hash = chain[-1].hash
+        cached = self._tip
+        if cached is not None and cached.hash == tip_hash:
+            return cached
+        if cached is not None and cached.height < height and chain[cached.height].hash == cached.hash:
+            # The chain grew on top of the cached tip: only add the new blocks' work
+            added = sum(block.difficulty for block in chain[cached.height + 1:])
+            self._tip = TipState(tip_hash, height, cached.cumulative_difficulty + added)
+        else:
+            # First call or a reorganisation: fall back to a full recount
+            self._tip = TipState(tip_hash, height, self.blockchain.get_total_difficulty())
+        return self._tip
+
+    def validate_suffix(self, suffix: Sequence, tip: Optional[TipState] = None) -> int:
+        """Return how many leading items of ``suffix`` validly extend ``tip`` (default: the local tip)"""
+        if tip is None:
+            tip = self.tip()
+        prev_hash, prev_height = tip.hash, tip.height
+        for count, item in enumerate(suffix):
+            block_hash = _field(item, "hash") or ""
+            if _field(item, "index") != prev_height + 1 or _field(item, "previous_hash") != prev_hash:
+                return count
+            if not self._check_block(item, block_hash):
+                return count
+            prev_hash, prev_height = block_hash, prev_height + 1
+        return len(suffix)
+
+    def suffix_work(self, suffix: Sequence) -> int:
+        """Total difficulty a suffix would add on top of the tip"""
+        return sum(_field(item, "difficulty") or 0 for item in suffix)
+
+    def _check_block(self, item, block_hash: str) -> bool:
+        if not block_hash.startswith("0" * (_field(item, "difficulty") or 0)):
+            return False
+        if isinstance(item, dict):
+            # Headers carry no contents to hash; the body is checked when it arrives
+            return True
+        calculate_hash = getattr(item, "calculate_hash", None)
+        if calculate_hash is None:
+            return True
+        return calculate_hash() == block_hash
+
+
+class SyncProgress:
+    """Download statistics for one sync run, published as Prometheus gauges"""
+
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.started = time.monotonic()
+        self.blocks = 0
+        self.bytes = 0
+        self.peer_bytes = defaultdict(int)
+        self.peer_seconds = defaultdict(float)
+
+    def record_download(self, peer_id: str, nbytes: int, seconds: float) -> None:
+        self.bytes += nbytes
+        self.peer_bytes[peer_id] += nbytes
+        self.peer_seconds[peer_id] += seconds
+
+    def record_applied(self, count: int) -> None:
+        self.blocks += count
+
+    def as_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "blocks": self.blocks,
+            "bytes": self.bytes,
+            "blocks_per_second": self.blocks / elapsed,
+            "bytes_per_second": self.bytes / elapsed,
+            "peer_bytes_per_second": {
+                peer_id: self.peer_bytes[peer_id] / max(self.peer_seconds[peer_id], 1e-9)
+                for peer_id in self.peer_bytes
+            }
+        }
+
+    def publish(self) -> None:
+        stats = self.as_dict()
+        SYNC_BLOCKS_PER_SECOND.labels(instance=self.node_id).set(stats["blocks_per_second"])
+        SYNC_BYTES_PER_SECOND.labels(instance=self.node_id).set(stats["bytes_per_second"])
+        for peer_id, rate in stats["peer_bytes_per_second"].items():
+            SYNC_PEER_THROUGHPUT.labels(instance=self.node_id, peer=peer_id).set(rate)
+
+
+class HeadersFirstSync:
+    """Headers-first, parallel-window block download for a BlockchainNetwork"""
+
+    def __init__(self, network, validator: ChainValidator):
+        self.network = network
+        self.validator = validator
+        self.progress: Optional[SyncProgress] = None
+        self._assigned = defaultdict(int)
+
+    async def run(self) -> bool:
+        """Run one sync round; returns True if any blocks were appended"""
+        tip = self.validator.tip()
+        tip_height = tip.height
+        peers = dict(self.network.peers)
+        if not peers:
+            return False
+
+        candidates = await self._collect_headers(peers, tip)
+        if not candidates:
+            return False
+        best_peer, best_headers = max(candidates.items(), key=lambda item: self.validator.suffix_work(item[1]))
+        logger.info(f"Best header chain from {best_peer}: {len(best_headers)} blocks above height {tip_height}")
+
+        # Any peer whose headers agree with the best chain can serve its bodies
+        agreement = {
+            peer_id: self._common_prefix(headers, best_headers)
+            for peer_id, headers in candidates.items()
+        }
+        self.progress = SyncProgress(self.network.node_id)
+        return await self._download(peers, agreement, best_headers, tip)
+
+    async def _collect_headers(self, peers: Dict[str, dict], tip: TipState) -> Dict[str, List[dict]]:
+        """Fetch and validate headers above our tip from every peer in parallel"""
+        async def collect(peer_id: str, peer_data: dict) -> Tuple[str, List[dict]]:
+            headers = []
+            cursor = tip.height + 1
+            while cursor is not None and len(headers) < self.network.config["sync_max_headers"]:
+                started = time.monotonic()
+                page, cursor, nbytes = await self.network.fetch_page(
+                    peer_data, "/get_headers", "headers", cursor, self.network.config["header_page_size"])
+                if not page:
+                    break
+                self.network.peer_scorer.record_transfer(peer_id, nbytes, time.monotonic() - started)
+                headers.extend(page)
+            valid = self.validator.validate_suffix(headers, tip)
+            if valid < len(headers):
+                logger.warning(f"Peer {peer_id} sent {len(headers) - valid} headers that do not extend our tip")
+            return peer_id, headers[:valid]
+
+        results = await asyncio.gather(
+            *(collect(peer_id, peer_data) for peer_id, peer_data in peers.items()), return_exceptions=True)
+        return {
+            peer_id: headers for result in results
+            if not isinstance(result, Exception)
+            for peer_id, headers in [result] if headers
+        }
+
+    @staticmethod
+    def _common_prefix(headers: List[dict], best_headers: List[dict]) -> int:
+        count = 0
+        for ours, theirs in zip(headers, best_headers):
+            if ours["hash"] != theirs["hash"]:
+                break
+            count += 1
+        return count
+
+    async def _download(self, peers: Dict[str, dict], agreement: Dict[str, int],
+                        best_headers: List[dict], tip: TipState) -> bool:
+        tip_height = tip.height
+        window_size = self.network.config["sync_window_size"]
+        self._assigned = defaultdict(int)
+        slots = {
+            peer_id: asyncio.Semaphore(self.network.config["sync_parallel_per_peer"])
+            for peer_id in agreement
+        }
+        windows = iter([
+            (start, min(start + window_size, len(best_headers)))
+            for start in range(0, len(best_headers), window_size)
+        ])
+        # Windows download concurrently but are applied in order; the lookahead
+        # bounds how many downloaded windows can wait in memory
+        lookahead = len(slots) * self.network.config["sync_parallel_per_peer"] * 2
+        pending = deque()
+        rejected = set()  # peers that served invalid bodies this round
+
+        def fetch(window: Tuple[int, int]) -> asyncio.Task:
+            return asyncio.create_task(
+                self._download_window(peers, agreement, slots, best_headers, tip_height, *window, rejected))
+
+        def schedule() -> None:
+            while len(pending) < lookahead:
+                window = next(windows, None)
+                if window is None:
+                    return
+                pending.append((window, fetch(window)))
+
+        appended = 0
+        # Each window must extend the one applied before it, starting from the
+        # tip the headers were fetched for
+        parent = tip
+        schedule()
+        try:
+            while pending:
+                window, task = pending.popleft()
+                result = await task
+                if self.validator.tip().hash != parent.hash:
+                    # A block arrived by relay during the round; the windows are
+                    # still honest, they just no longer extend our tip
+                    logger.info("Local tip moved during sync, ending this round")
+                    break
+                while result is not None:
+                    peer_id, blocks = result
+                    if self.validator.validate_suffix(blocks, parent) == len(blocks):
+                        break
+                    # The bodies matched the header hashes but not their contents:
+                    # penalise the sender and ask another agreeing peer
+                    logger.warning(f"Blocks from height {blocks[0].index} sent by {peer_id} failed validation")
+                    self.network.peer_reputation.update_reputation(peer_id, 'invalid_block')
+                    self.network.peer_scorer.record_failure(peer_id)
+                    rejected.add(peer_id)
+                    result = await fetch(window)
+                if result is None:
+                    break
+                for block in blocks:
+                    if not await self.network.blockchain.add_block(block):
+                        logger.warning(f"Block {block.index} rejected during sync")
+                        return appended > 0
+                    appended += 1
+                parent = TipState(blocks[-1].hash, blocks[-1].index,
+                                  parent.cumulative_difficulty + self.validator.suffix_work(blocks))
+                self.progress.record_applied(len(blocks))
+                self.progress.publish()
+                schedule()
+        finally:
+            tasks = [task for _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if appended:
+            stats = self.progress.as_dict()
+            logger.info(f"Synced {appended} blocks at {stats['blocks_per_second']:.1f} blocks/s, "
+                        f"{stats['bytes_per_second'] / 1024:.1f} KiB/s")
+        return appended > 0
+
+    async def _download_window(self, peers: Dict[str, dict], agreement: Dict[str, int],
+                               slots: Dict[str, asyncio.Semaphore], best_headers: List[dict],
+                               tip_height: int, start: int, end: int,
+                               rejected: Set[str]) -> Optional[Tuple[str, List[Block]]]:
+        """Download one window of bodies, trying each eligible peer in turn.
+
+        Returns the serving peer with the blocks, or None if no peer could serve them.
+        """
+        eligible = [
+            peer_id for peer_id, agreed in agreement.items()
+            if agreed >= end and peer_id in peers and peer_id not in rejected
+        ]
+        # Spread windows across peers: start with the one with the fewest assigned
+        # windows, and among those the best-scored
+        scorer = self.network.peer_scorer
+        eligible.sort(key=lambda peer_id: (self._assigned[peer_id], -scorer.score(peer_id)))
+        for peer_id in eligible:
+            self._assigned[peer_id] += 1
+            try:
+                async with slots[peer_id]:
+                    blocks = await self._fetch_bodies(peers[peer_id], peer_id, best_headers, tip_height, start, end)
+            finally:
+                self._assigned[peer_id] -= 1
+            if blocks is not None:
+                return peer_id, blocks
+            logger.debug(f"Window {start}-{end} from {peer_id} failed, trying another peer")
+        logger.warning(f"No peer could serve blocks {tip_height + 1 + start}-{tip_height + end}")
+        return None
+
+    async def _fetch_bodies(self, peer_data: dict, peer_id: str, best_headers: List[dict],
+                            tip_height: int, start: int, end: int) -> Optional[List[Block]]:
+        blocks = []
+        position = start
+        while position < end:
+            started = time.monotonic()
+            page, _, nbytes = await self.network.fetch_page(
+                peer_data, "/get_chain", "blocks", tip_height + 1 + position, end - position)
+            if not page:
+                self.network.peer_scorer.record_failure(peer_id)
+                return None
+            elapsed = time.monotonic() - started
+            self.progress.record_download(peer_id, nbytes, elapsed)
+            self.network.peer_scorer.record_transfer(peer_id, nbytes, elapsed)
+            for block_data in page[:end - position]:
+                # Bodies must match the headers we already validated
+                if block_data.get("hash") != best_headers[position]["hash"]:
+                    logger.warning(f"Peer {peer_id} sent a block that does not match header {position + tip_height + 1}")
+                    self.network.peer_reputation.update_reputation(peer_id, 'invalid_block')
+                    return None
+                blocks.append(Block.from_dict(block_data))
+                position += 1
+        return blocks
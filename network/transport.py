@@ -0,0 +1,389 @@
+"""
+Persistent, multiplexed binary transport between peers.
+
+Each peer pair keeps one long-lived TLS connection, using the same SSL
+contexts as the HTTPS API, carrying length-prefixed msgpack frames. Requests carry an ID so many can be in flight at once, and
+a credit-based flow-control window stops a fast sender from flooding a
+slow receiver: request bytes are credited back only once handled. Requests
+are routed by the same paths as the HTTP API, so handlers are shared and
+HTTPS remains the fallback.
+
+Frames (msgpack maps, keyed by "type"):
+    hello   {node_id, nonce, window}        sent by both sides on connect
+    auth    {public_key, signature}         signature over peer nonce + own node_id
+    req     {id, path, data}                id None for one-way messages
+    res     {id, ok, data | status, error}
+    window  {credit}                        returns receive credit to the sender
+"""
+
+import asyncio
+import logging
+import os
+import ssl
+import struct
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+
+from utils import serialize, deserialize, TRANSPORT_BYTES
+
+logger = logging.getLogger("P2PTransport")
+
+FRAME_HEADER = struct.Struct(">I")
+HTTP_METHODS = (b"GET ", b"HEAD", b"POST", b"PUT ")
+
+
+class TransportError(Exception):
+    """Raised when a transport connection fails or misbehaves"""
+
+
+class PeerConnection:
+    """One authenticated, multiplexed connection to a peer"""
+
+    def __init__(self, transport: 'P2PTransport', reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 peer_id: str, send_window: int, outbound: bool = False):
+        self.transport = transport
+        self.reader = reader
+        self.writer = writer
+        self.peer_id = peer_id
+        self.outbound = outbound  # True if this node dialed the connection
+        self.closed = False
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._write_lock = asyncio.Lock()
+        # Bytes we may still send before the peer returns credit
+        self._send_window = send_window
+        self._send_credit = send_window
+        self._credit_available = asyncio.Event()
+        # Bytes consumed from the peer that we have not yet credited back
+        self._unacknowledged = 0
+        self._handlers = set()
+        self._read_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def request(self, path: str, data: dict, timeout: Optional[float] = None) -> Tuple[bool, Optional[dict]]:
+        """Send a request and wait for its response; mirrors send_with_retry's result"""
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        async def exchange() -> Tuple[bool, Optional[dict]]:
+            await self._send({"type": "req", "id": request_id, "path": path, "data": data}, counted=True)
+            return await future
+        try:
+            # The timeout covers waiting for window credit as well as the response
+            return await asyncio.wait_for(exchange(), timeout or self.transport.request_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def notify(self, path: str, data: dict) -> None:
+        """Send a one-way message; no response is sent back"""
+        await self._send({"type": "req", "id": None, "path": path, "data": data}, counted=True)
+
+    async def _send(self, frame: dict, counted: bool = False) -> None:
+        body = serialize(frame)
+        if len(body) > self.transport.max_frame_size:
+            raise TransportError(f"Frame of {len(body)} bytes exceeds the maximum frame size")
+        if counted:
+            # The peer returns credit only once half its window is unacknowledged,
+            # so up to half can stay outstanding: larger frames could wait forever
+            if len(body) > self._send_window // 2:
+                raise TransportError(f"Frame of {len(body)} bytes exceeds half the peer's window")
+            # Backpressure: wait until the peer has room for this frame
+            while self._send_credit < len(body):
+                if self.closed:
+                    raise TransportError("Connection closed")
+                self._credit_available.clear()
+                await self._credit_available.wait()
+            self._send_credit -= len(body)
+        if self.closed:
+            raise TransportError("Connection closed")
+        async with self._write_lock:
+            self.writer.write(FRAME_HEADER.pack(len(body)) + body)
+            await self.writer.drain()
+        self.transport.count_bytes("sent", FRAME_HEADER.size + len(body))
+
+    async def _consumed(self, size: int) -> None:
+        """Return credit for a processed frame once enough has accumulated"""
+        self._unacknowledged += size
+        if self._unacknowledged >= self.transport.window_size // 2:
+            credit, self._unacknowledged = self._unacknowledged, 0
+            await self._send({"type": "window", "credit": credit})
+
+    async def _read_loop(self) -> None:
+        try:
+            while not self.closed:
+                frame, size = await self.transport.read_frame(self.reader)
+                frame_type = frame.get("type")
+                if frame_type == "req":
+                    task = asyncio.create_task(self._handle_request(frame, size))
+                    self._handlers.add(task)
+                    task.add_done_callback(self._handlers.discard)
+                elif frame_type == "res":
+                    future = self._pending.get(frame.get("id"))
+                    if future is not None and not future.done():
+                        future.set_result((True, frame.get("data")) if frame.get("ok") else (False, None))
+                elif frame_type == "window":
+                    self._send_credit += int(frame.get("credit", 0))
+                    self._credit_available.set()
+                else:
+                    raise TransportError(f"Unexpected frame type {frame_type!r}")
+        except (asyncio.IncompleteReadError, ConnectionError, TransportError) as e:
+            logger.debug(f"Connection to {self.peer_id} ended: {e}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading from {self.peer_id}: {e}")
+        finally:
+            await self.close()
+
+    async def _handle_request(self, frame: dict, size: int) -> None:
+        request_id = frame.get("id")
+        handler = self.transport.handlers.get(frame.get("path"))
+        response = {"type": "res", "id": request_id, "ok": False}
+        try:
+            if handler is None:
+                response.update(status=404, error="Unknown path")
+            else:
+                response.update(ok=True, data=await handler(self.peer_id, frame.get("data") or {}))
+        except web.HTTPException as e:
+            response.update(status=e.status, error=e.text)
+        except Exception as e:
+            logger.error(f"Error handling {frame.get('path')} from {self.peer_id}: {e}")
+            response.update(status=500, error=str(e))
+        try:
+            # Responses are not charged against the window, so two peers with
+            # full windows can always answer each other and release credit
+            if request_id is not None:
+                await self._send(response)
+            await self._consumed(size)
+        except (ConnectionError, TransportError):
+            pass
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._credit_available.set()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result((False, None))
+        for task in list(self._handlers):
+            task.cancel()
+        if self._read_task is not None and self._read_task is not asyncio.current_task():
+            self._read_task.cancel()
+        self.transport.forget(self)
+        try:
+            self.writer.close()
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class P2PTransport:
+    """Accepts and opens persistent peer connections for a BlockchainNetwork"""
+
+    def __init__(self, network, window_size: int = 8 * 1024 * 1024, max_frame_size: int = 4 * 1024 * 1024,
+                 request_timeout: float = 30.0, connect_timeout: float = 5.0, retry_interval: float = 60.0):
+        self.network = network
+        self.window_size = window_size
+        # Frames are capped at half the window, see PeerConnection._send
+        self.max_frame_size = min(max_frame_size, window_size // 2)
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.retry_interval = retry_interval
+        self.handlers: Dict[str, Callable[[str, dict], Awaitable[dict]]] = {}
+        self.connections: Dict[str, PeerConnection] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._connect_locks: Dict[str, asyncio.Lock] = {}
+        self._failed_at: Dict[str, float] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.frames_sent = 0
+        self.frames_received = 0
+
+    def count_bytes(self, direction: str, nbytes: int) -> None:
+        """Account one frame of ``nbytes`` sent or received"""
+        if direction == "sent":
+            self.bytes_sent += nbytes
+            self.frames_sent += 1
+        else:
+            self.bytes_received += nbytes
+            self.frames_received += 1
+        TRANSPORT_BYTES.labels(instance=self.network.node_id, direction=direction).inc(nbytes)
+
+    async def serve(self, host: str, port: int, ssl_context: Optional[ssl.SSLContext] = None) -> asyncio.AbstractServer:
+        """Listen for peer connections, wrapped in TLS with ``ssl_context``"""
+        if ssl_context is None:
+            logger.warning("P2P transport listening without TLS; peers will fall back to HTTPS")
+        self.server = await asyncio.start_server(
+            self.handle_connection, host, port, ssl=ssl_context,
+            ssl_handshake_timeout=self.connect_timeout if ssl_context is not None else None)
+        return self.server
+
+    async def read_frame(self, reader: asyncio.StreamReader, header: Optional[bytes] = None) -> Tuple[dict, int]:
+        """Read one length-prefixed frame with exact reads"""
+        if header is None:
+            header = await reader.readexactly(FRAME_HEADER.size)
+        (length,) = FRAME_HEADER.unpack(header)
+        if length > self.max_frame_size:
+            raise TransportError(f"Frame of {length} bytes exceeds the maximum frame size")
+        frame = deserialize(await reader.readexactly(length))
+        self.count_bytes("received", FRAME_HEADER.size + length)
+        if not isinstance(frame, dict):
+            raise TransportError("Frame is not a map")
+        return frame, length
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Accept an inbound connection: a peer transport or a plain HTTP health check"""
+        peer_address = writer.get_extra_info('peername')
+        client_ip = peer_address[0] if peer_address else 'unknown'
+        monitor = self.network.security_monitor
+        try:
+            if monitor and not await monitor.monitor_connection(client_ip):
+                logger.warning(f"Connection rejected from {client_ip} by security monitor")
+                writer.close()
+                return
+            header = await asyncio.wait_for(reader.readexactly(FRAME_HEADER.size), self.connect_timeout)
+            if header in HTTP_METHODS:
+                await self._answer_http(header, reader, writer)
+                return
+            connection = await asyncio.wait_for(self._handshake(reader, writer, header=header), self.connect_timeout)
+            logger.info(f"Accepted transport connection from {connection.peer_id} at {client_ip}")
+        except Exception as e:
+            logger.debug(f"Rejected transport connection from {client_ip}: {e}")
+            if monitor:
+                await monitor.record_failed_attempt(client_ip, 'connection_error')
+            writer.close()
+
+    async def _answer_http(self, method: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve GET /health so the port keeps working for health checks"""
+        try:
+            request = method + await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.connect_timeout)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            request = method
+        request_line = request.split(b"\r\n", 1)[0].split()
+        if len(request_line) >= 2 and request_line[0] == b"GET" and request_line[1] == b"/health":
+            status, body = b"200 OK", b"OK"
+        else:
+            status, body = b"404 Not Found", b"Not Found"
+        writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain\r\nContent-Length: "
+                     + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+        await writer.drain()
+        writer.close()
+
+    async def _handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         header: Optional[bytes] = None, expected_peer: Optional[str] = None) -> PeerConnection:
+        """Exchange hello/auth frames and return the authenticated connection.
+
+        Each side signs the other's random nonce followed by its own node ID,
+        and must be a known peer whose stored public key verifies it.
+        """
+        network = self.network
+        nonce = os.urandom(16)
+        hello = serialize({"type": "hello", "node_id": network.node_id, "nonce": nonce, "window": self.window_size})
+        writer.write(FRAME_HEADER.pack(len(hello)) + hello)
+        await writer.drain()
+
+        peer_hello, _ = await self.read_frame(reader, header)
+        peer_id = peer_hello.get("node_id")
+        if peer_hello.get("type") != "hello" or not isinstance(peer_hello.get("nonce"), bytes):
+            raise TransportError("Expected hello frame")
+        if expected_peer is not None and peer_id != expected_peer:
+            raise TransportError(f"Connected to {peer_id}, expected {expected_peer}")
+        peer_data = network.peers.get(peer_id)
+        if peer_data is None:
+            raise TransportError(f"Unknown peer {peer_id}")
+
+        auth = serialize({
+            "type": "auth",
+            "public_key": network.public_key,
+            "signature": network.signing_key.sign(peer_hello["nonce"] + network.node_id.encode())
+        })
+        writer.write(FRAME_HEADER.pack(len(auth)) + auth)
+        await writer.drain()
+
+        peer_auth, _ = await self.read_frame(reader)
+        if peer_auth.get("type") != "auth" or peer_auth.get("public_key") != peer_data.get("public_key"):
+            raise TransportError(f"Peer {peer_id} did not authenticate with its known key")
+        message = nonce + peer_id.encode()
+        if not await network.signature_verifier.verify(peer_data["public_key"], peer_auth.get("signature", b""), message, peer_id):
+            raise TransportError(f"Invalid transport signature from {peer_id}")
+
+        connection = PeerConnection(self, reader, writer, peer_id, int(peer_hello.get("window", 0)),
+                                    outbound=expected_peer is not None)
+        previous = self.connections.get(peer_id)
+        if previous is not None and not previous.closed and not self._replaces(connection, previous):
+            logger.debug(f"Keeping the existing connection to {peer_id}, dialed by {self._dialer(previous)}")
+            await connection.close()
+            return previous
+        self.connections[peer_id] = connection
+        if previous is not None:
+            asyncio.create_task(previous.close())
+        connection.start()
+        return connection
+
+    def _dialer(self, connection: PeerConnection) -> str:
+        return self.network.node_id if connection.outbound else connection.peer_id
+
+    def _replaces(self, new: PeerConnection, old: PeerConnection) -> bool:
+        """Whether a new connection to a peer replaces the open one.
+
+        A connection dialed from the same side as the old one is a reconnect
+        and replaces it. When both sides dial at once, both keep the
+        connection dialed by the lower node ID, so exactly one survives.
+        """
+        if new.outbound == old.outbound:
+            return True
+        return self._dialer(new) < self._dialer(old)
+
+    async def connect(self, peer_id: str, host: str, port: int) -> Optional[PeerConnection]:
+        """Return an open connection to a peer, dialing it if needed.
+
+        Failed peers are not redialed for ``retry_interval`` seconds, so
+        callers fall back to HTTPS cheaply.
+        """
+        connection = self.connections.get(peer_id)
+        if connection is not None and not connection.closed:
+            return connection
+        if time.monotonic() - self._failed_at.get(peer_id, float("-inf")) < self.retry_interval:
+            return None
+        lock = self._connect_locks.setdefault(peer_id, asyncio.Lock())
+        async with lock:
+            connection = self.connections.get(peer_id)
+            if connection is not None and not connection.closed:
+                return connection
+            writer = None
+            try:
+                # Always dial with TLS, so peer traffic is never sent in the clear
+                if self.network.client_ssl_context is None:
+                    raise TransportError("No TLS context to dial with")
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port, ssl=self.network.client_ssl_context), self.connect_timeout)
+                connection = await asyncio.wait_for(
+                    self._handshake(reader, writer, expected_peer=peer_id), self.connect_timeout)
+                self._failed_at.pop(peer_id, None)
+                logger.info(f"Opened transport connection to {peer_id} at {host}:{port}")
+                return connection
+            except Exception as e:
+                logger.debug(f"Transport connection to {peer_id} failed, using HTTPS: {e}")
+                self._failed_at[peer_id] = time.monotonic()
+                if writer is not None:
+                    writer.close()
+                return None
+
+    def forget(self, connection: PeerConnection) -> None:
+        if self.connections.get(connection.peer_id) is connection:
+            del self.connections[connection.peer_id]
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        await asyncio.gather(*(connection.close() for connection in list(self.connections.values())),
+                             return_exceptions=True)
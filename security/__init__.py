@@ -4,5 +4,7 @@ print("security/__init__.py being imported from:", os.getcwd())
 from .monitor import SecurityMonitor
 from .mfa import MFAManager
 from .backup import KeyBackupManager
+from .rate_limiter import GCRALimiter
+from .sketches import CountMinSketch, RingCounter, TimerWheel
 
-__all__ = ['SecurityMonitor', 'MFAManager', 'KeyBackupManager'] 
\ No newline at end of file
+__all__ = ['SecurityMonitor', 'MFAManager', 'KeyBackupManager', 'GCRALimiter', 'CountMinSketch', 'RingCounter', 'TimerWheel'] 
\ No newline at end of file
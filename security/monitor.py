@@ -1,68 +1,121 @@
-from collections import defaultdict
+from collections import OrderedDict
 import time
 import logging
-from typing import Dict, List, Set
+from typing import Callable, Dict, List, Tuple
 import asyncio
 
+from .rate_limiter import GCRALimiter
+from .sketches import CountMinSketch, RingCounter, TimerWheel
+
 logger = logging.getLogger(__name__)
 
 class SecurityMonitor:
-    def __init__(self):
-        self.suspicious_ips: Set[str] = set()
-        self.failed_attempts: Dict[str, List[float]] = defaultdict(list)
-        self.blocked_ips: Set[str] = set()
-        self.connection_history: Dict[str, List[float]] = defaultdict(list)
-        self._running = False
-        
+    """Per-IP connection and failure tracking in bounded memory.
+
+    Failed attempts are counted in fixed-size ring counters held in LRU
+    order, connection volume goes into a count-min sketch for heavy-hitter
+    detection, and blocks expire through a timer wheel, so no periodic task
+    scans every IP.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+
         # Configure thresholds
         self.FAILED_ATTEMPT_WINDOW = 300  # 5 minutes
         self.MAX_FAILED_ATTEMPTS = 10  # Increased threshold
         self.CONNECTION_RATE_WINDOW = 60  # 1 minute
         self.MAX_CONNECTIONS_PER_WINDOW = 50  # Increased threshold
         self.BLOCK_DURATION = 300  # 5 minutes block duration
-        
+        self.MAX_TRACKED_IPS = 100000
+        self.HEAVY_HITTER_SHARE = 0.05  # Share of all recent connections that marks an IP
+        self.HEAVY_HITTER_MIN = 5 * self.MAX_CONNECTIONS_PER_WINDOW
+        self.HEAVY_HITTER_CANDIDATES = 100
+        self.ANALYSIS_INTERVAL = 60
+
+        self.suspicious_ips: "OrderedDict[str, float]" = OrderedDict()  # ip -> time flagged
+        self.failed_attempts: "OrderedDict[str, RingCounter]" = OrderedDict()
+        self.blocked_ips: Dict[str, float] = {}  # ip -> time the block ends
+        self.block_expiry = TimerWheel(tick=1.0, slots=512)
+        # Connection counts per IP, halved every analysis interval
+        self.connection_sketch = CountMinSketch()
+        self.heavy_hitters: Dict[str, int] = {}  # ip -> estimated recent connections
+        self.connection_limiter = GCRALimiter(
+            self.MAX_CONNECTIONS_PER_WINDOW, self.CONNECTION_RATE_WINDOW, max_keys=self.MAX_TRACKED_IPS,
+            clock=clock)
+        self._running = False
+
     async def monitor_connection(self, ip: str) -> bool:
         """Returns True if connection should be allowed"""
-        current_time = time.time()
-        
+        current_time = self.clock()
+        self._track_connection(ip)
+
         # Clean up old blocks
-        if ip in self.blocked_ips:
-            block_time = self.blocked_ips[ip]
-            if current_time - block_time > self.BLOCK_DURATION:
-                self.blocked_ips.remove(ip)
-                self.failed_attempts[ip] = []  # Reset failed attempts
-                
+        self._expire_blocks(current_time)
+
         if ip in self.blocked_ips:
             logger.warning(f"Blocked connection attempt from {ip}")
             return False
-            
-        self.connection_history[ip].append(current_time)
-        
-        # Clean old connection history
-        self.connection_history[ip] = [t for t in self.connection_history[ip] 
-                                     if current_time - t <= self.CONNECTION_RATE_WINDOW]
-        
+
         # Check connection rate
-        if len(self.connection_history[ip]) > self.MAX_CONNECTIONS_PER_WINDOW:
+        if not self.connection_limiter.allow(ip):
             logger.warning(f"Rate limit exceeded for {ip}")
-            self.suspicious_ips.add(ip)
+            self._flag(ip, current_time)
             return False
-            
+
         return True
-        
+
     async def record_failed_attempt(self, ip: str, attempt_type: str):
         """Record failed authentication or validation attempts"""
-        current_time = time.time()
-        self.failed_attempts[ip].append(current_time)
-        
-        # Clean old attempts
-        self.failed_attempts[ip] = [t for t in self.failed_attempts[ip] 
-                                  if current_time - t <= self.FAILED_ATTEMPT_WINDOW]
-        
-        if len(self.failed_attempts[ip]) >= self.MAX_FAILED_ATTEMPTS:
-            logger.error(f"Multiple failed attempts from {ip}, blocking")
-            self.blocked_ips.add(ip)
-            
+        current_time = self.clock()
+        counter = self.failed_attempts.get(ip)
+        if counter is None:
+            counter = self.failed_attempts[ip] = RingCounter(self.FAILED_ATTEMPT_WINDOW)
+            if len(self.failed_attempts) > self.MAX_TRACKED_IPS:
+                self.failed_attempts.popitem(last=False)
+        else:
+            self.failed_attempts.move_to_end(ip)
+
+        if counter.add(current_time) >= self.MAX_FAILED_ATTEMPTS and ip not in self.blocked_ips:
+            logger.error(f"Multiple failed attempts from {ip} ({attempt_type}), blocking")
+            self.block(ip, self.BLOCK_DURATION)
+
+    def block(self, ip: str, duration: float) -> None:
+        """Refuse connections from ``ip`` for ``duration`` seconds"""
+        until = self.clock() + duration
+        self.blocked_ips[ip] = until
+        self.block_expiry.schedule(ip, until)
+
+    def _expire_blocks(self, current_time: float) -> None:
+        for ip in self.block_expiry.advance(current_time):
+            # A later block for the same IP has its own, later deadline
+            until = self.blocked_ips.get(ip)
+            if until is not None and until <= current_time:
+                del self.blocked_ips[ip]
+                self.failed_attempts.pop(ip, None)  # Reset failed attempts
+
+    def _flag(self, ip: str, current_time: float) -> None:
+        self.suspicious_ips[ip] = current_time
+        self.suspicious_ips.move_to_end(ip)
+        if len(self.suspicious_ips) > self.MAX_TRACKED_IPS:
+            self.suspicious_ips.popitem(last=False)
+
+    def _track_connection(self, ip: str) -> None:
+        estimate = self.connection_sketch.add(ip)
+        threshold = max(self.HEAVY_HITTER_MIN, self.HEAVY_HITTER_SHARE * self.connection_sketch.total)
+        if estimate < threshold:
+            return
+        if ip not in self.heavy_hitters:
+            logger.warning(f"Heavy hitter {ip}: about {estimate} recent connections")
+            self._flag(ip, self.clock())
+        self.heavy_hitters[ip] = estimate
+        if len(self.heavy_hitters) > self.HEAVY_HITTER_CANDIDATES:
+            del self.heavy_hitters[min(self.heavy_hitters, key=self.heavy_hitters.get)]
+
+    def top_talkers(self, count: int = 10) -> List[Tuple[str, int]]:
+        """IPs with the most recent connections, with their estimated counts"""
+        return sorted(self.heavy_hitters.items(), key=lambda item: item[1], reverse=True)[:count]
+
     async def start(self):
         """Start the security monitoring"""
         if not self._running:
@@ -71,20 +124,15 @@ class SecurityMonitor:
 
     async def analyze_patterns(self):
         """Periodic analysis of security patterns"""
+        self._running = True
         while self._running:
             try:
-                current_time = time.time()
-                
-                # Analyze connection patterns
-                for ip, connections in self.connection_history.items():
-                    recent_connections = len([t for t in connections 
-                                           if current_time - t <= 60])
-                    if recent_connections > self.MAX_CONNECTIONS_PER_WINDOW:
-                        logger.warning(f"Suspicious connection pattern from {ip}")
-                        self.suspicious_ips.add(ip)
-                
-                await asyncio.sleep(60)  # Run analysis every minute
-                
+                # Connection rate violations and heavy hitters are flagged as
+                # they happen; here we only compact state
+                await self.cleanup_old_data()
+
+                await asyncio.sleep(self.ANALYSIS_INTERVAL)  # Run analysis every minute
+
             except Exception as e:
                 logger.error(f"Error in security pattern analysis: {e}")
                 await asyncio.sleep(5)  # Wait before retrying
@@ -95,11 +143,24 @@ class SecurityMonitor:
 
     async def cleanup_old_data(self):
         """Clean up old security data"""
-        current_time = time.time()
-        
-        # Clean up connection history older than 1 hour
-        for ip in list(self.connection_history.keys()):
-            self.connection_history[ip] = [t for t in self.connection_history[ip] 
-                                         if current_time - t <= 3600]
-            if not self.connection_history[ip]:
-                del self.connection_history[ip]
+        current_time = self.clock()
+        self._expire_blocks(current_time)
+        self.connection_limiter.evict_idle()
+
+        # Age the sketch so heavy hitters reflect recent traffic
+        self.connection_sketch.decay()
+        threshold = max(self.HEAVY_HITTER_MIN, self.HEAVY_HITTER_SHARE * self.connection_sketch.total)
+        estimates = {ip: self.connection_sketch.estimate(ip) for ip in self.heavy_hitters}
+        self.heavy_hitters = {ip: estimate for ip, estimate in estimates.items() if estimate >= threshold}
+
+        # Least recently failing IPs sit at the front; stop at the first still active
+        while self.failed_attempts:
+            ip, counter = next(iter(self.failed_attempts.items()))
+            if counter.count(current_time):
+                break
+            del self.failed_attempts[ip]
+        while self.suspicious_ips:
+            ip, flagged = next(iter(self.suspicious_ips.items()))
+            if current_time - flagged <= self.BLOCK_DURATION:
+                break
+            del self.suspicious_ips[ip]
@@ -0,0 +1,87 @@
+"""
+Constant-time rate limiting with bounded memory.
+
+GCRALimiter implements the generic cell rate algorithm, which behaves like
+a token bucket refilled continuously: ``rate`` requests per ``period`` with
+bursts of up to ``burst``. Each key costs one stored float, the theoretical
+arrival time (TAT) of its next request, so a check is O(1) and there is no
+per-window reset. Keys are kept in LRU order and capped at ``max_keys``.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class GCRALimiter:
+    """Sliding-window limiter: ``rate`` requests per ``period`` seconds per key"""
+
+    def __init__(self, rate: float, period: float, burst: Optional[int] = None, max_keys: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or period <= 0:
+            raise ValueError("rate and period must be positive")
+        self.emission_interval = period / rate
+        self.burst = burst if burst is not None else max(int(rate), 1)
+        # How far ahead of now a key's TAT may run before requests are refused
+        self.capacity = self.emission_interval * self.burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tat = OrderedDict()  # key -> theoretical arrival time
+        self._lock = threading.Lock()
+
+    def allow(self, key: Hashable, cost: int = 1) -> bool:
+        """Consume ``cost`` requests for ``key``; False if that would exceed the limit"""
+        now = self.clock()
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + self.emission_interval * cost
+            if new_tat - now > self.capacity:
+                return False
+            self._tat[key] = new_tat
+            self._tat.move_to_end(key)
+            if len(self._tat) > self.max_keys:
+                self._evict(now)
+            return True
+
+    def retry_after(self, key: Hashable, cost: int = 1) -> float:
+        """Seconds until ``cost`` requests for ``key`` would be allowed"""
+        now = self.clock()
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+        return max(tat + self.emission_interval * cost - self.capacity - now, 0.0)
+
+    def remaining(self, key: Hashable) -> int:
+        """Requests ``key`` could make right now"""
+        now = self.clock()
+        with self._lock:
+            tat = max(self._tat.get(key, now), now)
+        return int((self.capacity - (tat - now)) / self.emission_interval + 1e-9)
+
+    def reset(self, key: Hashable) -> None:
+        with self._lock:
+            self._tat.pop(key, None)
+
+    def evict_idle(self) -> int:
+        """Drop keys whose bucket has fully refilled; returns how many were dropped"""
+        now = self.clock()
+        with self._lock:
+            return self._evict(now, limit=None)
+
+    def _evict(self, now: float, limit: Optional[int] = 1) -> int:
+        # An idle key (TAT in the past) behaves exactly like an unknown key, so
+        # dropping it loses nothing. Idle keys cluster at the LRU end.
+        dropped = 0
+        while self._tat:
+            key, tat = next(iter(self._tat.items()))
+            if tat > now and len(self._tat) <= self.max_keys:
+                break
+            # Over capacity with only active keys left: forget the least recently used
+            del self._tat[key]
+            dropped += 1
+            if limit is not None and dropped >= limit and len(self._tat) <= self.max_keys:
+                break
+        return dropped
+
+    def __len__(self) -> int:
+        return len(self._tat)
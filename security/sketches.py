@@ -0,0 +1,124 @@
+"""
+Fixed-size counting structures for tracking many IPs in bounded memory.
+
+RingCounter counts events in a sliding window using a ring of time slots.
+CountMinSketch estimates per-key counts in a fixed table, which makes it
+cheap to spot heavy hitters among any number of keys. TimerWheel holds
+deadlines in slots so that expiring them costs time proportional to the
+number that are due.
+"""
+
+from typing import Hashable, List, Tuple
+
+
+class RingCounter:
+    """Events in the last ``window`` seconds, counted in ``slots`` slots"""
+
+    __slots__ = ("slot_width", "counts", "last_slot", "total")
+
+    def __init__(self, window: float, slots: int = 10):
+        self.slot_width = window / slots
+        self.counts = [0] * slots
+        self.last_slot = None
+        self.total = 0
+
+    def _advance(self, now: float) -> int:
+        slot = int(now // self.slot_width)
+        if self.last_slot is None:
+            self.last_slot = slot
+        elif slot > self.last_slot:
+            # Clear the slots that fell out of the window, at most one full turn
+            for stale in range(self.last_slot + 1, min(slot, self.last_slot + len(self.counts)) + 1):
+                index = stale % len(self.counts)
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+            self.last_slot = slot
+        return slot
+
+    def add(self, now: float, count: int = 1) -> int:
+        """Record ``count`` events at ``now``; returns the count in the window"""
+        slot = self._advance(now)
+        self.counts[slot % len(self.counts)] += count
+        self.total += count
+        return self.total
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+class CountMinSketch:
+    """Approximate counts for any number of keys in ``width * depth`` counters.
+
+    Estimates never undercount; with the default size they overcount by at
+    most about 0.1% of the total with high probability. ``decay`` halves
+    every counter, so old traffic fades out without tracking time per key.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows: List[List[int]] = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        # str hashes are salted per process, so collisions cannot be planned
+        return [hash((row, key)) % self.width for row in range(self.depth)]
+
+    def add(self, key: Hashable, count: int = 1) -> int:
+        """Add ``count`` to ``key``; returns its new estimate"""
+        self.total += count
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def decay(self) -> None:
+        for row in self.rows:
+            row[:] = [value >> 1 for value in row]
+        self.total >>= 1
+
+
+class TimerWheel:
+    """Keys scheduled to expire at a deadline, kept in ``slots`` slots of ``tick`` seconds"""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self.slots: List[List[Tuple[float, Hashable]]] = [[] for _ in range(slots)]
+        self.swept = None  # Last tick whose slot has been swept
+        self.size = 0
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        tick = int(deadline // self.tick)
+        if self.swept is not None:
+            # A deadline already passed goes in the next slot to be swept
+            tick = max(tick, self.swept + 1)
+        self.slots[tick % len(self.slots)].append((deadline, key))
+        self.size += 1
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Pop every key due by ``now``, up to one tick late"""
+        target = int(now // self.tick)
+        if self.swept is None:
+            self.swept = target - len(self.slots) - 1
+        due = []
+        # Sweep each tick completed since the last call, at most one full turn
+        for tick in range(max(self.swept + 1, target - len(self.slots)), target):
+            slot = self.slots[tick % len(self.slots)]
+            if not slot:
+                continue
+            # Deadlines a full turn or more ahead share the slot and stay
+            pending = [entry for entry in slot if entry[0] > now]
+            due.extend(key for deadline, key in slot if deadline <= now)
+            self.size -= len(slot) - len(pending)
+            slot[:] = pending
+        self.swept = max(self.swept, target - 1)
+        return due
+
+    def __len__(self) -> int:
+        return self.size
@@ -40,6 +40,7 @@ REQUIRES = [
 EXTRAS_REQUIRE = {
     'dev': ['pytest>=7.0.0', 'pytest-asyncio>=0.20.0', 'pytest-cov>=4.0.0', 'black>=23.0.0', 'isort>=5.12.0', 'mypy>=1.0.0'],
     'gpu': ['cuda-python>=12.0.0; platform_system=="Linux" or platform_system=="Windows"'],
+    'compression': ['zstandard>=0.21.0'],
 }
 
 class CMakeExtension(Extension):
@@ -4,7 +4,7 @@ import ecdsa
 import hashlib
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -14,7 +14,7 @@ from dotenv import load_dotenv
 import logging
 import time
 import random
-from prometheus_client import REGISTRY, Counter, Gauge, CollectorRegistry, GC_COLLECTOR, PLATFORM_COLLECTOR, PROCESS_COLLECTOR
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, CollectorRegistry, GC_COLLECTOR, PLATFORM_COLLECTOR, PROCESS_COLLECTOR
 import getpass
 
 try:
@@ -188,6 +188,23 @@ class SecurityUtils:
             logger.error(f"Failed to convert public key to address: {e}")
             raise
 
+    @staticmethod
+    def public_key_to_address_many(public_keys: List[str], threads: int = 1) -> List[Optional[str]]:
+        """Addresses for many public keys in one call; None for keys that cannot be converted."""
+        addresses: List[Optional[str]] = [None] * len(public_keys)
+        if CPP_ACCELERATED:
+            positions = [i for i, public_key in enumerate(public_keys) if isinstance(public_key, str)]
+            derived = blockchain_cpp.public_key_to_address_many([public_keys[i] for i in positions], threads=threads)
+            for position, address in zip(positions, derived):
+                addresses[position] = address
+            return addresses
+        for position, public_key in enumerate(public_keys):
+            try:
+                addresses[position] = SecurityUtils.public_key_to_address(public_key)
+            except Exception:
+                pass
+        return addresses
+
 def generate_wallet() -> Dict[str, str]:
     """Generate a wallet with private key, public key, and address."""
     try:
@@ -243,10 +260,10 @@ async def find_available_port_async(start_port: int = 1024, end_port: int = 6553
         logger.error(f"Error finding available port: {e}")
         raise
 
-def safe_gauge(name: str, description: str, registry=BLOCKCHAIN_REGISTRY) -> Gauge:
+def safe_gauge(name: str, description: str, registry=BLOCKCHAIN_REGISTRY, labelnames=('instance',)) -> Gauge:
     """Safely create or get a Gauge metric with labels"""
     try:
-        return Gauge(name, description, labelnames=['instance'], registry=registry)
+        return Gauge(name, description, labelnames=list(labelnames), registry=registry)
     except ValueError:
         # If metric already exists, get it from registry
         for collector in registry._names_to_collectors.values():
@@ -254,10 +271,23 @@ def safe_gauge(name: str, description: str, registry=BLOCKCHAIN_REGISTRY) -> Gau
                 return collector
         raise  # Re-raise if we can't find it
 
-def safe_counter(name: str, description: str, registry=BLOCKCHAIN_REGISTRY) -> Counter:
+def safe_counter(name: str, description: str, registry=BLOCKCHAIN_REGISTRY, labelnames=('instance',)) -> Counter:
     """Safely create or get a Counter metric with labels"""
     try:
-        return Counter(name, description, labelnames=['instance'], registry=registry)
+        return Counter(name, description, labelnames=list(labelnames), registry=registry)
+    except ValueError:
+        # If metric already exists, get it from registry
+        for collector in registry._names_to_collectors.values():
+            if hasattr(collector, 'name') and collector.name == name:
+                return collector
+        raise  # Re-raise if we can't find it
+
+
+def safe_histogram(name: str, description: str, registry=BLOCKCHAIN_REGISTRY, labelnames=('instance',),
+                   buckets=Histogram.DEFAULT_BUCKETS) -> Histogram:
+    """Safely create or get a Histogram metric with labels"""
+    try:
+        return Histogram(name, description, labelnames=list(labelnames), registry=registry, buckets=buckets)
     except ValueError:
         # If metric already exists, get it from registry
         for collector in registry._names_to_collectors.values():
@@ -279,6 +309,26 @@ BLOCKS_MINED = safe_counter('blocks_mined_total', 'Total number of blocks mined'
 PEER_COUNT = safe_gauge('peer_count', 'Number of connected peers')
 BLOCK_HEIGHT = safe_gauge('blockchain_height', 'Current height of the blockchain')
 ACTIVE_REQUESTS = safe_gauge('active_peer_requests', 'Number of active requests to peers')
+CONNECTION_POOL_SIZE = safe_gauge('peer_connection_pool_size', 'Number of pooled (idle and in-use) peer connections')
+CONNECTION_REUSE_RATIO = safe_gauge('peer_connection_reuse_ratio', 'Fraction of peer requests served by a reused keep-alive connection')
+HANDSHAKE_LATENCY = safe_gauge('peer_handshake_latency_seconds', 'Latency of the most recent TCP/TLS connection setup to a peer')
+SYNC_BLOCKS_PER_SECOND = safe_gauge('sync_blocks_per_second', 'Blocks applied per second during chain sync')
+SYNC_BYTES_PER_SECOND = safe_gauge('sync_bytes_per_second', 'Block payload bytes downloaded per second during chain sync')
+BROADCAST_QUEUE_DEPTH = safe_histogram('broadcast_queue_depth', 'Broadcast lane depth observed when a message is queued', labelnames=('instance', 'lane'), buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+BROADCAST_LATENCY = safe_histogram('broadcast_latency_seconds', 'Time from queueing a broadcast until it has been sent to all peers', labelnames=('instance', 'lane'))
+INVENTORY_ANNOUNCED = safe_counter('inventory_announced_total', 'Inventory hashes announced to this node', labelnames=('instance', 'kind', 'status'))
+INVENTORY_DUPLICATES = safe_counter('inventory_duplicates_total', 'Full block/transaction bodies received that this node already had', labelnames=('instance', 'kind'))
+COMPACT_BLOCKS = safe_counter('compact_blocks_received_total', 'Compact blocks received, by how they were rebuilt', labelnames=('instance', 'result'))
+COMPACT_BLOCK_MISSING_TXS = safe_counter('compact_block_missing_transactions_total', 'Transactions requested with /getblocktxn to complete compact blocks')
+SYNC_PEER_THROUGHPUT = safe_gauge('sync_peer_bytes_per_second', 'Block download throughput per peer during chain sync', labelnames=('instance', 'peer'))
+PEER_SCORE = safe_gauge('peer_score', 'Selection score of a peer from latency, bandwidth, failures and reputation', labelnames=('instance', 'peer'))
+PEER_RTT = safe_gauge('peer_rtt_seconds', 'Smoothed round-trip time of requests to a peer', labelnames=('instance', 'peer'))
+PEER_BANDWIDTH = safe_gauge('peer_bandwidth_bytes_per_second', 'Smoothed download throughput from a peer', labelnames=('instance', 'peer'))
+PEER_FAILURE_RATE = safe_gauge('peer_failure_rate', 'Smoothed fraction of failed requests to a peer', labelnames=('instance', 'peer'))
+TRANSPORT_BYTES = safe_counter('transport_bytes_total', 'Bytes carried by persistent peer connections, frame headers included', labelnames=('instance', 'direction'))
+SCHEDULER_JOB_SECONDS = safe_histogram('scheduler_job_seconds', 'Run time of a periodic network job', labelnames=('instance', 'job'))
+SCHEDULER_JOB_RUNS = safe_counter('scheduler_job_runs_total', 'Periodic job ticks by outcome (ok, error, timeout, skipped)', labelnames=('instance', 'job', 'status'))
+SCHEDULER_JOB_INTERVAL = safe_gauge('scheduler_job_interval_seconds', 'Current interval of a periodic network job', labelnames=('instance', 'job'))
 
 def get_secure_password(provided_password: str = None) -> str:
     if provided_password:
@@ -292,7 +342,7 @@ def get_secure_password(provided_password: str = None) -> str:
 
 # New utils/serialization.py
 import msgpack
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 def serialize(data: Any) -> bytes:
     """Serialize data using msgpack for network transmission"""
@@ -302,6 +352,35 @@ def deserialize(data: bytes) -> Any:
     """Deserialize msgpack data from network transmission"""
     return msgpack.unpackb(data, raw=False)
 
+def pack_bitmap(flags: List[bool]) -> bytes:
+    """Pack per-item results into a bitmap, least significant bit first"""
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+def unpack_bitmap(bitmap: bytes, count: int) -> List[bool]:
+    """Expand a bitmap from pack_bitmap back into ``count`` booleans"""
+    return [bool(bitmap[i >> 3] >> (i & 7) & 1) if i >> 3 < len(bitmap) else False for i in range(count)]
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd compression for chain sync responses
+    zstandard = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def zstd_available() -> bool:
+    """Whether zstd bodies can be produced and decoded in this process"""
+    return zstandard is not None
+
+def decode_zstd_body(data: bytes) -> bytes:
+    """Decompress a zstd frame, passing through bodies the HTTP client already decoded"""
+    if zstandard is not None and data[:4] == ZSTD_MAGIC:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
 def serialize_block(data: Any) -> bytes:
     """Serialize data using msgpack"""
     return msgpack.packb(data, use_bin_type=True)
@@ -363,6 +442,18 @@ import importlib
 import os
 import sys
 
+def legacy_merkle_root(tx_ids: List[str]) -> str:
+    """Python equivalent of blockchain_cpp.calculate_merkle_root (hashes the hex text of each pair)"""
+    if not tx_ids:
+        return "0" * 64
+    level = list(tx_ids)
+    while len(level) > 1:
+        level = [
+            hashlib.sha256((level[i] + (level[i + 1] if i + 1 < len(level) else level[i])).encode()).hexdigest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0]
+
 def import_cpp_extension(extension_name):
     """
     Dynamically import C++ extensions with fallback mechanism
@@ -398,7 +489,7 @@ def import_cpp_extension(extension_name):
                         import hashlib
                         return lambda x: hashlib.sha256(x.encode()).hexdigest()
                     elif name == 'calculate_merkle_root':
-                        return lambda tx_ids: hashlib.sha256(''.join(tx_ids).encode()).hexdigest()
+                        return legacy_merkle_root
                     elif name == 'public_key_to_address':
                         return lambda public_key: f"1{hashlib.sha256(public_key.encode()).hexdigest()[:10]}"
                     else: